@@ -0,0 +1,472 @@
+"""
+Contains benchmarks for the language usage analysis code.
+
+Each benchmark is a function returning a dictionary of results, and can be run
+from the command line with ``python benchmarks.py <benchmark name>``, which
+prints the results as JSON, or writes them to a file with ``--output``.
+"""
+import argparse
+import csv
+import json
+import platform
+import string
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+# The number of seconds that importing gamer_words in a fresh interpreter is
+# allowed to take. Batch scoring workers start many times a day, so importing
+# the scoring code must not pull in the scraping or Discord dependencies.
+IMPORT_TIME_BUDGET = 1.0
+
+# Modules that must never be loaded by importing the scoring code.
+HEAVY_IMPORTS = ["praw", "api_keys", "discord"]
+
+# The vocabulary sizes used to check that curating the dictionaries scales
+# linearly.
+CURATION_SIZES = [10_000, 100_000, 1_000_000]
+
+# The vocabulary size used to compare reading frequency CSVs and tables.
+FREQUENCY_FILE_SIZE = 1_000_000
+
+# The number of rows in the CSV used to time CSV ingestion.
+CSV_INGESTION_ROWS = 3_000_000
+
+# The default size of the synthetic corpus and users used to time each stage
+# of the gamer_words pipeline.
+PIPELINE_VOCABULARY_SIZE = 100_000
+PIPELINE_USERS = 1_000
+PIPELINE_WORDS_PER_USER = 5_000
+
+
+def import_in_fresh_interpreter(module_name):
+    """
+    Imports a module in a new Python process and measures how long the import
+    took, not counting the start up time of the interpreter itself.
+
+    Args:
+        module_name: A string representing the name of the module to import.
+    Returns:
+        seconds: A float representing how many seconds the import took.
+        modules: A set of strings representing the names of every module that
+            was loaded after the import.
+    """
+    code = ("import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            f"import {module_name}\n"
+            "seconds = time.perf_counter() - start\n"
+            "print(json.dumps([seconds, sorted(sys.modules)]))\n")
+    output = subprocess.run([sys.executable, "-c", code], check=True,
+                            capture_output=True, text=True).stdout
+    seconds, modules = json.loads(output)
+    return seconds, set(modules)
+
+
+def benchmark_import_time(module_name="gamer_words", repeats=5):
+    """
+    Measures the time it takes to import a module in a fresh interpreter.
+
+    Args:
+        module_name: A string representing the name of the module to import.
+        repeats: An integer representing how many fresh interpreters to time
+            the import in.
+    Returns:
+        A dictionary containing the fastest and slowest import times in
+        seconds, the budget, and which heavy modules were loaded by the import.
+    """
+    times = []
+    modules = set()
+    for _ in range(repeats):
+        seconds, modules = import_in_fresh_interpreter(module_name)
+        times.append(seconds)
+    return {
+        "module": module_name,
+        "best_seconds": min(times),
+        "worst_seconds": max(times),
+        "budget_seconds": IMPORT_TIME_BUDGET,
+        "heavy_imports": [name for name in HEAVY_IMPORTS if name in modules],
+    }
+
+
+def synthetic_words(vocabulary_size):
+    """
+    Creates a list of distinct lowercase words.
+
+    Args:
+        vocabulary_size: An integer representing the number of words to
+            create.
+    Returns:
+        A list of strings representing the words.
+    """
+    letters = string.ascii_lowercase
+    words = []
+    for number in range(vocabulary_size):
+        word = ""
+        number += 1
+        while number > 0:
+            number, letter = divmod(number - 1, len(letters))
+            word += letters[letter]
+        words.append(word)
+    return words
+
+
+def synthetic_word_counts(words, seed=0):
+    """
+    Creates a frequency dictionary where the counts of the words follow a Zipf
+    distribution, like natural language.
+
+    Args:
+        words: A list of strings representing the vocabulary.
+        seed: An integer used to seed the random number generator.
+    Returns:
+        A dictionary with the words as keys and positive integers as values.
+    """
+    rng = np.random.default_rng(seed)
+    counts = np.minimum(rng.zipf(1.3, len(words)), 10**9)
+    return dict(zip(words, counts.tolist()))
+
+
+def synthetic_corpus(vocabulary_size):
+    """
+    Creates synthetic normal and gamer frequency dictionaries with Zipf
+    distributed counts, where the gamer vocabulary overlaps half of the
+    normal vocabulary.
+
+    Args:
+        vocabulary_size: An integer representing the number of words in each
+            dictionary.
+    Returns:
+        normal_dictionary: A dictionary with strings as keys and integers as
+            values representing the normal dataset.
+        gamer_dictionary: A dictionary of the same form representing the gamer
+            dataset.
+    """
+    words = synthetic_words(vocabulary_size)
+    half = vocabulary_size // 2
+    normal_dictionary = synthetic_word_counts(words, seed=1)
+    gamer_dictionary = synthetic_word_counts(
+        words[half:] + [word + "z" for word in words[:half]], seed=2)
+    return normal_dictionary, gamer_dictionary
+
+
+def write_synthetic_users(folder_path, normal_dictionary, gamer_dictionary,
+                          num_users, words_per_user, seed=0):
+    """
+    Writes a folder of synthetic user CSVs, where each user's words are drawn
+    with Zipf distributed ranks from the normal or the gamer vocabulary.
+    Every other user draws from the gamer vocabulary.
+
+    Args:
+        folder_path: A string representing the path to the folder to write.
+        normal_dictionary: A dictionary representing the normal dataset, as
+            returned by synthetic_corpus.
+        gamer_dictionary: A dictionary representing the gamer dataset.
+        num_users: An integer representing the number of users to write.
+        words_per_user: An integer representing how many words each user
+            uses, counting repeats.
+        seed: An integer used to seed the random number generator.
+    Returns:
+        None.
+    """
+    # pylint: disable=import-outside-toplevel
+    from dictionary_io import dict_to_csv
+
+    rng = np.random.default_rng(seed)
+    vocabularies = [
+        np.array(sorted(dictionary, key=dictionary.get, reverse=True))
+        for dictionary in (normal_dictionary, gamer_dictionary)]
+    for number in range(num_users):
+        vocabulary = vocabularies[number % 2]
+        ranks = np.minimum(rng.zipf(1.3, words_per_user),
+                           len(vocabulary)) - 1
+        word_ids, counts = np.unique(ranks, return_counts=True)
+        dict_to_csv(dict(zip(vocabulary[word_ids].tolist(), counts.tolist())),
+                    os.path.join(folder_path, f"user{number}.csv"))
+
+
+def benchmark_curation_scaling(sizes=None, threshold=3):
+    """
+    Times parse_words on synthetic normal and gamer vocabularies of growing
+    size to check that curating the dictionaries scales linearly.
+
+    Args:
+        sizes: A list of integers representing the vocabulary sizes to time,
+            or None for CURATION_SIZES.
+        threshold: An integer passed to parse_words as the minimum number of
+            usages for a word to be kept.
+    Returns:
+        A dictionary with the seconds and microseconds per word taken at each
+        vocabulary size.
+    """
+    # pylint: disable=import-outside-toplevel
+    from gamer_words import parse_words
+
+    results = []
+    for size in sizes or CURATION_SIZES:
+        normal_dictionary, gamer_dictionary = synthetic_corpus(size)
+        start = time.perf_counter()
+        parse_words(normal_dictionary, gamer_dictionary, threshold)
+        seconds = time.perf_counter() - start
+        results.append({"vocabulary_size": size, "seconds": seconds,
+                        "microseconds_per_word": seconds / size * 10**6})
+    return {"benchmark": "curation-scaling", "results": results}
+
+
+def best_time(function, *args, repeats=3):
+    """
+    Times a function call several times.
+
+    Args:
+        function: The function to time.
+        args: The arguments to call the function with.
+        repeats: An integer representing how many times to call the function.
+    Returns:
+        A float representing the fewest seconds a call took.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_frequency_files(size=FREQUENCY_FILE_SIZE):
+    """
+    Compares reading a synthetic frequency dictionary from a CSV and from a
+    binary frequency table.
+
+    Args:
+        size: An integer representing the number of words in the dictionary.
+    Returns:
+        A dictionary with the file sizes in bytes and the seconds taken to
+        read the whole dictionary from each file, to open the table, and to
+        sum its counts straight from the mapped file.
+    """
+    # pylint: disable=import-outside-toplevel
+    from dictionary_io import csv_to_dict, dict_to_csv
+    from frequency_tables import (FrequencyTable, read_frequency_table,
+                                  write_frequency_table)
+
+    word_dict = synthetic_word_counts(synthetic_words(size))
+    with tempfile.TemporaryDirectory() as folder:
+        csv_name = os.path.join(folder, "words.csv")
+        table_name = os.path.join(folder, "words.wft")
+        dict_to_csv(word_dict, csv_name)
+        write_frequency_table(word_dict, table_name)
+        csv_seconds = best_time(csv_to_dict, csv_name)
+        table_seconds = best_time(read_frequency_table, table_name)
+        return {
+            "benchmark": "frequency-files",
+            "vocabulary_size": size,
+            "csv_bytes": os.path.getsize(csv_name),
+            "table_bytes": os.path.getsize(table_name),
+            "csv_read_seconds": csv_seconds,
+            "table_read_seconds": table_seconds,
+            "speedup": csv_seconds / table_seconds,
+            "table_open_seconds": best_time(FrequencyTable, table_name),
+            "table_total_seconds": best_time(
+                lambda: int(FrequencyTable(table_name).counts.sum())),
+        }
+
+
+def reader_csv_to_dict(file_name):
+    """
+    Reads a frequency CSV one row at a time with csv.reader, the way
+    csv_to_dict did before it used the bulk loader.
+
+    Args:
+        file_name: A string representing the path to the CSV.
+    Returns:
+        A dictionary with strings as keys and integers as values.
+    """
+    with open(file_name) as csv_file:
+        word_dict = {}
+        for key, value in csv.reader(csv_file):
+            word_dict[key] = int(value)
+    return word_dict
+
+
+def benchmark_csv_ingestion(rows=CSV_INGESTION_ROWS):
+    """
+    Compares reading a synthetic frequency CSV row by row with csv.reader and
+    in bulk with bulk_csv.py, into a dictionary and into NumPy arrays.
+
+    Args:
+        rows: An integer representing the number of rows in the CSV.
+    Returns:
+        A dictionary with the seconds taken by each loader and their speedups
+        over csv.reader.
+    """
+    # pylint: disable=import-outside-toplevel
+    from bulk_csv import load_csv_arrays, load_csv_dict
+    from dictionary_io import dict_to_csv
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_name = os.path.join(folder, "words.csv")
+        dict_to_csv(synthetic_word_counts(synthetic_words(rows)), file_name)
+        reader_seconds = best_time(reader_csv_to_dict, file_name)
+        dict_seconds = best_time(load_csv_dict, file_name)
+        arrays_seconds = best_time(load_csv_arrays, file_name)
+    return {
+        "benchmark": "csv-ingestion",
+        "rows": rows,
+        "csv_reader_seconds": reader_seconds,
+        "bulk_dict_seconds": dict_seconds,
+        "bulk_arrays_seconds": arrays_seconds,
+        "dict_speedup": reader_seconds / dict_seconds,
+        "arrays_speedup": reader_seconds / arrays_seconds,
+    }
+
+
+def measure_stage(function, *args, track_memory=True):
+    """
+    Runs one stage of a pipeline, timing it and then running it again while
+    tracing memory allocations, since tracing slows the stage down.
+
+    Args:
+        function: The function to run.
+        args: The arguments to call the function with.
+        track_memory: A boolean representing whether to measure the peak
+            memory allocated by the stage.
+    Returns:
+        result: The value returned by the function.
+        stats: A dictionary with the seconds the stage took and, if
+            track_memory is True, the peak bytes allocated while it ran.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    stats = {"seconds": time.perf_counter() - start}
+    if track_memory:
+        tracemalloc.start()
+        try:
+            function(*args)
+            stats["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, stats
+
+
+def environment_info():
+    """
+    Describes the machine and code a benchmark was run on, so that results
+    from different commits can be compared.
+
+    Returns:
+        A dictionary with the commit, Python and NumPy versions, platform and
+        number of CPUs.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def benchmark_pipeline(vocabulary_size=PIPELINE_VOCABULARY_SIZE,
+                       num_users=PIPELINE_USERS,
+                       words_per_user=PIPELINE_WORDS_PER_USER, threshold=3,
+                       track_memory=True):
+    """
+    Times each stage of the gamer_words pipeline, from curating the language
+    model to making the ID card info, on a synthetic corpus and synthetic
+    users.
+
+    Args:
+        vocabulary_size: An integer representing the number of words in each
+            synthetic language dataset.
+        num_users: An integer representing the number of synthetic users.
+        words_per_user: An integer representing how many words each user
+            uses, counting repeats.
+        threshold: An integer passed to parse_words as the minimum number of
+            usages for a word to be kept.
+        track_memory: A boolean representing whether to measure the peak
+            memory of each stage.
+    Returns:
+        A dictionary with the settings, the environment and the seconds and
+        peak memory of each stage.
+    """
+    # pylint: disable=import-outside-toplevel
+    from gamer_words import (analyze_users_language, generate_user_id_dict,
+                             parse_words, stats_and_z_info)
+
+    normal_dictionary, gamer_dictionary = synthetic_corpus(vocabulary_size)
+    stages = {}
+    with tempfile.TemporaryDirectory() as folder_path:
+        write_synthetic_users(folder_path, normal_dictionary,
+                              gamer_dictionary, num_users, words_per_user)
+        model, stages["parse_words"] = measure_stage(
+            parse_words, normal_dictionary, gamer_dictionary, threshold,
+            track_memory=track_memory)
+        user_stats, stages["analyze_users_language"] = measure_stage(
+            analyze_users_language, *model, folder_path,
+            track_memory=track_memory)
+        (_, z_dict, _), stages["stats_and_z_info"] = measure_stage(
+            stats_and_z_info, user_stats, folder_path,
+            track_memory=track_memory)
+        _, stages["generate_user_id_dict"] = measure_stage(
+            generate_user_id_dict, z_dict, user_stats, model[2], folder_path,
+            track_memory=track_memory)
+    return {
+        "benchmark": "pipeline",
+        "vocabulary_size": vocabulary_size,
+        "num_users": num_users,
+        "words_per_user": words_per_user,
+        "environment": environment_info(),
+        "stages": stages,
+        "total_seconds": sum(stage["seconds"] for stage in stages.values()),
+    }
+
+
+BENCHMARKS = {
+    "import-time": benchmark_import_time,
+    "curation-scaling": benchmark_curation_scaling,
+    "frequency-files": benchmark_frequency_files,
+    "csv-ingestion": benchmark_csv_ingestion,
+    "pipeline": benchmark_pipeline,
+}
+
+
+def main():
+    """
+    Runs the benchmark named on the command line and prints its results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--output", help="a file to write the results to")
+    pipeline = parser.add_argument_group("pipeline options")
+    pipeline.add_argument("--vocabulary-size", type=int)
+    pipeline.add_argument("--users", type=int, dest="num_users")
+    pipeline.add_argument("--words-per-user", type=int)
+    pipeline.add_argument("--no-memory", action="store_false",
+                          dest="track_memory")
+    args = parser.parse_args()
+
+    options = {}
+    if args.benchmark == "pipeline":
+        options = {name: getattr(args, name) for name in
+                   ["vocabulary_size", "num_users", "words_per_user",
+                    "track_memory"] if getattr(args, name) is not None}
+    results = json.dumps(BENCHMARKS[args.benchmark](**options), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(results + "\n")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
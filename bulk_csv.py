@@ -0,0 +1,301 @@
+"""
+Contains a bulk loader for frequency CSVs that reads a file in large blocks and
+parses every count in a block at once with NumPy, rather than calling int() on
+one row at a time.
+
+Blocks whose lines are not all of the simple form word,count are parsed with
+csv.reader instead. From the first block with a quote or a line ending in "\r"
+alone, the rest of the file is parsed by one csv.reader in universal newline
+mode, since quoted fields can span lines and blocks, so every file is read the
+same way as opening it in text mode and reading it with csv.reader.
+
+load_csv_arrays is about 3x faster than csv.reader, but load_csv_dict gains
+much less, since hashing and storing millions of new strings in a dictionary
+takes most of its time.
+"""
+import csv
+import warnings
+import numpy as np
+
+# The number of bytes read at a time, extended to the end of the last line.
+BLOCK_BYTES = 64 * 1024 * 1024
+# The ways a malformed line can be handled.
+ON_ERROR_CHOICES = ("raise", "skip", "warn")
+# The most digits a count can have to be parsed without overflowing int64.
+MAX_COUNT_DIGITS = 18
+
+_NEWLINE = ord("\n")
+_COMMA = ord(",")
+_CARRIAGE_RETURN = ord("\r")
+_POWERS_OF_TEN = 10**np.arange(MAX_COUNT_DIGITS, dtype=np.int64)
+
+
+def read_blocks(file_name, block_bytes=BLOCK_BYTES):
+    """
+    Reads a file in blocks that each end at the end of a line.
+
+    Args:
+        file_name: A string representing the path to the file.
+        block_bytes: An integer representing how many bytes to read at a time.
+    Yields:
+        Tuples of the form (block, first_line), where block is the bytes of
+        whole lines ending in a newline and first_line is the line number of
+        the first line in the block, starting at 1.
+    """
+    first_line = 1
+    with open(file_name, "rb") as file:
+        while True:
+            block = file.read(block_bytes)
+            if not block:
+                return
+            if not block.endswith(b"\n"):
+                block += file.readline()
+            if not block.endswith(b"\n"):
+                block += b"\n"
+            yield block, first_line
+            first_line += block.count(b"\n")
+
+
+def handle_malformed_line(file_name, line_number, line, on_error):
+    """
+    Handles a line that is not a word and a count.
+
+    Args:
+        file_name: A string representing the path to the file.
+        line_number: An integer representing the number of the line.
+        line: A string representing the line.
+        on_error: A string in ON_ERROR_CHOICES saying what to do.
+    Returns:
+        None.
+    Raises:
+        ValueError: If on_error is "raise".
+    """
+    message = f"{file_name}, line {line_number}: {line!r} is not a word " \
+        "and a count"
+    if on_error == "raise":
+        raise ValueError(message)
+    if on_error == "warn":
+        warnings.warn(message)
+
+
+def _rows(reader):
+    """
+    Reads the rows of a csv.reader, giving None for a row it cannot parse
+    rather than stopping.
+
+    Args:
+        reader: A csv.reader.
+    Yields:
+        Lists of strings representing the fields of each row, or None.
+    """
+    while True:
+        try:
+            yield next(reader)
+        except StopIteration:
+            return
+        except csv.Error:
+            yield None
+
+
+def parse_records(text, first_line, file_name, on_error):
+    """
+    Parses text with csv.reader, the same way as reading the file in
+    universal newline mode, so quoted fields can span lines and lines can end
+    in "\r" alone.
+
+    A malformed record that spans several lines, such as one opened by a quote
+    that is never closed, is reported as its first line, and the lines after
+    it are read again on their own so they are not lost.
+
+    Args:
+        text: A string representing whole lines of the file.
+        first_line: An integer representing the number of the first line.
+        file_name: A string representing the path to the file.
+        on_error: A string in ON_ERROR_CHOICES.
+    Returns:
+        words: A list of strings representing the words.
+        counts: A list of integers representing the counts.
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    words = []
+    counts = []
+    start = 0
+    while start < len(lines):
+        base = start
+        reader = csv.reader(lines[index] + "\n"
+                            for index in range(base, len(lines)))
+        start = len(lines)
+        record_start = base
+        for row in _rows(reader):
+            record_end = base + reader.line_num
+            try:
+                word, count = row
+                count = int(count)
+            except (TypeError, ValueError):
+                handle_malformed_line(file_name, first_line + record_start,
+                                      lines[record_start], on_error)
+                if record_end - record_start > 1:
+                    start = record_start + 1
+                    break
+            else:
+                words.append(word)
+                counts.append(count)
+            record_start = record_end
+    return words, counts
+
+
+def needs_reader(block):
+    """
+    Determines whether a block has to be parsed together with the rest of the
+    file, because it has quotes, which can open fields that span lines, or
+    lines ending in "\r" alone.
+
+    Args:
+        block: The bytes of whole lines ending in a newline.
+    Returns:
+        A boolean representing whether the block needs parse_records over the
+        rest of the file.
+    """
+    return b'"' in block or block.count(b"\r") != block.count(b"\r\n")
+
+
+def parse_block(block, first_line, file_name, on_error):
+    """
+    Parses a block of a frequency CSV without quotes or lines ending in "\r"
+    alone, parsing every count at once when each line is a word without
+    commas, a comma, and a count.
+
+    Args:
+        block: The bytes of whole lines ending in a newline.
+        first_line: An integer representing the number of the first line.
+        file_name: A string representing the path to the file.
+        on_error: A string in ON_ERROR_CHOICES.
+    Returns:
+        words: A list of strings representing the words.
+        counts: An int64 array of the counts.
+    """
+    buffer = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(buffer == _NEWLINE)
+    commas = np.flatnonzero(buffer == _COMMA)
+    if len(commas) != len(newlines):
+        words, counts = parse_records(block.decode("utf-8"), first_line,
+                                      file_name, on_error)
+        return words, np.array(counts, dtype=np.int64)
+
+    line_starts = np.concatenate(([0], newlines[:-1] + 1))
+    value_ends = newlines - (buffer[np.maximum(newlines - 1, 0)] ==
+                             _CARRIAGE_RETURN)
+    lengths = value_ends - commas - 1
+    if np.any(commas < line_starts) or np.any(lengths < 1) or \
+            np.any(lengths > MAX_COUNT_DIGITS):
+        words, counts = parse_records(block.decode("utf-8"), first_line,
+                                      file_name, on_error)
+        return words, np.array(counts, dtype=np.int64)
+
+    # Gather the digits of every count, then weigh each digit by its place
+    value_starts = np.cumsum(lengths) - lengths
+    places = np.arange(lengths.sum()) - np.repeat(value_starts, lengths)
+    digits = buffer[np.repeat(commas + 1, lengths) + places].astype(np.int64) \
+        - ord("0")
+    if np.any((digits < 0) | (digits > 9)):
+        words, counts = parse_records(block.decode("utf-8"), first_line,
+                                      file_name, on_error)
+        return words, np.array(counts, dtype=np.int64)
+    counts = np.add.reduceat(
+        digits * _POWERS_OF_TEN[np.repeat(lengths, lengths) - 1 - places],
+        value_starts)
+
+    # Every line has exactly one comma, so the words are every other field
+    fields = block.decode("utf-8").replace("\n", ",").split(",")
+    return fields[0:2 * len(newlines):2], counts
+
+
+def check_on_error(on_error):
+    """
+    Checks that on_error is one of ON_ERROR_CHOICES.
+
+    Args:
+        on_error: The value to check.
+    Raises:
+        ValueError: If on_error is not one of ON_ERROR_CHOICES.
+    """
+    if on_error not in ON_ERROR_CHOICES:
+        raise ValueError(f"on_error must be one of {ON_ERROR_CHOICES}, not "
+                         f"{on_error!r}")
+
+
+def load_csv_arrays(file_name, vocabulary=None, on_error="raise",
+                    block_bytes=BLOCK_BYTES):
+    """
+    Loads a frequency CSV into NumPy arrays.
+
+    Args:
+        file_name: A string representing the path to the CSV.
+        vocabulary: An optional dictionary of words to integer columns. When
+            given, the counts are placed in the columns of their words, and
+            words outside of the vocabulary are left out.
+        on_error: "raise" to raise a ValueError on a malformed line, "skip" to
+            leave malformed lines out, or "warn" to leave them out with a
+            warning.
+        block_bytes: An integer representing how many bytes to read at a time.
+    Returns:
+        Without a vocabulary, a tuple of a list of strings representing the
+        words and an int64 array of their counts. With a vocabulary, an int64
+        array of the count in each column.
+    Raises:
+        ValueError: If on_error is not valid, or a line is malformed and
+            on_error is "raise".
+    """
+    check_on_error(on_error)
+    words = []
+    count_blocks = []
+    offset = 0
+    for block, first_line in read_blocks(file_name, block_bytes):
+        if needs_reader(block):
+            # Records may cross the ends of blocks, so read the rest at once
+            with open(file_name, "rb") as file:
+                file.seek(offset)
+                text = file.read().decode("utf-8")
+            block_words, block_counts = parse_records(text, first_line,
+                                                      file_name, on_error)
+            words.extend(block_words)
+            count_blocks.append(np.array(block_counts, dtype=np.int64))
+            break
+        block_words, block_counts = parse_block(block, first_line, file_name,
+                                                on_error)
+        words.extend(block_words)
+        count_blocks.append(block_counts)
+        offset += len(block)
+    counts = np.concatenate(count_blocks) if count_blocks else \
+        np.zeros(0, dtype=np.int64)
+    if vocabulary is None:
+        return words, counts
+
+    columns = np.fromiter((vocabulary.get(word, -1) for word in words),
+                          dtype=np.int64, count=len(words))
+    known = columns >= 0
+    vector = np.zeros(len(vocabulary), dtype=np.int64)
+    vector[columns[known]] = counts[known]
+    return vector
+
+
+def load_csv_dict(file_name, on_error="raise", block_bytes=BLOCK_BYTES):
+    """
+    Loads a frequency CSV into a dictionary, giving the same dictionary as
+    reading it with csv.reader.
+
+    Args:
+        file_name: A string representing the path to the CSV.
+        on_error: "raise", "skip" or "warn", as in load_csv_arrays.
+        block_bytes: An integer representing how many bytes to read at a time.
+    Returns:
+        A dictionary with strings as keys and integers as values.
+    Raises:
+        ValueError: If on_error is not valid, or a line is malformed and
+            on_error is "raise".
+    """
+    words, counts = load_csv_arrays(file_name, on_error=on_error,
+                                    block_bytes=block_bytes)
+    return dict(zip(words, counts.tolist()))
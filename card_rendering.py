@@ -0,0 +1,320 @@
+"""
+Contains the code used to draw the individual user "ID Cards", and to render
+the cards of many users at once across a pool of worker processes.
+
+The fonts and the parts of a card that are the same for every user are only
+made once per process, and each card starts from a copy of that template.
+
+In cached mode, each user's avatar is seeded from their username and each card
+is fingerprinted from the ID info it is drawn from. The fingerprints of the
+saved cards are kept in a manifest in the save folder, and cards whose
+fingerprint has not changed are not drawn again. Cards saved any other way
+are taken out of the manifest first, so a cached run never skips a card that
+was drawn over since.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import hashlib
+import json
+import os
+import tempfile
+from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+
+# The font all of the card text is written in.
+FONT_PATH = "Dosis-Bold.ttf"
+# The width and height of a card in pixels.
+CARD_SIZE = (475, 200)
+# Where the avatar goes on a card, and its width and height in pixels.
+AVATAR_POSITION = (10, 10)
+AVATAR_SIZE = (165, 165)
+# The number of cards handed to a worker at a time.
+DEFAULT_CHUNK_SIZE = 16
+# The zlib level cards are saved with. The lowest level gives the same
+# pixels as the default in a fraction of the encoding time.
+PNG_COMPRESS_LEVEL = 1
+# The file in a save folder holding the fingerprints of the cards saved there.
+MANIFEST_NAME = "card_manifest.json"
+# Part of every fingerprint, to be changed whenever the look of the cards
+# changes so that every cached card is drawn again.
+CARD_VERSION = 1
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(size, font_path=FONT_PATH):
+    """
+    Loads a font once per process and size.
+
+    Args:
+        size: An integer representing the size of the font.
+        font_path: A string representing the path to the font file.
+    Returns:
+        A FreeTypeFont.
+    """
+    return ImageFont.truetype(font_path, size)
+
+
+@functools.lru_cache(maxsize=2)
+def card_template(gamer_status):
+    """
+    Draws the background, the outlines of the ID subsections, the gamer
+    status and the heading of the top gamer words, which are the same on every
+    card with that status.
+
+    Args:
+        gamer_status: A boolean representing whether the card is a gamer's.
+    Returns:
+        An RGB Image that must be copied before being drawn on.
+    """
+    img = Image.new('RGB', CARD_SIZE, color=(250, 250, 250))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, 180, 200), outline="grey", fill="grey")
+    draw.rectangle((185, 10, 470, 60), outline="black")
+    draw.rectangle((185, 65, 470, 145), outline="black")
+    draw.rectangle((190, 70, 465, 90), outline="black")
+    draw.rectangle((190, 95, 465, 115), outline="black")
+    draw.rectangle((190, 120, 465, 140), outline="black")
+    draw.rectangle((185, 150, 470, 190), outline="black")
+    draw.text((190, 10), "GAMER" if gamer_status else "NOT A GAMER",
+              font=load_font(40), fill=(255, 0, 0))
+    draw.text((190, 150), "Most common gamer words - ", font=load_font(14),
+              fill=(0, 0, 0))
+    return img
+
+
+def random_avatar(seed=None):
+    """
+    Creates a random avatar made of 4 by 4 blended colored squares.
+
+    Args:
+        seed: An optional integer to seed the colors with, or None for
+            different colors every time.
+    Returns:
+        An RGBA Image of AVATAR_SIZE.
+    """
+    imarray = np.random.default_rng(seed).random((4, 4, 3)) * 255
+    pfp_img = Image.fromarray(imarray.astype("uint8")).convert("RGBA")
+    return pfp_img.resize(AVATAR_SIZE)
+
+
+def user_avatar(username):
+    """
+    Creates the avatar of a user, which is the same every time it is made.
+
+    Args:
+        username: A string representing the user's username.
+    Returns:
+        An RGBA Image of AVATAR_SIZE.
+    """
+    digest = hashlib.sha256(str(username).encode("utf-8")).digest()
+    return random_avatar(int.from_bytes(digest[:8], "little"))
+
+
+def card_fingerprint(user_id_list):
+    """
+    Fingerprints the ID info a card is drawn from, so that two cards with the
+    same fingerprint look the same.
+
+    Args:
+        user_id_list: A list of the form [username, gamer_status, gamer_z,
+            normal_z, gamer_all_freq, top], as made by create_user_id_info.
+    Returns:
+        A string representing the hex SHA-256 digest of the ID info.
+    """
+    # repr keeps every digit of the floats, including NumPy ones
+    info = [CARD_VERSION, str(user_id_list[0]), user_id_list[1] is True,
+            repr(float(user_id_list[2])), repr(float(user_id_list[3])),
+            repr(float(user_id_list[4])), [str(word) for word in
+                                           user_id_list[5]]]
+    return hashlib.sha256(json.dumps(info).encode("utf-8")).hexdigest()
+
+
+def card_text(user_id_list):
+    """
+    Lays out the text of a user's card, other than the text drawn on the
+    template.
+
+    Args:
+        user_id_list: A list of the form [username, gamer_status, gamer_z,
+            normal_z, gamer_all_freq, top], as made by create_user_id_info.
+    Returns:
+        A list of tuples of the form (position, text, font_size, fill).
+    """
+    username = str(user_id_list[0])
+    gamer_z = "Gamer Z-Score - " + str(round((user_id_list[2]), 4))
+    normal_z = "Normal Z-Score - " + str(round((user_id_list[3]), 4))
+    gamer_to_all = "Gamer:All Words Ratio - " + str(round(user_id_list[4], 4))
+    # The heading line is on the template, and the words go on the line below
+    top_words = "\n"+", ".join([str(elem) for elem in user_id_list[5]])
+    return [((10, 175), username, 16, (0, 0, 0)),
+            ((195, 70), gamer_z, 14, (0, 0, 0)),
+            ((195, 95), normal_z, 14, (0, 0, 0)),
+            ((195, 120), gamer_to_all, 14, (0, 0, 0)),
+            ((190, 150), top_words, 14, (0, 0, 0))]
+
+
+def render_card(user_id_list, avatar=None):
+    """
+    Draws a user's ID card onto a copy of the card template.
+
+    Args:
+        user_id_list: A list of the form [username, gamer_status, gamer_z,
+            normal_z, gamer_all_freq, top], as made by create_user_id_info.
+        avatar: An Image of AVATAR_SIZE to use as the avatar, or None for a
+            random one.
+    Returns:
+        An RGB Image of the card.
+    """
+    img = card_template(user_id_list[1] is True).copy()
+    img.paste(avatar if avatar is not None else random_avatar(),
+              AVATAR_POSITION)
+    draw = ImageDraw.Draw(img)
+    # The avatar outline is drawn over the edge of the avatar
+    draw.rectangle((10, 10, 175, 175), outline="black")
+    for position, text, font_size, fill in card_text(user_id_list):
+        draw.text(position, text, font=load_font(font_size), fill=fill)
+    return img
+
+
+def card_path(user_id_list, save_path):
+    """
+    Gives the path a user's ID card is saved to.
+
+    Args:
+        user_id_list: A list of the form [username, gamer_status, gamer_z,
+            normal_z, gamer_all_freq, top], as made by create_user_id_info.
+        save_path: A string representing a path to save the ID card images to.
+    Returns:
+        A string representing the path of the card.
+    """
+    return f"{save_path}/{user_id_list[0]}.png"
+
+
+def save_card(user_id_list, save_path, seeded=False):
+    """
+    Draws a user's ID card and saves it as a PNG named after the user.
+
+    Args:
+        user_id_list: A list of the form [username, gamer_status, gamer_z,
+            normal_z, gamer_all_freq, top], as made by create_user_id_info.
+        save_path: A string representing a path to save the ID card images to.
+        seeded: A boolean representing whether to seed the avatar from the
+            username rather than making a random one.
+    Returns:
+        A string representing the path of the saved card.
+    """
+    file_name = card_path(user_id_list, save_path)
+    avatar = user_avatar(user_id_list[0]) if seeded else None
+    render_card(user_id_list, avatar).save(file_name,
+                                           compress_level=PNG_COMPRESS_LEVEL)
+    return file_name
+
+
+def read_manifest(save_path):
+    """
+    Reads the fingerprints of the cards saved in a folder.
+
+    Args:
+        save_path: A string representing the path to the folder.
+    Returns:
+        A dictionary with card paths as keys and fingerprints as values, which
+        is empty if the folder has no readable manifest.
+    """
+    try:
+        with open(os.path.join(save_path, MANIFEST_NAME),
+                  encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_manifest(manifest, save_path):
+    """
+    Writes the fingerprints of the cards saved in a folder, replacing the
+    manifest atomically so that an interrupted run never leaves a partial one.
+
+    Args:
+        manifest: A dictionary with card paths as keys and fingerprints as
+            values.
+        save_path: A string representing the path to the folder.
+    Returns:
+        None.
+    """
+    with tempfile.NamedTemporaryFile("w", dir=save_path, suffix=".tmp",
+                                     encoding="utf-8", delete=False) as file:
+        json.dump(manifest, file, indent=0, sort_keys=True)
+    os.replace(file.name, os.path.join(save_path, MANIFEST_NAME))
+
+
+def forget_cards(paths, save_path):
+    """
+    Takes cards out of the manifest of a folder before they are drawn over
+    without a fingerprint, so that the next cached run draws them again.
+
+    Args:
+        paths: A list of strings representing the paths of the cards.
+        save_path: A string representing the path to the folder.
+    Returns:
+        None.
+    """
+    manifest = read_manifest(save_path)
+    if any(path in manifest for path in paths):
+        for path in paths:
+            manifest.pop(path, None)
+        write_manifest(manifest, save_path)
+
+
+def render_id_cards(user_id_dict, save_path, num_workers=None,
+                    chunk_size=DEFAULT_CHUNK_SIZE, cached=False):
+    """
+    Draws and saves the ID cards of many users, spreading the drawing and PNG
+    encoding across a pool of worker processes.
+
+    In cached mode the avatars are seeded from the usernames, so a card only
+    changes when its ID info does, and cards whose ID info has not changed
+    since they were last saved are skipped.
+
+    Args:
+        user_id_dict: A dictionary with the information for each user's ID
+            card as values, as returned by generate_user_id_dict.
+        save_path: A string representing a path to save the ID card images to.
+        num_workers: An integer representing the number of worker processes,
+            or None to use one per CPU. With 1 the cards are drawn in this
+            process.
+        chunk_size: An integer representing how many cards are sent to a
+            worker at a time.
+        cached: A boolean representing whether to seed the avatars from the
+            usernames and skip the cards that have not changed.
+    Returns:
+        A list of strings representing the paths of every user's card,
+        including skipped ones, in the same order as user_id_dict.
+    """
+    os.makedirs(save_path, exist_ok=True)
+    id_lists = list(user_id_dict.values())
+    paths = [card_path(user_id_list, save_path) for user_id_list in id_lists]
+    to_render = id_lists
+    if cached:
+        manifest = read_manifest(save_path)
+        fingerprints = {path: card_fingerprint(user_id_list)
+                        for path, user_id_list in zip(paths, id_lists)}
+        to_render = [user_id_list for path, user_id_list in
+                     zip(paths, id_lists)
+                     if manifest.get(path) != fingerprints[path]
+                     or not os.path.exists(path)]
+    else:
+        forget_cards(paths, save_path)
+
+    save = functools.partial(save_card, save_path=save_path, seeded=cached)
+    if num_workers == 1 or len(to_render) <= 1:
+        for user_id_list in to_render:
+            save(user_id_list)
+    elif to_render:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for _ in executor.map(save, to_render, chunksize=chunk_size):
+                pass
+
+    if cached:
+        manifest.update(fingerprints)
+        write_manifest(manifest, save_path)
+    return paths
@@ -0,0 +1,281 @@
+"""
+Contains a sharded store of scraped word counts, with one frequency CSV per
+subreddit per time window, so that a corpus can be refreshed by scraping only
+the submissions made since the last refresh.
+
+The store is a folder holding one sub-folder per subreddit, each holding one
+CSV per time window named after the Unix time the window starts at, and a
+manifest.json recording the window length and, for each subreddit, the newest
+submission already counted.
+
+A refresh of a subreddit is committed with a journal, the same way as a Discord
+collection in message_collection.py: the merged shards and the new manifest
+are written next to the files they replace, a journal listing them is written,
+and only then are they moved into place. A refresh that stops part way either
+changes nothing or is finished the next time the store is read, so the same
+submissions are never counted twice.
+"""
+import json
+import os
+from collections import Counter
+from dictionary_io import csv_to_dict, dict_to_csv
+from scrape_data import get_reddit, tokenize
+
+# The length of a shard's time window in seconds, one week by default.
+DEFAULT_WINDOW_SECONDS = 7 * 24 * 60 * 60
+
+MANIFEST_NAME = "manifest.json"
+# The file listing the files of a refresh that still have to be moved into
+# place.
+JOURNAL_NAME = "refresh_journal.json"
+
+
+def window_start(created_utc, window_seconds):
+    """
+    Finds the start of the time window a submission belongs to.
+
+    Args:
+        created_utc: A float representing the Unix time the submission was
+            made at.
+        window_seconds: An integer representing the length of a window.
+    Returns:
+        An integer representing the Unix time the window starts at.
+    """
+    return int(created_utc // window_seconds * window_seconds)
+
+
+def shard_path(store_path, subreddit_string, window):
+    """
+    Gives the path of the CSV holding a subreddit's counts for a time window.
+
+    Args:
+        store_path: A string representing the path to the store folder.
+        subreddit_string: A string representing the name of the subreddit.
+        window: An integer representing the Unix time the window starts at.
+    Returns:
+        A string representing the path to the shard CSV.
+    """
+    return os.path.join(store_path, subreddit_string, f"{window}.csv")
+
+
+def load_manifest(store_path, window_seconds):
+    """
+    Loads the manifest of a store, creating an empty one for a new store,
+    first finishing any refresh that was committed but not moved into place.
+
+    Args:
+        store_path: A string representing the path to the store folder.
+        window_seconds: An integer representing the length of a window.
+    Returns:
+        A dictionary with the keys "window_seconds" and "subreddits", which
+        maps each subreddit name to its newest counted submission.
+    Raises:
+        ValueError: If the store was made with a different window length.
+    """
+    if os.path.isdir(store_path):
+        recover_refresh(store_path)
+    manifest_path = os.path.join(store_path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {"window_seconds": window_seconds, "subreddits": {}}
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    if manifest["window_seconds"] != window_seconds:
+        raise ValueError(f"The store at {store_path} uses windows of "
+                         f"{manifest['window_seconds']} seconds, not "
+                         f"{window_seconds}")
+    return manifest
+
+
+def recover_refresh(store_path):
+    """
+    Finishes a refresh whose files were written but not all moved into place,
+    such as after a crash. Moving a finished file into place again has no
+    effect, so recovering twice is safe.
+
+    Args:
+        store_path: A string representing the path to the store folder.
+    Returns:
+        None.
+    """
+    journal_path = os.path.join(store_path, JOURNAL_NAME)
+    if not os.path.exists(journal_path):
+        return
+    with open(journal_path) as file:
+        for temporary_name, file_name in json.load(file):
+            if os.path.exists(temporary_name):
+                os.replace(temporary_name, file_name)
+    os.remove(journal_path)
+
+
+def count_new_submissions(subreddit, watermark, num_posts, window_seconds):
+    """
+    Counts the words of a subreddit's newest submissions by time window,
+    stopping at the first submission older than the ones already counted.
+
+    Once a subreddit has a watermark, the listing is always read until the
+    watermark is reached, since stopping after num_posts would move the
+    watermark past submissions that were never counted.
+
+    Args:
+        subreddit: A praw Subreddit to collect data from.
+        watermark: A dictionary with the keys "created_utc" and "ids"
+            describing the newest counted submissions, or None if none were.
+        num_posts: The most submissions to go through when the subreddit has
+            no watermark yet, or None for as many as Reddit lists.
+        window_seconds: An integer representing the length of a window.
+    Returns:
+        window_counts: A dictionary with integers representing the start of
+            each time window as keys and Counters of words as values.
+        watermark: A dictionary describing the newest counted submissions.
+    """
+    window_counts = {}
+    newest = watermark
+    limit = num_posts if watermark is None else None
+    for submission in subreddit.new(limit=limit):
+        if watermark is not None:
+            if submission.created_utc < watermark["created_utc"]:
+                break
+            # Submissions made at the same time as the newest counted one may
+            # be listed in any order, so only skip the ones already counted
+            if submission.created_utc == watermark["created_utc"] and \
+                    submission.id in watermark["ids"]:
+                continue
+        window = window_start(submission.created_utc, window_seconds)
+        window_counts.setdefault(window, Counter()).update(
+            tokenize(submission.selftext))
+
+        # Several submissions can share the newest time, so keep all their ids
+        if newest is None or submission.created_utc > newest["created_utc"]:
+            newest = {"created_utc": submission.created_utc,
+                      "ids": [submission.id]}
+        elif submission.created_utc == newest["created_utc"] and \
+                submission.id not in newest["ids"]:
+            newest["ids"].append(submission.id)
+    return window_counts, newest
+
+
+def commit_shards(store_path, subreddit_string, window_counts, manifest):
+    """
+    Adds new word counts to a subreddit's shards and saves the manifest as one
+    step, so that counts are never added without the watermark that covers
+    them being saved, or the other way around.
+
+    Args:
+        store_path: A string representing the path to the store folder.
+        subreddit_string: A string representing the name of the subreddit.
+        window_counts: A dictionary with integers representing the start of
+            each time window as keys and dictionaries of words to the number
+            of new uses as values.
+        manifest: A dictionary as returned by load_manifest, already holding
+            the subreddit's new watermark.
+    Returns:
+        None.
+    """
+    recover_refresh(store_path)
+    moves = []
+    for window, counts in window_counts.items():
+        path = shard_path(store_path, subreddit_string, window)
+        shard = Counter(csv_to_dict(path)) if os.path.exists(path) else \
+            Counter()
+        shard.update(counts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        dict_to_csv(shard, path + ".tmp")
+        moves.append([path + ".tmp", path])
+    manifest_path = os.path.join(store_path, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w") as file:
+        json.dump(manifest, file, indent=1)
+    moves.append([manifest_path + ".tmp", manifest_path])
+
+    # Writing the journal commits the refresh
+    journal_path = os.path.join(store_path, JOURNAL_NAME)
+    with open(journal_path + ".tmp", "w") as file:
+        json.dump(moves, file)
+    os.replace(journal_path + ".tmp", journal_path)
+    recover_refresh(store_path)
+
+
+def refresh_shards(subreddit_strings, store_path, num_posts=None,
+                   window_seconds=DEFAULT_WINDOW_SECONDS, reddit=None):
+    """
+    Scrapes the submissions made since the last refresh of each subreddit and
+    merges their word counts into the store.
+
+    Args:
+        subreddit_strings: A list of strings representing the names of
+            subreddits to collect data from.
+        store_path: A string representing the path to the store folder.
+        num_posts: The most submissions to go through on the first refresh of
+            each subreddit, or None for as many as Reddit lists. Later
+            refreshes read every submission made since the last one.
+        window_seconds: An integer representing the length of a window.
+        reddit: A Reddit instance to scrape with, or None to use get_reddit.
+    Returns:
+        A dictionary with the names of the subreddits as keys and lists of
+        the windows whose shards were updated as values.
+    """
+    reddit = reddit or get_reddit()
+    os.makedirs(store_path, exist_ok=True)
+    manifest = load_manifest(store_path, window_seconds)
+
+    updated = {}
+    for subreddit_string in subreddit_strings:
+        window_counts, watermark = count_new_submissions(
+            reddit.subreddit(subreddit_string),
+            manifest["subreddits"].get(subreddit_string), num_posts,
+            window_seconds)
+        updated[subreddit_string] = sorted(window_counts)
+        if watermark is not None:
+            manifest["subreddits"][subreddit_string] = watermark
+            commit_shards(store_path, subreddit_string, window_counts,
+                          manifest)
+    return updated
+
+
+def list_shards(store_path):
+    """
+    Lists every shard in the store.
+
+    Args:
+        store_path: A string representing the path to the store folder.
+    Returns:
+        A sorted list of tuples of the form (subreddit_string, window).
+    """
+    shards = []
+    for subreddit_string in os.listdir(store_path):
+        folder = os.path.join(store_path, subreddit_string)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            if name.endswith(".csv"):
+                shards.append((subreddit_string, int(name[:-4])))
+    return sorted(shards)
+
+
+def merge_shards(store_path, subreddit_strings=None, since=None, until=None):
+    """
+    Combines the shards of the store into a single frequency dictionary that
+    can be given to parse_words.
+
+    Args:
+        store_path: A string representing the path to the store folder.
+        subreddit_strings: A list of strings representing the subreddits to
+            include, or None to include every subreddit.
+        since: A number representing the earliest Unix time to include, or
+            None for no limit. Windows that start before it are left out.
+        until: A number representing the Unix time to stop at, or None for no
+            limit. Windows that start at or after it are left out.
+    Returns:
+        A Counter of every word in the chosen shards.
+    """
+    recover_refresh(store_path)
+    word_dict = Counter()
+    for subreddit_string, window in list_shards(store_path):
+        if subreddit_strings is not None and \
+                subreddit_string not in subreddit_strings:
+            continue
+        if (since is not None and window < since) or \
+                (until is not None and window >= until):
+            continue
+        word_dict.update(csv_to_dict(shard_path(store_path, subreddit_string,
+                                                window)))
+    return word_dict
@@ -0,0 +1,108 @@
+"""
+Contains the functions used to convert between frequency dictionaries and CSVs.
+
+This module only imports the standard library so that it can be imported
+without the scraping dependencies. NumPy is only loaded once a file is read.
+"""
+import os
+
+# The first bytes of a binary frequency table, as written by frequency_tables.
+FREQUENCY_TABLE_MAGIC = b"WFTABLE3"
+# CSVs smaller than this many bytes are read in one go with csv.reader, since
+# the bulk loader only pays off once a file holds many thousands of rows.
+BULK_CSV_BYTES = 1024 * 1024
+
+
+def is_frequency_table(file_name):
+    """
+    Determines whether a file is a binary frequency table rather than a CSV.
+
+    Args:
+        file_name: A string representing the path to the file.
+    Returns:
+        A boolean representing whether the file starts with
+        FREQUENCY_TABLE_MAGIC.
+    """
+    with open(file_name, "rb") as file:
+        return file.read(len(FREQUENCY_TABLE_MAGIC)) == FREQUENCY_TABLE_MAGIC
+
+
+def csv_to_dict(file_name, on_error="raise"):
+    """
+    Given a file name, converts a CSV to a dictionary.
+
+    Assumes that the CSV being converted is a frequency dictionary and as a result,
+    casts all of the values to integers. Binary frequency tables written by
+    frequency_tables.py are detected and read without parsing any text. Small
+    CSVs are read with csv.reader, and CSVs of at least BULK_CSV_BYTES are read
+    in bulk by bulk_csv.py.
+
+    Args:
+        file_name: The path for the CSV file to convert to a dictionary.
+        on_error: What to do with a line that is not a word and a count:
+            "raise" to raise a ValueError, "skip" to leave it out, or "warn"
+            to leave it out with a warning.
+    Returns:
+        A dictionary with strings as keys and integers as values.
+    Raises:
+        ValueError: If on_error is not valid, or a line is malformed and
+            on_error is "raise".
+    """
+    # Only load NumPy when a file is read
+    # pylint: disable=import-outside-toplevel
+    if is_frequency_table(file_name):
+        from frequency_tables import read_frequency_table
+        return read_frequency_table(file_name)
+    if os.path.getsize(file_name) < BULK_CSV_BYTES:
+        from bulk_csv import check_on_error, parse_records
+        check_on_error(on_error)
+        with open(file_name, "rb") as file:
+            text = file.read().decode("utf-8")
+        words, counts = parse_records(text, 1, file_name, on_error)
+        return dict(zip(words, counts))
+    from bulk_csv import load_csv_dict
+    return load_csv_dict(file_name, on_error)
+
+
+def csv_to_arrays(file_name, on_error="raise"):
+    """
+    Given a file name, reads the words and counts of a frequency CSV or table
+    without building a dictionary, for callers that only need the counts of
+    some of the words.
+
+    Args:
+        file_name: The path for the CSV file or frequency table to read.
+        on_error: "raise", "skip" or "warn", as in csv_to_dict.
+    Returns:
+        words: A list of strings representing the words in the order of the
+            file.
+        counts: A NumPy array of the integer count of each word.
+    Raises:
+        ValueError: If on_error is not valid, or a line is malformed and
+            on_error is "raise".
+    """
+    # pylint: disable=import-outside-toplevel
+    if is_frequency_table(file_name):
+        from frequency_tables import FrequencyTable
+        table = FrequencyTable(file_name)
+        return table.words(), table.counts
+    from bulk_csv import load_csv_arrays
+    return load_csv_arrays(file_name, on_error=on_error)
+
+
+
+def dict_to_csv(word_dict, file_name):
+    """
+    Given a dictionary and a file name, creates a new CSV containing the contents
+    of the dictionary.
+
+    Args:
+        word_dict: A dicitonary to be converted into a CSV.
+        file_name: The path for the CSV file the dictionary is being converted
+            into.
+    Return:
+        None.
+    """
+    with open(file_name, 'w') as file:
+        for key in word_dict.keys():
+            file.write("%s,%s\n" % (key, word_dict[key]))
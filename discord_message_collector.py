@@ -3,15 +3,56 @@ Contains the Message Collector discord bot that is used to
 pull user message data from Discord and turn it into individual user
 CSVs.
 """
-from collections import Counter
-from string import punctuation
+import os
 from discord.ext import commands
 import discord
-from scrape_data import dict_to_csv
-from api_keys import disc_keys
+from dictionary_io import csv_to_dict
+from gamer_words import get_file_list
+from live_scoring import LiveScorer
+from message_collection import (
+    collect_author_counts,
+    collect_member_counts,
+    commit_collection,
+    folder_lock,
+    load_watermarks,
+    progress_reporter,
+    run_blocking,
+)
+from model_cache import cached_parse_files
+
+# The most channel histories to read at the same time.
+MAX_CONCURRENT_CHANNELS = 8
+# The folder that guild-wide collection writes one CSV per author into.
+COLLECTION_FOLDER = "user_data"
+# The folder that single member collection writes its CSVs into.
+MEMBER_FOLDER = "."
+# The word frequency CSVs and threshold the live scoring model is curated from.
+NORMAL_CSV = "normal.csv"
+GAMER_CSV = "gaming.csv"
+MODEL_THRESHOLD = 10
 
 
 bot = commands.Bot(command_prefix='~ ')
+# The LiveScorer holding every member's scores, created once the bot is ready.
+scorer = None
+
+
+def load_scorer():
+    """
+    Loads the curated language model and creates a LiveScorer, seeded with the
+    counts of every member already collected into COLLECTION_FOLDER.
+
+    Returns:
+        A LiveScorer.
+    """
+    live_scorer = LiveScorer(*cached_parse_files(NORMAL_CSV, GAMER_CSV,
+                                                 MODEL_THRESHOLD))
+    if os.path.isdir(COLLECTION_FOLDER):
+        for file_name in get_file_list(COLLECTION_FOLDER):
+            live_scorer.add_counts(
+                os.path.basename(file_name)[:-len(".csv")],
+                csv_to_dict(file_name))
+    return live_scorer
 
 
 @bot.event
@@ -25,9 +66,55 @@ async def on_ready():
     Returns:
         None.
     """
+    global scorer  # pylint: disable=global-statement,invalid-name
+    # Discord can call on_ready again after reconnecting
+    if scorer is None:
+        scorer = await run_blocking(load_scorer)
     print(f"Runing {bot.user.name}")
 
 
+@bot.listen("on_message")
+async def score_message(message):
+    """
+    Adds the words of every message sent by a member to their live scores.
+
+    Args:
+        message: The Message that was sent.
+    Returns:
+        None.
+    """
+    if scorer is None or message.author.bot or \
+            message.content.startswith(bot.command_prefix):
+        return
+    scorer.add_message(message.author.name, message.content)
+
+
+@bot.command()
+async def score(ctx, member: discord.Member = None):
+    """
+    When called, replies with the live scores of the listed member, or of the
+    individual who sends the command if there is no listed member. The scores
+    are kept in memory, so nothing is read from disk.
+
+    Args:
+        ctx: A context representing data regarding where the command was sent,
+            and who sent the command.
+        member: A Member representing an individual in the discord server.
+    Returns:
+        None.
+    """
+    member = member or ctx.author
+    member_score = scorer.score(member.name) if scorer is not None else None
+    if member_score is None:
+        await ctx.send(f"There is no data for {member.name} yet")
+        return
+    await ctx.send(
+        f"{member.name} is {'' if member_score['is_gamer'] else 'not '}a "
+        f"gamer (gamer z-score {member_score['gamer_z']:.2f}, normal "
+        f"z-score {member_score['normal_z']:.2f}, "
+        f"{member_score['gamer_ratio']:.2%} gamer words)")
+
+
 @bot.command()
 async def collect(ctx, member: discord.Member = None):
     """
@@ -35,6 +122,9 @@ async def collect(ctx, member: discord.Member = None):
     listed member, all messages of the individual who sends the command will be
     collected.
 
+    Only messages sent since the member was last collected are read, and their
+    counts are added to the member's existing CSV.
+
     Args:
         ctx: A context representing data regarding where the command was sent,
             and who sent the command.
@@ -44,24 +134,67 @@ async def collect(ctx, member: discord.Member = None):
     """
     member = member or ctx.author
 
-    indicator = await ctx.send(f"Collecting {member.name}\'s data")
-    words = ""
+    filename = os.path.join(MEMBER_FOLDER, f"{member.name}.csv")
+    # Only one collection at a time may read and update the folder
+    async with folder_lock(MEMBER_FOLDER):
+        watermarks = await run_blocking(load_watermarks, MEMBER_FOLDER)
+        # Without an existing CSV there is nothing to add to, so start over
+        if not os.path.exists(filename):
+            watermarks["members"].pop(str(member.id), None)
+        member_watermarks = watermarks["members"].setdefault(str(member.id),
+                                                             {})
 
-    for channel in ctx.guild.text_channels:
-        try:
-            async for message in channel.history(limit=None):
-                if message.author == member:
-                    words += message.content.lower().translate(str.maketrans(
-                        '', '', punctuation))
-        except discord.Forbidden:
-            pass
+        indicator = await ctx.send(f"Collecting {member.name}\'s data")
+        user_dict = await collect_member_counts(
+            ctx.guild.text_channels, member, member_watermarks,
+            skip_errors=(discord.Forbidden,),
+            max_concurrent=MAX_CONCURRENT_CHANNELS,
+            on_progress=progress_reporter(
+                indicator, f"Collecting {member.name}\'s data"))
 
-    words = words.split()
+        # Write the files in a worker thread so the bot stays responsive
+        await run_blocking(commit_collection, MEMBER_FOLDER,
+                           {filename: user_dict}, watermarks)
     await indicator.edit(content=f"Done collecting {member.name}\'s data")
 
-    user_dict = Counter(words)
 
-    filename = f"{member.name}.csv"
-    dict_to_csv(user_dict, filename)
+@bot.command()
+async def collect_all(ctx):
+    """
+    When called, collects the message data of every member of the server in a
+    single pass over each channel's history, and writes one CSV per member
+    into COLLECTION_FOLDER.
+
+    Only messages sent since the last guild-wide collection are read, and
+    their counts are added to the existing CSVs.
+
+    Args:
+        ctx: A context representing data regarding where the command was sent,
+            and who sent the command.
+    Returns:
+        None.
+    """
+    # Only one collection at a time may read and update the folder
+    async with folder_lock(COLLECTION_FOLDER):
+        watermarks = await run_blocking(load_watermarks, COLLECTION_FOLDER)
+
+        indicator = await ctx.send("Collecting everyone\'s data")
+        author_counts = await collect_author_counts(
+            ctx.guild.text_channels, watermarks["channels"],
+            skip_errors=(discord.Forbidden,),
+            max_concurrent=MAX_CONCURRENT_CHANNELS,
+            on_progress=progress_reporter(indicator,
+                                          "Collecting everyone\'s data"))
+
+        # Write the files in a worker thread so the bot stays responsive
+        await run_blocking(commit_collection, COLLECTION_FOLDER, {
+            f"{COLLECTION_FOLDER}/{author.name}.csv": counts
+            for author, counts in author_counts.items()}, watermarks)
+    await indicator.edit(
+        content=f"Done collecting {len(author_counts)} members\' data")
+
 
-bot.run(disc_keys["TOKEN"])
+if __name__ == "__main__":
+    # pylint: disable=import-outside-toplevel
+    from api_keys import disc_keys
+    bot.run(disc_keys["TOKEN"])
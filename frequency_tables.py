@@ -0,0 +1,287 @@
+"""
+Contains a compact binary format for frequency dictionaries, which can be
+memory mapped and read without parsing any text.
+
+A frequency table file is laid out as:
+
+    header   8 bytes of MAGIC, then the number of words, the size of the
+             string pool, the width in bytes of each count and the width in
+             bytes of each position in the sorted order, as little-endian
+             unsigned 64 bit integers
+    counts   the count of each word as a little-endian unsigned integer of
+             the narrowest of 1, 2, 4 or 8 bytes that holds the largest count
+    order    the positions of the words sorted by their UTF-8 bytes, in the
+             narrowest of the same widths that holds the number of words
+    pool     the UTF-8 encoded words separated by NUL bytes
+
+The words and counts are kept in the order of the dictionary that was written,
+so reading a whole table only decodes the pool once. Finding a single word is
+a binary search through the stored order that compares the word's bytes with
+the mapped pool, so no other word is decoded. The byte offset of each word in
+the pool is worked out with one pass over the pool the first time a table is
+searched.
+"""
+import functools
+import os
+import numpy as np
+from dictionary_io import (  # pylint: disable=unused-import
+    FREQUENCY_TABLE_MAGIC,
+    csv_to_dict,
+    dict_to_csv,
+    is_frequency_table,
+)
+
+# The first bytes of every frequency table file, including a format version.
+MAGIC = FREQUENCY_TABLE_MAGIC
+# The file extension of frequency tables. It is as long as ".csv" so that user
+# names can be taken from either kind of file name the same way.
+EXTENSION = ".wft"
+# The widths in bytes that counts can be stored with.
+COUNT_WIDTHS = (1, 2, 4, 8)
+
+_HEADER = np.dtype([("magic", "S8"), ("size", "<u8"), ("pool_bytes", "<u8"),
+                    ("count_width", "<u8"), ("order_width", "<u8")])
+_SEPARATOR = "\0"
+
+
+def count_width(largest_count):
+    """
+    Finds the narrowest width that can store every count, or every position,
+    of a table.
+
+    Args:
+        largest_count: An integer representing the largest count or
+            position.
+    Returns:
+        An integer in COUNT_WIDTHS representing the width in bytes.
+    Raises:
+        ValueError: If the count does not fit in 8 bytes.
+    """
+    for width in COUNT_WIDTHS:
+        if largest_count < 2**(8 * width):
+            return width
+    raise ValueError("Counts in a frequency table must be less than 2**64")
+
+
+def write_frequency_table(word_dict, file_name):
+    """
+    Writes a frequency dictionary to a frequency table file.
+
+    Args:
+        word_dict: A dictionary with strings as keys and non-negative integers
+            as values.
+        file_name: A string representing the path of the file to write.
+    Returns:
+        None.
+    Raises:
+        ValueError: If a word contains a NUL character, or a count is negative
+            or too large.
+    """
+    words = list(word_dict)
+    if any(_SEPARATOR in word for word in words):
+        raise ValueError("Words in a frequency table cannot contain NUL")
+    if any(count < 0 for count in word_dict.values()):
+        raise ValueError("Counts in a frequency table cannot be negative")
+    width = count_width(max(word_dict.values(), default=0))
+    pool = _SEPARATOR.join(words).encode("utf-8")
+    counts = np.fromiter(word_dict.values(), dtype=f"<u{width}",
+                         count=len(words))
+    # Strings sort by code point, which is the same order as their UTF-8 bytes
+    order_width = count_width(len(words))
+    order = np.array(sorted(range(len(words)), key=words.__getitem__),
+                     dtype=f"<u{order_width}")
+
+    header = np.array([(MAGIC, len(words), len(pool), width, order_width)],
+                      dtype=_HEADER)
+    with open(file_name, "wb") as file:
+        file.write(header.tobytes())
+        file.write(counts.tobytes())
+        file.write(order.tobytes())
+        file.write(pool)
+
+
+class FrequencyTable:
+    """
+    A read-only, memory mapped view of a frequency table file.
+
+    The counts and the sorted order are views into the mapped file, so opening
+    a table does not read or copy them, and tables opened by several processes
+    share the same pages.
+    """
+
+    def __init__(self, file_name):
+        """
+        Args:
+            file_name: A string representing the path to the file.
+        Raises:
+            ValueError: If the file is not a frequency table.
+        """
+        raw = np.memmap(file_name, dtype=np.uint8, mode="r")
+        header = raw[:_HEADER.itemsize].view(_HEADER)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{file_name} is not a frequency table")
+        size = int(header["size"])
+        width = int(header["count_width"])
+        start = _HEADER.itemsize
+        self.counts = raw[start:start + width * size].view(f"<u{width}")
+        start += width * size
+        width = int(header["order_width"])
+        self.order = raw[start:start + width * size].view(f"<u{width}")
+        start += width * size
+        self.pool = raw[start:start + int(header["pool_bytes"])]
+
+    def __len__(self):
+        return len(self.counts)
+
+    @functools.cached_property
+    def offsets(self):
+        """
+        The byte offset of each word in the string pool, followed by the size
+        of the pool plus one, worked out from the positions of the NUL bytes.
+        """
+        if not len(self):
+            return np.zeros(1, dtype=np.int64)
+        offsets = np.empty(len(self) + 1, dtype=np.int64)
+        offsets[0] = 0
+        offsets[1:-1] = np.flatnonzero(self.pool == 0) + 1
+        offsets[-1] = len(self.pool) + 1
+        return offsets
+
+    def word(self, index):
+        """
+        Gives the word at a position in the table.
+
+        Args:
+            index: An integer representing the position.
+        Returns:
+            A string representing the word.
+        """
+        return self.word_bytes(index).decode("utf-8")
+
+    def word_bytes(self, index):
+        """
+        Gives the UTF-8 bytes of the word at a position in the table.
+
+        Args:
+            index: An integer representing the position.
+        Returns:
+            A bytes object representing the encoded word.
+        """
+        return self.pool[self.offsets[index]:
+                         self.offsets[index + 1] - 1].tobytes()
+
+    def find(self, word):
+        """
+        Finds the position of a word with a binary search through the stored
+        sorted order.
+
+        Args:
+            word: A string representing the word to find.
+        Returns:
+            An integer representing the position of the word, or -1 if the
+            table does not contain it.
+        """
+        encoded = word.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.word_bytes(self.order[middle]) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(self):
+            return -1
+        index = int(self.order[low])
+        return index if self.word_bytes(index) == encoded else -1
+
+    def get(self, word, default=None):
+        """
+        Gives the count of a word.
+
+        Args:
+            word: A string representing the word.
+            default: The value to give if the table does not contain the word.
+        Returns:
+            An integer representing the count of the word, or default.
+        """
+        index = self.find(word)
+        return default if index < 0 else int(self.counts[index])
+
+    def words(self):
+        """
+        Decodes every word of the table at once.
+
+        Returns:
+            A list of strings representing the words in the order of the
+            table.
+        """
+        if not len(self):
+            return []
+        return self.pool.tobytes().decode("utf-8").split(_SEPARATOR)
+
+    def to_dict(self):
+        """
+        Converts the table into a frequency dictionary.
+
+        Returns:
+            A dictionary with the same words, counts and order as the
+            dictionary that was written.
+        """
+        return dict(zip(self.words(), self.counts.tolist()))
+
+
+def read_frequency_table(file_name):
+    """
+    Reads a frequency table file into a frequency dictionary.
+
+    Args:
+        file_name: A string representing the path to the file.
+    Returns:
+        A dictionary with strings as keys and integers as values.
+    """
+    return FrequencyTable(file_name).to_dict()
+
+
+def csv_to_frequency_table(csv_name, table_name=None):
+    """
+    Converts a frequency CSV into a frequency table file.
+
+    Args:
+        csv_name: A string representing the path to the CSV.
+        table_name: A string representing the path of the table to write, or
+            None to replace the CSV's extension with EXTENSION.
+    Returns:
+        A string representing the path of the written table.
+    """
+    if table_name is None:
+        table_name = csv_name[:-len(".csv")] + EXTENSION
+    write_frequency_table(csv_to_dict(csv_name), table_name)
+    return table_name
+
+
+def frequency_table_to_csv(table_name, csv_name):
+    """
+    Converts a frequency table file back into a frequency CSV.
+
+    Args:
+        table_name: A string representing the path to the table.
+        csv_name: A string representing the path of the CSV to write.
+    Returns:
+        None.
+    """
+    dict_to_csv(read_frequency_table(table_name), csv_name)
+
+
+def convert_folder(folder_path):
+    """
+    Writes a frequency table next to every frequency CSV in a folder, so that
+    get_file_list gives the tables instead of the CSVs.
+
+    Args:
+        folder_path: A string representing the path to the folder.
+    Returns:
+        A sorted list of strings representing the paths of the written tables.
+    """
+    return [csv_to_frequency_table(os.path.join(folder_path, name))
+            for name in sorted(os.listdir(folder_path))
+            if name.endswith(".csv")]
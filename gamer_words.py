@@ -4,11 +4,38 @@ statistics for user similarity to gamer and normal dictionaries,
 compute z-scores for gamer and normal distributions, and determine
 whether individuals are gamers or not.
 """
+from collections.abc import Set
 from operator import itemgetter
+from types import MappingProxyType
+import heapq
 import math
 import os
 import numpy as np
-from scrape_data import csv_to_dict
+from dictionary_io import csv_to_arrays, csv_to_dict
+
+# Words longer than this many characters are removed as typos or junk.
+MAX_WORD_LENGTH = 20
+# A word is ignored when its gamer ratio is within these factors of its normal
+# ratio, as it is used similarly often by both communities.
+COMMON_WORD_UPPER_RATIO = 1.25
+COMMON_WORD_LOWER_RATIO = .75
+# A word is a gamer word when it is used this many times more often in the
+# gamer dataset than in the normal dataset.
+GAMER_WORD_RATIO = 8
+# A word missing from the normal dataset is a gamer word when it makes up more
+# than this ratio of the gamer dataset.
+GAMER_WORD_MIN_FREQUENCY = .000079
+
+# The extensions of user files, either frequency CSVs or binary frequency
+# tables.
+USER_FILE_EXTENSIONS = (".csv", ".wft")
+
+# The rows of the array given to compute_z_scores, one per user.
+USER_STATS_DTYPE = np.dtype([("user", object), ("normal", np.float64),
+                             ("gamer", np.float64), ("ratio", np.float64)])
+# The rows of the array returned by compute_z_scores, one per user.
+USER_Z_DTYPE = np.dtype([("user", object), ("normal_z", np.float64),
+                         ("gamer_z", np.float64), ("is_gamer", bool)])
 
 
 def find_most_frequent(word_dictionary, number_items):
@@ -23,8 +50,14 @@ def find_most_frequent(word_dictionary, number_items):
             output.
     Returns:
         most_frequent_dictionary: A value ordered dictionary with strings as
-            keys and integers as values.
+            keys and integers as values. Words with the same value keep the
+            order they have in word_dictionary.
     """
+    if 0 <= number_items < len(word_dictionary):
+        # Only keep the number_items largest items in a heap, which breaks
+        # ties the same way as a stable sort
+        return dict(heapq.nlargest(number_items, word_dictionary.items(),
+                                   key=itemgetter(1)))
     most_frequent_dictionary = dict(
         sorted(word_dictionary.items(), key=itemgetter(1), reverse=True) \
              [:number_items])
@@ -87,9 +120,13 @@ def remove_most_common(normal_dictionary, gamer_dictionary, normal_total_words,
     ignore_list = []
     # Create list of words to ignore
     for word in normal_dictionary:
-        if word in gamer_dictionary and normal_dictionary[word]*1.25 > \
-                gamer_dictionary[word] > normal_dictionary[word]*.75:
+        if word in gamer_dictionary and \
+                normal_dictionary[word]*COMMON_WORD_UPPER_RATIO > \
+                gamer_dictionary[word] > \
+                normal_dictionary[word]*COMMON_WORD_LOWER_RATIO:
             ignore_list.append(word)
+    # Check membership against a set so filtering stays linear
+    ignore_set = set(ignore_list)
 
     # What to do if nothing is in the normal dictionary
     if normal_total_words == 0:
@@ -105,9 +142,9 @@ def remove_most_common(normal_dictionary, gamer_dictionary, normal_total_words,
 
     # Turn the decimal dictionaries into frequency dictionaries
     normal_return_dict = {word: value*normal_total_words for (word, value) in
-                          normal_dictionary.items() if word not in ignore_list}
+                          normal_dictionary.items() if word not in ignore_set}
     gamer_return_dict = {word: value*gamer_total_words for (word, value) in
-                         gamer_dictionary.items() if word not in ignore_list}
+                         gamer_dictionary.items() if word not in ignore_set}
 
     # Find the sum of all values in both frequency dictionaries
     new_gamer_total_words = sum(gamer_return_dict.values())
@@ -138,23 +175,31 @@ def remove_too_uncommon(word_dictionary, threshold=20):
             words and integers as values representing how many times that word
             is used in a dataset.
     """
+    # Keep words in a single pass over the dictionary, without building a
+    # list of words to delete
+    word_return_dictionary = {word: value for (word, value) in
+                              word_dictionary.items() if
+                              int(value) >= threshold and
+                              len(word) <= MAX_WORD_LENGTH
+                              and not is_repeated_typo(word)}
 
-    delete_word = [key for key in dict(word_dictionary).keys() if
-                   int(word_dictionary[key]) < threshold or len(key) > 20]
+    return word_return_dictionary
 
-    # Remove typo words that repeat themselves of the form "wordcword"
-    for key in dict(word_dictionary).keys():
-        if key not in delete_word and "c" in key and (len(key) - 1) % 2 == 0:
-            half_word = key[0:int((len(key)-1)/2)]
-            if half_word in key[int(((len(key)-1)/2)+1):len(key)]:
-                delete_word.append(key)
 
-    # For key in delete_word: word_dictionary.pop(key)
-    word_return_dictionary = {word: value for (word, value) in
-                              word_dictionary.items() if word not in \
-                                  delete_word}
+def is_repeated_typo(word):
+    """
+    Determine whether a word is a typo that repeats itself of the form
+    "wordcword".
 
-    return word_return_dictionary
+    Args:
+        word: A string representing the word to check.
+    Returns:
+        A boolean representing whether the word is a repeated typo.
+    """
+    if "c" not in word or (len(word) - 1) % 2 != 0:
+        return False
+    half_length = (len(word) - 1) // 2
+    return word[0:half_length] in word[half_length + 1:len(word)]
 
 
 def determine_gamer_words(normal_dictionary, gamer_dictionary):
@@ -177,16 +222,17 @@ def determine_gamer_words(normal_dictionary, gamer_dictionary):
     gamer_words = []
 
     for word in gamer_dictionary:
-        # Determine a word to be a gamer word if it is used 50 times more
-        # frequently in gamer subreddits than normal subreddits
+        # Determine a word to be a gamer word if it is used GAMER_WORD_RATIO
+        # times more frequently in gamer subreddits than normal subreddits
         if (word in normal_dictionary) and (normal_dictionary[word] <
-                                            gamer_dictionary[word]/8):
+                                            gamer_dictionary[word] /
+                                            GAMER_WORD_RATIO):
             gamer_words.append(word)
         # If the word is not present in the normal dictionary, then use a
         # simple percentage of uses comparison to determine if the word is
         # used frequently enough to be determined a gamer word
         elif (word not in normal_dictionary) and (gamer_dictionary[word] >
-                                                  .000079):
+                                                  GAMER_WORD_MIN_FREQUENCY):
             gamer_words.append(word)
     return gamer_words
 
@@ -283,8 +329,80 @@ def determine_language_similarity(word_dictionary, user_dictionary):
     return math.sqrt(sum(difference_list))
 
 
+def clean_user_dictionary(user_dictionary, ignore_list):
+    """
+    Remove non useful words from a user's frequency dictionary and convert
+    its values into the ratio of the time each word is used.
+
+    Args:
+        user_dictionary: A dictionary with strings as keys representing words
+            and integers as values representing how many times the user has
+            used that word.
+        ignore_list: A list of strings representing words to remove from a
+            user's language set.
+    Returns:
+        A dictionary with strings as keys and floats as the values
+            representing what ratio of the time that string gets used in the
+            user's personal language dataset.
+    """
+    # Remove non useful user data, checking the ignored words as a set
+    if not isinstance(ignore_list, Set):
+        ignore_list = set(ignore_list)
+    user_dictionary = remove_too_uncommon(user_dictionary, 1)
+    user_dictionary = {word: value for (word, value) in
+                       user_dictionary.items() if word not in ignore_list}
+
+    # Make the values of the user dictionary a ratio
+    user_dictionary, _ = instances_to_decimal(user_dictionary)
+    return user_dictionary
+
+
+def analyze_user_language(normal_dictionary, gamer_dictionary, gamer_words,
+                          ignore_list, user_dictionary):
+    """
+    Analyze a single user's language usage similarity to a normal and gamer
+    language set.
+
+    Args:
+        normal_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing the number of the time that string gets
+            used in the normal dataset.
+        gamer_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing what ratio of the time that string gets
+            used in the gamer dataset.
+        gamer_words: A list of strings representing words used much more
+            commonly by gamers than non gamers, or a GamerVocabulary.
+        ignore_list: A list of strings representing words to remove from a
+            user's language set
+        user_dictionary: A dictionary with strings as keys representing words
+            and integers as values representing how many times the user has
+            used that word.
+    Returns:
+        A list of the form [normal_closeness, gamer_closeness,
+            ratio_gamer_words_used], as described in analyze_users_language.
+    """
+    swap_list = []
+    # Make the values of the user dictionary a ratio
+    user_dictionary = clean_user_dictionary(user_dictionary, ignore_list)
+
+    # Append to the user's output list their closeness values for the
+    # Normal language set and gamer language set in that order
+    swap_list.append(determine_language_similarity(
+        normal_dictionary, user_dictionary))
+    swap_list.append(determine_language_similarity(
+        gamer_dictionary, user_dictionary))
+
+    # Compute what ratio of words that a user uses are gamer words
+    ratio_gamer_words_used = to_gamer_vocabulary(gamer_words).gamer_ratio(
+        user_dictionary)
+    # Append to a user's ouput list the ratio of gamer words they use
+    swap_list.append(ratio_gamer_words_used)
+
+    return swap_list
+
+
 def analyze_users_language(normal_dictionary, gamer_dictionary, gamer_words,
-                           ignore_list, folder_path):
+                           ignore_list, folder_path, file_list=None):
     """
     Analyze a set of several user's language usage data, stored in
     a folder as csv's, similarity to a normal and gamer language set and output
@@ -298,11 +416,14 @@ def analyze_users_language(normal_dictionary, gamer_dictionary, gamer_words,
             as the values representing what ratio of the time that string gets
             used in the gamer dataset.
         gamer_words: A list of strings representing words used much more
-            commonly by gamers than non gamers.
+            commonly by gamers than non gamers, or a GamerVocabulary.
         ignore_list: A list of strings representing words to remove from a
             user's language set
         folder_path: A string representing the relative path of the folder that
             all of the user data csv's are in.
+        file_list: An optional list of strings representing the user csv file
+            paths, as returned by get_file_list, to avoid listing the folder
+            again.
     Returns:
         user_value_dictionary: A dictionary with a string representing the
             relative file path of a user's language usage data as a key and a
@@ -316,48 +437,22 @@ def analyze_users_language(normal_dictionary, gamer_dictionary, gamer_words,
             words used by a user out of all of the words they use.
     """
     # Create a list of user csv file paths
-    file_list = get_file_list(folder_path)
+    if file_list is None:
+        file_list = get_file_list(folder_path)
 
     user_value_dict = {}
-    swap_list = []
+    ignore_set = set(ignore_list)
+    gamer_words = to_gamer_vocabulary(gamer_words)
     # Iterate through users
     for user in file_list:
-
-        swap_list = []
-        # Create a dictionary from the user csv
-        user_dictionary = csv_to_dict(user)
-
-        # Remove non useful user data
-        user_dictionary = remove_too_uncommon(user_dictionary, 1)
-        user_dictionary = {word: value for (word, value) in
-                           user_dictionary.items() if word not in ignore_list}
-
-        # Make the values of the user dictionary a ratio
-        user_dictionary, _ = instances_to_decimal(user_dictionary)
-
-        # Append to the user's output list their closeness values for the
-        # Normal language set and gamer language set in that order
-        swap_list.append(determine_language_similarity(
-            normal_dictionary, user_dictionary))
-        swap_list.append(determine_language_similarity(
-            gamer_dictionary, user_dictionary))
-
-        # Compute what ratio of words that a user uses are gamer words
-        ratio_gamer_words_used = 0
-        for word in gamer_words:
-            if word in user_dictionary.keys():
-                ratio_gamer_words_used += user_dictionary[word]
-        ratio_gamer_words_used = ratio_gamer_words_used / \
-            sum(user_dictionary.values())
-        # Append to a user's ouput list the ratio of gamer words they use
-        swap_list.append(ratio_gamer_words_used)
-
-        user_value_dict[user] = swap_list
+        user_value_dict[user] = analyze_user_language(
+            normal_dictionary, gamer_dictionary, gamer_words, ignore_set,
+            csv_to_dict(user))
 
     return user_value_dict
 
 
-def stats_and_z_info(stats_dict, folder_path):
+def stats_and_z_info(stats_dict, folder_path, file_list=None):
     """
     Given a dictionary containing users and their respective analysis
     statistics, generates the overall statsistics lists, and the z-score values
@@ -370,6 +465,9 @@ def stats_and_z_info(stats_dict, folder_path):
             and the gamer:all words ratio.
         folder_path: A string representing the path to the folder containing
             all of the test user CSVs.
+        file_list: An optional list of strings representing the user csv file
+            paths, as returned by get_file_list, to avoid listing the folder
+            again.
     Returns:
         stats: A list of three lists containing floats; each float list
             contains the data for a singular statistic from the user analysis
@@ -382,7 +480,8 @@ def stats_and_z_info(stats_dict, folder_path):
             of the testing users.
     """
     # Stats dict is output of analyze users_language
-    file_list = get_file_list(folder_path)
+    if file_list is None:
+        file_list = get_file_list(folder_path)
 
     stats = [[],[],[]]
 
@@ -429,9 +528,83 @@ def is_gamer(gamer_z, normal_z):
         return True
     return False
 
+
+def stats_to_array(stats_dict, file_list=None):
+    """
+    Converts the output of analyze_users_language into a structured array with
+    one row per user.
+
+    Args:
+        stats_dict: A dictionary with strings representing the user CSV file
+            paths as keys and lists of the form [normal_closeness,
+            gamer_closeness, ratio_gamer_words_used] as values.
+        file_list: An optional list of strings representing the user CSV file
+            paths in the order to give the rows, or None to use the order of
+            stats_dict.
+    Returns:
+        An array of USER_STATS_DTYPE with the fields "user", "normal", "gamer"
+        and "ratio".
+    """
+    if file_list is None:
+        file_list = list(stats_dict)
+    user_stats = np.empty(len(file_list), dtype=USER_STATS_DTYPE)
+    user_stats["user"] = file_list
+    values = np.array([stats_dict[user] for user in file_list],
+                      dtype=np.float64).reshape(len(file_list), 3)
+    user_stats["normal"] = values[:, 0]
+    user_stats["gamer"] = values[:, 1]
+    user_stats["ratio"] = values[:, 2]
+    return user_stats
+
+
+def compute_z_scores(user_stats):
+    """
+    Computes the z-scores and gamer verdicts of every user at once.
+
+    This is the array version of stats_and_z_info followed by is_gamer for
+    each user. A statistic that is the same for every user has no spread, so
+    its standard deviation is 0 and its z-scores are 0, even when rounding
+    makes the computed standard deviation a tiny positive number.
+
+    Args:
+        user_stats: A structured array with the fields "user", "normal",
+            "gamer" and "ratio", such as one returned by stats_to_array.
+    Returns:
+        z_scores: An array of USER_Z_DTYPE with the fields "user",
+            "normal_z", "gamer_z" and "is_gamer", in the same order as
+            user_stats.
+        means: A tuple of floats of the form (normal_mean, gamer_mean).
+        stds: A tuple of floats of the form (normal_std, gamer_std), the
+            population standard deviations.
+    """
+    z_scores = np.empty(len(user_stats), dtype=USER_Z_DTYPE)
+    z_scores["user"] = user_stats["user"]
+    means = []
+    stds = []
+    for field in ("normal", "gamer"):
+        values = np.asarray(user_stats[field], dtype=np.float64)
+        mean = values.mean() if len(values) else 0.0
+        if not len(values) or np.ptp(values) == 0:
+            std = 0.0
+        else:
+            std = values.std()
+        z_scores[field + "_z"] = np.divide(
+            values - mean, std, out=np.zeros(len(values)), where=std > 0)
+        means.append(float(mean))
+        stds.append(float(std))
+    z_scores["is_gamer"] = z_scores["gamer_z"] - z_scores["normal_z"] < 0
+    return z_scores, tuple(means), tuple(stds)
+
+
 def get_file_list(folder_path):
     """
-    Gets a list of all the files given a folder path.
+    Gets a list of all the user files given a folder path.
+
+    The files are sorted by name so that every function listing the same
+    folder goes through the users in the same order. Only CSVs and binary
+    frequency tables are listed, and a user with both is only listed once, by
+    their frequency table unless the CSV has been changed since the table was
+    written, such as by a collection adding counts to it.
 
     Args:
         Folder path: A string representing a path to the folder containing
@@ -440,11 +613,143 @@ def get_file_list(folder_path):
         A list of strings representing the paths to each of the individual
             users' CSV files.
     """
-    file_list = os.listdir(folder_path)
+    names = set(os.listdir(folder_path))
+
+    def is_current_table(name):
+        # A table is only used while it is at least as new as its CSV
+        csv_name = name[:-4] + ".csv"
+        return csv_name not in names or \
+            os.path.getmtime(os.path.join(folder_path, name)) >= \
+            os.path.getmtime(os.path.join(folder_path, csv_name))
+
+    file_list = []
+    for name in sorted(names):
+        if not name.endswith(USER_FILE_EXTENSIONS):
+            continue
+        if name.endswith(".wft") and not is_current_table(name):
+            continue
+        table_name = name[:-4] + ".wft"
+        if name.endswith(".csv") and table_name in names and \
+                is_current_table(table_name):
+            continue
+        file_list.append(name)
     file_list = [folder_path + "/" + user for user in file_list]
     return file_list
 
 
+class GamerVocabulary:
+    """
+    An immutable index of the gamer words, built once from the output of
+    parse_words and shared by every per-user function.
+
+    It can be used anywhere a list of gamer words is expected: iterating over
+    it gives the gamer words in their original order, and each word has an
+    integer ID which is its position in that order.
+    """
+    __slots__ = ("words", "ids")
+
+    def __init__(self, gamer_words):
+        """
+        Args:
+            gamer_words: An iterable of strings representing the gamer words.
+        """
+        words = tuple(dict.fromkeys(gamer_words))
+        object.__setattr__(self, "words", words)
+        object.__setattr__(self, "ids", MappingProxyType(
+            {word: word_id for (word_id, word) in enumerate(words)}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("A GamerVocabulary cannot be changed")
+
+    def __reduce__(self):
+        return GamerVocabulary, (self.words,)
+
+    def __contains__(self, word):
+        return word in self.ids
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, word_id):
+        return self.words[word_id]
+
+    def __repr__(self):
+        return f"GamerVocabulary({list(self.words)!r})"
+
+    def gamer_ratio(self, user_dictionary):
+        """
+        Computes the ratio of a user's words that are gamer words.
+
+        The values are added in the order of the gamer words, so the result is
+        exactly the same as adding them up while going through a list of the
+        gamer words.
+
+        Args:
+            user_dictionary: A dictionary with strings as keys and numbers as
+                values representing a user's word usage.
+        Returns:
+            A float representing the ratio.
+        """
+        hits = sorted((self.ids[word], value) for (word, value) in
+                      user_dictionary.items() if word in self.ids)
+        ratio_gamer_words_used = 0
+        for _, value in hits:
+            ratio_gamer_words_used += value
+        return ratio_gamer_words_used / sum(user_dictionary.values())
+
+    def top_k(self, user_dict, num_items):
+        """
+        Finds a user's most frequent gamer words.
+
+        Args:
+            user_dict: A dictionary with strings as keys and integers as
+                values representing a user's word frequencies.
+            num_items: The number of gamer words to output.
+        Returns:
+            A dictionary of the same form as returned by find_most_frequent.
+        """
+        return find_most_frequent({word: count for (word, count) in
+                                   user_dict.items() if word in self.ids},
+                                  num_items)
+
+    def top_k_batch(self, user_dicts, num_items):
+        """
+        Finds the most frequent gamer words of many users at once.
+
+        Args:
+            user_dicts: A list of dictionaries representing users' word
+                frequencies.
+            num_items: The number of gamer words to output for each user.
+        Returns:
+            A list of dictionaries, as returned by
+            find_most_frequent_gamer_words_batch.
+        """
+        return find_most_frequent_gamer_words_batch(user_dicts, self,
+                                                    num_items)
+
+
+def to_gamer_vocabulary(gamer_words):
+    """
+    Gives a GamerVocabulary for a list of gamer words, reusing it if it is
+    one already.
+
+    A list is indexed again on every call, so functions that handle many users
+    convert the gamer words once and pass the GamerVocabulary to the per-user
+    functions.
+
+    Args:
+        gamer_words: A list of strings representing the gamer words, or a
+            GamerVocabulary.
+    Returns:
+        A GamerVocabulary.
+    """
+    if isinstance(gamer_words, GamerVocabulary):
+        return gamer_words
+    return GamerVocabulary(gamer_words)
+
 
 def find_most_frequent_gamer_words(user_dict, gamer_words, num_items):
     """
@@ -456,19 +761,68 @@ def find_most_frequent_gamer_words(user_dict, gamer_words, num_items):
             frequencies. The keys are strings reprenting the words that the
             user has said and the values are integers representing how many
             times the corresponding key has been sent as a message by the user.
-        gamer_words: A list of strings representing the gamer words.
+        gamer_words: A list of strings representing the gamer words, or a
+            GamerVocabulary.
         num_items: The number of gamer_words to output.
     Returns:
         A dictionary representing the most frequent gamer words present in the
         users' messages. The keys are strings representing the gamer words and
         the values are numbers representing their corresponding frequencies.
 """
-    user_gamer_words = {}
-    for word in user_dict:
-        if word in gamer_words:
-            user_gamer_words[word] = user_dict[word]
+    return to_gamer_vocabulary(gamer_words).top_k(user_dict, num_items)
+
+
+def find_most_frequent_gamer_words_file(file_name, gamer_words, num_items):
+    """
+    Finds the most frequent gamer words of a user straight from their
+    frequency CSV or table, giving the same dictionary as calling
+    find_most_frequent_gamer_words on csv_to_dict of the file.
 
-    return find_most_frequent(user_gamer_words, num_items)
+    Only the counts of the gamer words are needed, so the file is read into
+    arrays and only the user's gamer words are put into a dictionary.
+
+    Args:
+        file_name: A string representing the path to the user's frequency
+            CSV or table.
+        gamer_words: A list of strings representing the gamer words, or a
+            GamerVocabulary.
+        num_items: The number of gamer_words to output.
+    Returns:
+        A dictionary of the same form as returned by
+        find_most_frequent_gamer_words.
+    """
+    vocabulary = to_gamer_vocabulary(gamer_words)
+    words, counts = csv_to_arrays(file_name)
+    return find_most_frequent({word: count for (word, count) in
+                               zip(words, counts.tolist())
+                               if word in vocabulary}, num_items)
+
+
+def find_most_frequent_gamer_words_batch(user_dicts, gamer_words, num_items):
+    """
+    Finds the most frequent gamer words of many users at once, giving the
+    same dictionaries as calling find_most_frequent_gamer_words on each user.
+
+    The gamer words are converted into a GamerVocabulary once, and then each
+    user is handled in turn, so only one user's gamer words are held at a time
+    and memory does not grow with the number of users or gamer words. Ties are
+    broken by the order of the words in each user's dictionary, the same as
+    find_most_frequent.
+
+    Args:
+        user_dicts: An iterable of dictionaries representing individual users'
+            word frequencies, with strings as keys and non-negative integers
+            as values.
+        gamer_words: A list of strings representing the gamer words, or a
+            GamerVocabulary.
+        num_items: The number of gamer words to output for each user.
+    Returns:
+        A list with a dictionary of the most frequent gamer words for each
+        user, in the same order as user_dicts.
+    """
+    vocabulary = to_gamer_vocabulary(gamer_words)
+    return [vocabulary.top_k(user_dict, num_items) for user_dict in
+            user_dicts]
 
 
 def determine_gamer_words_frequency(gamer_words_list, gamer_dictionary):
@@ -495,7 +849,8 @@ def determine_gamer_words_frequency(gamer_words_list, gamer_dictionary):
     return gamer_words
 
 
-def generate_user_id_dict(z_dict, user_stats_dict, gamer_words, folder_path):
+def generate_user_id_dict(z_dict, user_stats_dict, gamer_words, folder_path,
+                          file_list=None):
     """
     Generates the info necessary to create the individual user ID cards.
 
@@ -507,9 +862,13 @@ def generate_user_id_dict(z_dict, user_stats_dict, gamer_words, folder_path):
             individual user. The keys are strings representing the path to the
             users' data and the values are a list containing the three primary
             stats calculated for each user.
-        gamer_words: A list of strings represenging the gamer words.
+        gamer_words: A list of strings represenging the gamer words, or a
+            GamerVocabulary.
         folder_path: A string representing the path to the folder containing
             all the individual users' data.
+        file_list: An optional list of strings representing the user csv file
+            paths, as returned by get_file_list, to avoid listing the folder
+            again.
     Returns:
         user_id_dict: A dictionary representing the information that goes on
             each individual users' ID card. The keys are strings representing
@@ -518,19 +877,110 @@ def generate_user_id_dict(z_dict, user_stats_dict, gamer_words, folder_path):
     """
     user_id_dict = {}
 
-    file_list = get_file_list(folder_path)
+    if file_list is None:
+        file_list = get_file_list(folder_path)
 
+    gamer_words = to_gamer_vocabulary(gamer_words)
     for user in file_list:
-        username = str(user)[len(str(folder_path))+1:-4]
-        gamer_z = z_dict[user][1]
-        normal_z = z_dict[user][0]
-        gamer_status = is_gamer(gamer_z, normal_z)
-        gamer_all_freq = user_stats_dict[user][2]
-        top = list(find_most_frequent_gamer_words(
-            csv_to_dict(user), gamer_words, 5).keys())
-
-        id_info = [username, gamer_status,
-                   gamer_z, normal_z, gamer_all_freq, top]
-        user_id_dict[user] = id_info
+        top = list(find_most_frequent_gamer_words_file(
+            user, gamer_words, 5).keys())
+        user_id_dict[user] = create_user_id_info(
+            user, folder_path, z_dict[user], user_stats_dict[user], top)
 
     return user_id_dict
+
+
+def create_user_id_info(user, folder_path, z_scores, user_stats, top):
+    """
+    Creates the list of information that goes on a single user's ID card.
+
+    Args:
+        user: A string representing the path to the user's data.
+        folder_path: A string representing the path to the folder containing
+            all the individual users' data.
+        z_scores: A list containing the user's normal and gamer z-scores.
+        user_stats: A list containing the three primary stats calculated for
+            the user.
+        top: A list of strings representing the user's most frequent gamer
+            words.
+    Returns:
+        A list of the form [username, gamer_status, gamer_z, normal_z,
+            gamer_all_freq, top].
+    """
+    username = str(user)[len(str(folder_path))+1:-4]
+    gamer_z = z_scores[1]
+    normal_z = z_scores[0]
+    gamer_status = is_gamer(gamer_z, normal_z)
+    gamer_all_freq = user_stats[2]
+
+    return [username, gamer_status, gamer_z, normal_z, gamer_all_freq, top]
+
+
+def analyze_users_pipeline(normal_dictionary, gamer_dictionary, gamer_words,
+                           ignore_list, folder_path):
+    """
+    Analyze a folder of users' language usage data in a single pass, reading
+    each user's CSV only once, and create a record of every result for each
+    user.
+
+    This combines analyze_users_language, stats_and_z_info and
+    generate_user_id_dict, and the folder is only listed once.
+
+    Args:
+        normal_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing the number of the time that string gets
+            used in the normal dataset.
+        gamer_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing what ratio of the time that string gets
+            used in the gamer dataset.
+        gamer_words: A list of strings representing words used much more
+            commonly by gamers than non gamers, or a GamerVocabulary.
+        ignore_list: A list of strings representing words to remove from a
+            user's language set
+        folder_path: A string representing the relative path of the folder that
+            all of the user data csv's are in.
+    Returns:
+        user_records: A dictionary with strings representing the path to the
+            users' data as keys and dictionaries as values. Each user record
+            has the keys "username", "normal_closeness", "gamer_closeness",
+            "gamer_ratio", "top_gamer_words", "normal_z", "gamer_z" and
+            "is_gamer".
+        stats: A list of three lists of floats, as returned by
+            stats_and_z_info.
+        z_lists: A list of two lists of floats, as returned by
+            stats_and_z_info.
+    """
+    file_list = get_file_list(folder_path)
+
+    user_stats_dict = {}
+    top_words_dict = {}
+    ignore_set = set(ignore_list)
+    gamer_words = to_gamer_vocabulary(gamer_words)
+    for user in file_list:
+        user_dictionary = csv_to_dict(user)
+        user_stats_dict[user] = analyze_user_language(
+            normal_dictionary, gamer_dictionary, gamer_words, ignore_set,
+            user_dictionary)
+        top_words_dict[user] = list(find_most_frequent_gamer_words(
+            user_dictionary, gamer_words, 5).keys())
+
+    stats, z_dict, z_lists = stats_and_z_info(user_stats_dict, folder_path,
+                                              file_list)
+
+    user_records = {}
+    for user in file_list:
+        id_info = create_user_id_info(user, folder_path, z_dict[user],
+                                      user_stats_dict[user],
+                                      top_words_dict[user])
+        user_records[user] = {
+            "username": id_info[0],
+            "normal_closeness": user_stats_dict[user][0],
+            "gamer_closeness": user_stats_dict[user][1],
+            "gamer_ratio": user_stats_dict[user][2],
+            "top_gamer_words": id_info[5],
+            "normal_z": id_info[3],
+            "gamer_z": id_info[2],
+            "is_gamer": id_info[1],
+        }
+
+    return user_records, stats, z_lists
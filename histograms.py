@@ -0,0 +1,425 @@
+"""
+Contains streaming histograms that bin users' closeness stats and z-scores as
+they are scored, so that the histograms of a very large population can be
+drawn without keeping every user's values.
+
+Every histogram can be merged with another histogram binned the same way, so
+that workers scoring separate groups of users can each build a partial
+histogram to be merged into the histogram of the whole population.
+
+A z-score is the closeness stat shifted by the population mean and scaled by
+the population standard deviation, so the z-score histograms are the closeness
+histograms with their bin edges moved, and the z-scores of the users never
+need to be computed.
+"""
+import numpy as np
+
+# The number of bins a histogram has when none is given.
+DEFAULT_NUM_BINS = 100
+# The narrowest bin width of an adaptive histogram. Wider bins are this width
+# times a power of two, so that bins are always merged in exact pairs.
+DEFAULT_BASE_WIDTH = 2.0**-20
+
+
+def _finite(values):
+    """
+    Gives the finite values of a scalar or a sequence of values.
+
+    Args:
+        values: A float or a sequence of floats.
+    Returns:
+        A 1D float64 array of the finite values.
+    """
+    values = np.ravel(np.asarray(values, dtype=np.float64))
+    return values[np.isfinite(values)]
+
+
+class FixedHistogram:
+    """
+    A histogram with num_bins equal bins between low and high. Values outside
+    of the bins are counted in underflow and overflow, and left out of the
+    bins the same way as by plt.hist.
+
+    Attributes:
+        edges: An array of the num_bins + 1 bin edges.
+        counts: An int64 array of the number of values in each bin.
+        underflow: An integer representing how many values were below low.
+        overflow: An integer representing how many values were above high.
+    """
+
+    def __init__(self, low, high, num_bins=DEFAULT_NUM_BINS):
+        """
+        Args:
+            low: A float representing the lower edge of the first bin.
+            high: A float representing the upper edge of the last bin.
+            num_bins: An integer representing the number of bins.
+        Raises:
+            ValueError: If high is not greater than low, or num_bins is less
+                than 1.
+        """
+        if not high > low or num_bins < 1:
+            raise ValueError("A histogram needs low < high and at least one "
+                             "bin")
+        self.edges = np.linspace(low, high, num_bins + 1)
+        self.counts = np.zeros(num_bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, values):
+        """
+        Bins a value or a sequence of values. Values that are not finite are
+        left out.
+
+        Args:
+            values: A float or a sequence of floats.
+        """
+        values = _finite(values)
+        self.counts += np.histogram(values, self.edges)[0]
+        self.underflow += int(np.count_nonzero(values < self.edges[0]))
+        self.overflow += int(np.count_nonzero(values > self.edges[-1]))
+
+    def merge(self, other):
+        """
+        Adds the counts of another histogram with the same bins.
+
+        Args:
+            other: A FixedHistogram with the same edges.
+        Returns:
+            This histogram.
+        Raises:
+            ValueError: If the histograms' bins are different.
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Only histograms with the same bins can be "
+                             "merged")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def scaled(self, mean, std):
+        """
+        Gives the histogram of (value - mean) / std for the binned values.
+
+        Args:
+            mean: A float to subtract from every value.
+            std: A float to divide every value by. If it is 0, every value is
+                taken to be 0, as in compute_z_scores.
+        Returns:
+            A FixedHistogram.
+        """
+        return _scaled(self.edges, self.counts, mean, std)
+
+
+class AdaptiveHistogram:
+    """
+    A histogram of at most num_bins bins that grows to fit the values it is
+    given. Its bins are base_width times a power of two wide and start at
+    multiples of their width, and whenever a value does not fit, neighbouring
+    bins are merged in pairs until it does.
+
+    Two adaptive histograms with the same num_bins and base_width can always
+    be merged, and the result does not depend on the order values were added
+    or histograms were merged in.
+    """
+
+    def __init__(self, num_bins=DEFAULT_NUM_BINS,
+                 base_width=DEFAULT_BASE_WIDTH):
+        """
+        Args:
+            num_bins: An integer representing the most bins to keep.
+            base_width: A float representing the narrowest bin width.
+        Raises:
+            ValueError: If num_bins is less than 2 or base_width is not
+                positive.
+        """
+        if num_bins < 2 or not base_width > 0:
+            raise ValueError("An adaptive histogram needs at least two bins "
+                             "and a positive base width")
+        self.num_bins = num_bins
+        self.base_width = base_width
+        # Bin i holds the values whose base bin index shifted right by level
+        # is offset + i
+        self.level = 0
+        self.offset = 0
+        self.lowest = None
+        self.highest = None
+        self._counts = np.zeros(num_bins, dtype=np.int64)
+
+    def _fit(self, lowest, highest, level=0):
+        """
+        Merges bins until the base bin indices lowest to highest fit in the
+        histogram.
+
+        Args:
+            lowest: An integer representing the lowest base bin index to fit.
+            highest: An integer representing the highest base bin index.
+            level: An integer representing the lowest level to merge to.
+        """
+        if self.lowest is not None:
+            lowest = min(lowest, self.lowest)
+            highest = max(highest, self.highest)
+            level = max(level, self.level)
+        while (highest >> level) - (lowest >> level) >= self.num_bins:
+            level += 1
+        offset = lowest >> level
+        if self.lowest is not None:
+            old_bins = (self.offset + np.arange(self.num_bins)) >> \
+                (level - self.level)
+            self._counts = np.bincount(old_bins - offset,
+                                       weights=self._counts,
+                                       minlength=self.num_bins).astype(
+                                           np.int64)[:self.num_bins]
+        self.level, self.offset = level, offset
+        self.lowest, self.highest = lowest, highest
+
+    def add(self, values):
+        """
+        Bins a value or a sequence of values. Values that are not finite are
+        left out.
+
+        Args:
+            values: A float or a sequence of floats.
+        """
+        values = _finite(values)
+        if not values.size:
+            return
+        indices = np.floor(values / self.base_width).astype(np.int64)
+        self._fit(int(indices.min()), int(indices.max()))
+        self._counts += np.bincount((indices >> self.level) - self.offset,
+                                    minlength=self.num_bins)
+
+    def merge(self, other):
+        """
+        Adds the counts of another adaptive histogram.
+
+        Args:
+            other: An AdaptiveHistogram with the same num_bins and base_width.
+        Returns:
+            This histogram.
+        Raises:
+            ValueError: If the histograms have different settings.
+        """
+        if (self.num_bins, self.base_width) != \
+                (other.num_bins, other.base_width):
+            raise ValueError("Only histograms with the same number of bins "
+                             "and base width can be merged")
+        if other.lowest is None:
+            return self
+        self._fit(other.lowest, other.highest, other.level)
+        other_bins = (other.offset + np.arange(other.num_bins)) >> \
+            (self.level - other.level)
+        self._counts += np.bincount(other_bins - self.offset,
+                                    weights=other._counts,
+                                    minlength=self.num_bins).astype(
+                                        np.int64)[:self.num_bins]
+        return self
+
+    def _occupied(self):
+        """
+        Gives the range of bins from the first to the last that has values.
+
+        Returns:
+            A tuple of the first bin and one past the last bin.
+        """
+        nonzero = np.flatnonzero(self._counts)
+        if not nonzero.size:
+            return 0, 0
+        return int(nonzero[0]), int(nonzero[-1]) + 1
+
+    @property
+    def edges(self):
+        """
+        An array of the edges of the bins from the first to the last that has
+        values.
+        """
+        first, last = self._occupied()
+        if first == last:
+            return np.zeros(0)
+        width = self.base_width * 2.0**self.level
+        return (self.offset + np.arange(first, last + 1)) * width
+
+    @property
+    def counts(self):
+        """
+        An int64 array of the number of values in each bin of edges.
+        """
+        first, last = self._occupied()
+        return self._counts[first:last].copy()
+
+    def scaled(self, mean, std):
+        """
+        Gives the histogram of (value - mean) / std for the binned values.
+
+        Args:
+            mean: A float to subtract from every value.
+            std: A float to divide every value by. If it is 0, every value is
+                taken to be 0, as in compute_z_scores.
+        Returns:
+            A FixedHistogram.
+        """
+        return _scaled(self.edges, self.counts, mean, std)
+
+
+def _scaled(edges, counts, mean, std):
+    """
+    Moves the bins of a histogram to the values (value - mean) / std.
+
+    Args:
+        edges: An array of the bin edges.
+        counts: An array of the number of values in each bin.
+        mean: A float to subtract from every value.
+        std: A float to divide every value by, or 0.
+    Returns:
+        A FixedHistogram.
+    """
+    if not std > 0 or not len(counts):
+        histogram = FixedHistogram(-0.5, 0.5, 1)
+        histogram.counts[0] = counts.sum()
+        return histogram
+    histogram = FixedHistogram((edges[0] - mean) / std,
+                               (edges[-1] - mean) / std, len(counts))
+    histogram.counts += counts
+    return histogram
+
+
+class ScoreHistograms:
+    """
+    Histograms of the normal closeness, gamer closeness and gamer:all words
+    ratio of scored users, along with the count, mean and sum of squared
+    differences from the mean of each stat, which are merged with the
+    parallel formula of Chan et al.
+    """
+
+    def __init__(self, num_bins=DEFAULT_NUM_BINS, ranges=None):
+        """
+        Args:
+            num_bins: An integer representing the number of bins of each
+                histogram.
+            ranges: An optional list of three (low, high) tuples giving fixed
+                bins for each stat, or None to use adaptive bins.
+        """
+        if ranges is None:
+            self.histograms = [AdaptiveHistogram(num_bins) for _ in range(3)]
+        else:
+            self.histograms = [FixedHistogram(low, high, num_bins)
+                               for low, high in ranges]
+        self.count = 0
+        self.means = np.zeros(3)
+        self.squares = np.zeros(3)
+
+    def add_users(self, user_stats):
+        """
+        Bins the stats of many users.
+
+        Args:
+            user_stats: A sequence of lists of the form [normal_closeness,
+                gamer_closeness, ratio_gamer_words_used], such as the values
+                of the dictionary returned by analyze_users_language.
+        """
+        user_stats = np.asarray(list(user_stats), dtype=np.float64).reshape(
+            -1, 3)
+        if not len(user_stats):
+            return
+        for histogram, column in zip(self.histograms, user_stats.T):
+            histogram.add(column)
+        means = user_stats.mean(axis=0)
+        self._merge_moments(len(user_stats), means,
+                            ((user_stats - means)**2).sum(axis=0))
+
+    def add_user(self, user_stats):
+        """
+        Bins the stats of one user.
+
+        Args:
+            user_stats: A list of the form [normal_closeness, gamer_closeness,
+                ratio_gamer_words_used].
+        """
+        self.add_users([user_stats])
+
+    def _merge_moments(self, count, means, squares):
+        """
+        Combines the moments of another group of users with these.
+
+        Args:
+            count: An integer representing the number of users in the group.
+            means: An array of the mean of each stat over the group.
+            squares: An array of the sum of squared differences from the mean
+                of each stat over the group.
+        """
+        total = self.count + count
+        delta = means - self.means
+        self.means = self.means + delta * count / total
+        self.squares = self.squares + squares + \
+            delta**2 * self.count * count / total
+        self.count = total
+
+    def merge(self, other):
+        """
+        Adds the histograms and moments of another ScoreHistograms, such as
+        the partial histograms of a worker.
+
+        Args:
+            other: A ScoreHistograms binned the same way.
+        Returns:
+            This ScoreHistograms.
+        """
+        for histogram, other_histogram in zip(self.histograms,
+                                              other.histograms):
+            histogram.merge(other_histogram)
+        if other.count:
+            self._merge_moments(other.count, other.means, other.squares)
+        return self
+
+    def stds(self):
+        """
+        Gives the population standard deviation of each stat, like np.std.
+
+        Returns:
+            An array of three floats.
+        """
+        if not self.count:
+            return np.zeros(3)
+        return np.sqrt(self.squares / self.count)
+
+    def stats_histograms(self):
+        """
+        Gives the histograms of the stats, in the order of the stats lists
+        returned by stats_and_z_info.
+
+        Returns:
+            A list of the normal closeness, gamer closeness and gamer:all
+            words ratio histograms.
+        """
+        return list(self.histograms)
+
+    def z_histograms(self):
+        """
+        Gives the histograms of the z-scores, in the order of the z_list
+        returned by stats_and_z_info.
+
+        Returns:
+            A list of the normal and gamer z-score histograms, as
+            FixedHistograms.
+        """
+        stds = self.stds()
+        return [self.histograms[i].scaled(self.means[i], stds[i])
+                for i in range(2)]
+
+
+def score_histograms(stats_dict, num_bins=DEFAULT_NUM_BINS, ranges=None):
+    """
+    Bins the stats of every user in a dictionary.
+
+    Args:
+        stats_dict: A dictionary of the form returned by
+            analyze_users_language.
+        num_bins: An integer representing the number of bins.
+        ranges: An optional list of three (low, high) tuples, as in
+            ScoreHistograms.
+    Returns:
+        A ScoreHistograms.
+    """
+    histograms = ScoreHistograms(num_bins, ranges)
+    histograms.add_users(stats_dict.values())
+    return histograms
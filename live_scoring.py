@@ -0,0 +1,246 @@
+"""
+Contains the in-memory scorer the Message Collector discord bot uses to score
+members live as their messages arrive, without reading any CSVs.
+
+For a user who has used word w c_w times out of T words, with a language
+dataset using it L_w of the time, the squared closeness value computed by
+determine_language_similarity is the sum over the user's words of
+(c_w/T - L_w)**2, which expands to
+
+    (sum of c_w**2)/T**2 - 2*(sum of c_w*L_w)/T + (sum of L_w**2)
+
+The scorer keeps these three sums for each user and each language, so every new
+word updates a user's closeness values in constant time. The population means
+and standard deviations used for the z-scores are kept as running sums in the
+same way.
+"""
+import math
+from gamer_words import MAX_WORD_LENGTH, is_gamer, is_repeated_typo
+from scrape_data import tokenize
+
+
+class RunningStatistics:
+    """
+    The running mean and population standard deviation of a set of values
+    that can be added, removed and replaced one at a time.
+
+    The mean and the sum of squared differences from it are updated with
+    Welford's method, written as the parallel formula of Chan et al. used by
+    ScoreHistograms in histograms.py, so that replacing values many times does
+    not build up the rounding errors of keeping raw sums of squares.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean_value = 0.0
+        self.squares = 0.0
+
+    def _merge(self, count, value):
+        """
+        Adds a value to the set, or removes it when count is -1.
+
+        Args:
+            count: 1 to add the value or -1 to remove it.
+            value: A float to add or remove.
+        """
+        total = self.count + count
+        if total <= 0:
+            self.count, self.mean_value, self.squares = 0, 0.0, 0.0
+            return
+        delta = value - self.mean_value
+        self.mean_value += delta * count / total
+        self.squares = max(self.squares + delta**2 * self.count * count /
+                           total, 0.0)
+        self.count = total
+
+    def add(self, value):
+        """
+        Adds a value to the set.
+
+        Args:
+            value: A float to add.
+        """
+        self._merge(1, value)
+
+    def remove(self, value):
+        """
+        Removes a value that was previously added from the set.
+
+        Args:
+            value: A float to remove.
+        """
+        self._merge(-1, value)
+
+    def mean(self):
+        """
+        Returns the mean of the set, or 0 for an empty set.
+        """
+        return self.mean_value
+
+    def std(self):
+        """
+        Returns the population standard deviation of the set, like np.std.
+        """
+        if not self.count:
+            return 0.0
+        return math.sqrt(self.squares / self.count)
+
+    def z_score(self, value):
+        """
+        Computes the z-score of a value in the set, or 0 if all of the values
+        are the same.
+
+        Args:
+            value: A float to compute the z-score of.
+        Returns:
+            A float representing the z-score.
+        """
+        std = self.std()
+        return (value - self.mean()) / std if std > 0 else 0.0
+
+
+class LiveScorer:
+    """
+    Keeps every user's word counts and closeness sums in memory and scores
+    users against a curated language model.
+    """
+
+    def __init__(self, normal_dictionary, gamer_dictionary, gamer_words,
+                 ignore_list):
+        """
+        Args:
+            normal_dictionary: A curated dictionary with strings as keys and
+                floats as values representing the normal dataset.
+            gamer_dictionary: A curated dictionary with strings as keys and
+                floats as values representing the gamer dataset.
+            gamer_words: A list of strings representing the gamer words.
+            ignore_list: A list of strings representing words to remove from a
+                user's language set.
+        """
+        self.normal_dictionary = normal_dictionary
+        self.gamer_dictionary = gamer_dictionary
+        self.gamer_words = frozenset(gamer_words)
+        self.ignore_set = frozenset(ignore_list)
+        self.users = {}
+        self.normal_statistics = RunningStatistics()
+        self.gamer_statistics = RunningStatistics()
+
+    def is_counted(self, word):
+        """
+        Determines whether a word counts towards a user's language, following
+        the same rules as clean_user_dictionary in gamer_words.py.
+
+        Args:
+            word: A string representing the word.
+        Returns:
+            A boolean representing whether the word is counted.
+        """
+        return len(word) <= MAX_WORD_LENGTH and word not in self.ignore_set \
+            and not is_repeated_typo(word)
+
+    def add_counts(self, user, word_counts):
+        """
+        Adds word counts to a user and updates their closeness values and the
+        population statistics.
+
+        Args:
+            user: A hashable value identifying the user, such as a member ID.
+            word_counts: A dictionary with strings as keys representing words
+                and integers as values representing how many more times the
+                user has used each word.
+        """
+        state = self.users.get(user)
+        if state is None:
+            state = self.users[user] = {
+                "counts": {}, "total": 0, "squares": 0, "gamer_total": 0,
+                "normal_dot": 0.0, "gamer_dot": 0.0, "normal_squares": 0.0,
+                "gamer_squares": 0.0, "closeness": None}
+        counts = state["counts"]
+
+        for word, number in word_counts.items():
+            if number <= 0 or not self.is_counted(word):
+                continue
+            old_count = counts.get(word, 0)
+            counts[word] = old_count + number
+            state["total"] += number
+            state["squares"] += (old_count + number)**2 - old_count**2
+            normal_value = self.normal_dictionary.get(word, 0)
+            gamer_value = self.gamer_dictionary.get(word, 0)
+            state["normal_dot"] += number * normal_value
+            state["gamer_dot"] += number * gamer_value
+            if old_count == 0:
+                state["normal_squares"] += normal_value**2
+                state["gamer_squares"] += gamer_value**2
+            if word in self.gamer_words:
+                state["gamer_total"] += number
+
+        if state["total"] == 0:
+            return
+        # Replace the user's old closeness values in the population
+        if state["closeness"] is not None:
+            self.normal_statistics.remove(state["closeness"][0])
+            self.gamer_statistics.remove(state["closeness"][1])
+        state["closeness"] = (
+            self._closeness(state, state["normal_dot"],
+                            state["normal_squares"]),
+            self._closeness(state, state["gamer_dot"], state["gamer_squares"]))
+        self.normal_statistics.add(state["closeness"][0])
+        self.gamer_statistics.add(state["closeness"][1])
+
+    @staticmethod
+    def _closeness(state, dot, language_squares):
+        """
+        Computes a user's closeness value to a language from their sums.
+
+        Args:
+            state: The dictionary of sums kept for the user.
+            dot: A float representing the sum of c_w*L_w for the language.
+            language_squares: A float representing the sum of L_w**2 over the
+                user's words for the language.
+        Returns:
+            A float representing the closeness value.
+        """
+        total = state["total"]
+        squared = state["squares"] / total**2 - 2 * dot / total + \
+            language_squares
+        # Rounding can make a closeness of 0 very slightly negative
+        return math.sqrt(max(squared, 0.0))
+
+    def add_message(self, user, text):
+        """
+        Adds the words of a message to a user.
+
+        Args:
+            user: A hashable value identifying the user, such as a member ID.
+            text: A string representing the content of the message.
+        """
+        word_counts = {}
+        for word in tokenize(text):
+            word_counts[word] = word_counts.get(word, 0) + 1
+        self.add_counts(user, word_counts)
+
+    def score(self, user):
+        """
+        Scores a user against the language model and the current population.
+
+        Args:
+            user: A hashable value identifying the user.
+        Returns:
+            A dictionary with the keys "normal_closeness", "gamer_closeness",
+            "gamer_ratio", "normal_z", "gamer_z" and "is_gamer", or None if
+            the user has no counted words.
+        """
+        state = self.users.get(user)
+        if state is None or state["closeness"] is None:
+            return None
+        normal_closeness, gamer_closeness = state["closeness"]
+        normal_z = self.normal_statistics.z_score(normal_closeness)
+        gamer_z = self.gamer_statistics.z_score(gamer_closeness)
+        return {
+            "normal_closeness": normal_closeness,
+            "gamer_closeness": gamer_closeness,
+            "gamer_ratio": state["gamer_total"] / state["total"],
+            "normal_z": normal_z,
+            "gamer_z": gamer_z,
+            "is_gamer": is_gamer(gamer_z, normal_z),
+        }
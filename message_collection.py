@@ -0,0 +1,430 @@
+"""
+Contains the functions the Message Collector discord bot uses to read the
+message histories of many channels at the same time.
+
+These functions only rely on the channel and message attributes they use, so
+they can be run against stand-in channels without connecting to Discord.
+"""
+import asyncio
+import functools
+import json
+import os
+import time
+import weakref
+from collections import Counter
+from types import SimpleNamespace
+from dictionary_io import csv_to_dict, dict_to_csv
+from scrape_data import tokenize
+
+# The most channel histories read at the same time by default.
+DEFAULT_MAX_CONCURRENT_CHANNELS = 8
+# The HTTP status code Discord answers with when requests are rate limited.
+RATE_LIMIT_STATUS = 429
+# The fewest seconds between two progress updates of an indicator message.
+PROGRESS_INTERVAL_SECONDS = 2.0
+# The file in a collection folder recording the newest message already
+# collected in each channel.
+WATERMARK_FILE = "watermarks.json"
+# The file in a collection folder listing the files of a collection that are
+# written but not yet moved into place.
+JOURNAL_FILE = "collection_journal.json"
+
+# The lock of each collection folder in each event loop, so that only one
+# collection at a time reads and updates a folder's watermarks and CSVs.
+_FOLDER_LOCKS = weakref.WeakKeyDictionary()
+
+
+def is_rate_limit_error(error):
+    """
+    Determines whether an error raised while reading a channel was caused by
+    Discord rate limiting the requests.
+
+    Args:
+        error: The exception raised while reading the channel.
+    Returns:
+        A boolean representing whether the error was a rate limit.
+    """
+    return getattr(error, "status", None) == RATE_LIMIT_STATUS
+
+
+async def read_channels(channels, read_channel, skip_errors=(),
+                        max_concurrent=DEFAULT_MAX_CONCURRENT_CHANNELS,
+                        on_progress=None, max_retries=3,
+                        backoff_seconds=1.0):
+    """
+    Reads many channels at the same time, with at most max_concurrent being
+    read at once.
+
+    A channel that is rate limited is read again from the start after waiting,
+    with the wait doubling on every retry, so read_channel must not keep any
+    state between calls.
+
+    Args:
+        channels: A list of channels to read.
+        read_channel: A coroutine function taking a channel and returning the
+            result of reading it.
+        skip_errors: A tuple of exception types, such as discord.Forbidden,
+            that mean a channel cannot be read and should be skipped.
+        max_concurrent: An integer representing the most channels to read at
+            the same time.
+        on_progress: An optional coroutine function called with the number of
+            finished channels and the total number of channels every time a
+            channel finishes.
+        max_retries: The number of times to retry a rate limited channel
+            before giving up.
+        backoff_seconds: The number of seconds to wait before the first retry.
+    Returns:
+        A list with the result of reading each channel, in the same order as
+        channels, with None for skipped channels.
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+    finished = 0
+
+    async def read_one(channel):
+        nonlocal finished
+        result = None
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                try:
+                    result = await read_channel(channel)
+                    break
+                except skip_errors:
+                    break
+                except Exception as error:  # pylint: disable=broad-except
+                    if not is_rate_limit_error(error) or \
+                            attempt == max_retries:
+                        raise
+                    await asyncio.sleep(backoff_seconds * 2**attempt)
+        finished += 1
+        if on_progress is not None:
+            await on_progress(finished, len(channels))
+        return result
+
+    return await asyncio.gather(*(read_one(channel) for channel in channels))
+
+
+def folder_lock(folder_path):
+    """
+    Gives the lock of a collection folder. A collection must hold it from
+    loading the watermarks until its counts and watermarks are committed, or
+    two overlapping collections would both read the same messages.
+
+    Args:
+        folder_path: A string representing the path to the collection folder.
+    Returns:
+        An asyncio.Lock shared by every collection into the folder from the
+        running event loop.
+    """
+    locks = _FOLDER_LOCKS.setdefault(asyncio.get_running_loop(), {})
+    return locks.setdefault(os.path.abspath(folder_path), asyncio.Lock())
+
+
+def recover_collection(folder_path):
+    """
+    Finishes a collection whose files were written but not all moved into
+    place, such as after a crash. Moving a finished file into place again has
+    no effect, so recovering twice is safe.
+
+    Args:
+        folder_path: A string representing the path to the collection folder.
+    Returns:
+        None.
+    """
+    journal_path = os.path.join(folder_path, JOURNAL_FILE)
+    if not os.path.exists(journal_path):
+        return
+    with open(journal_path) as file:
+        for temporary_name, file_name in json.load(file):
+            if os.path.exists(temporary_name):
+                os.replace(temporary_name, file_name)
+    os.remove(journal_path)
+
+
+def commit_collection(folder_path, file_counts, watermarks, merge=True):
+    """
+    Adds the counts of a collection to their CSVs and saves the watermarks as
+    one step, so that the counts of a message are never added without its
+    watermark being saved, or the other way around.
+
+    Every new file is written next to the file it replaces, then a journal of
+    the files is written, which is the point the collection is committed at,
+    and only then are the files moved into place. If the collection stops
+    before the journal is written nothing changes, and if it stops after,
+    recover_collection finishes moving the files.
+
+    Args:
+        folder_path: A string representing the path to the collection folder.
+        file_counts: A dictionary with the paths of CSVs as keys and
+            dictionaries of words to their number of new uses as values.
+        watermarks: A dictionary as returned by load_watermarks.
+        merge: A boolean representing whether to add the counts to existing
+            CSVs rather than replacing them.
+    Returns:
+        A list of strings representing the paths of the written CSVs.
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    recover_collection(folder_path)
+    moves = []
+    for file_name, counts in file_counts.items():
+        merged = Counter(csv_to_dict(file_name)) if merge and \
+            os.path.exists(file_name) else Counter()
+        merged.update(counts)
+        dict_to_csv(merged, file_name + ".tmp")
+        moves.append([file_name + ".tmp", file_name])
+    path = os.path.join(folder_path, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as file:
+        json.dump(watermarks, file, indent=1)
+    moves.append([path + ".tmp", path])
+
+    journal_path = os.path.join(folder_path, JOURNAL_FILE)
+    with open(journal_path + ".tmp", "w") as file:
+        json.dump(moves, file)
+    os.replace(journal_path + ".tmp", journal_path)
+    recover_collection(folder_path)
+    return list(file_counts)
+
+
+def load_watermarks(folder_path):
+    """
+    Loads the newest collected message IDs recorded in a collection folder,
+    first finishing any collection that was committed but not moved into
+    place.
+
+    Args:
+        folder_path: A string representing the path to the collection folder.
+    Returns:
+        A dictionary with the keys "channels", mapping channel IDs to the
+        newest message collected from every author, and "members", mapping
+        member IDs to dictionaries of channel IDs to the newest message
+        collected for that member. All IDs are stored as strings.
+    """
+    if os.path.isdir(folder_path):
+        recover_collection(folder_path)
+    path = os.path.join(folder_path, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {"channels": {}, "members": {}}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_watermarks(watermarks, folder_path):
+    """
+    Saves the newest collected message IDs into a collection folder,
+    replacing the old file atomically.
+
+    Args:
+        watermarks: A dictionary as returned by load_watermarks.
+        folder_path: A string representing the path to the collection folder.
+    Returns:
+        None.
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    path = os.path.join(folder_path, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as file:
+        json.dump(watermarks, file, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def channel_history(channel, watermarks):
+    """
+    Gets a channel's history, starting after the newest message already
+    collected from it if there is one.
+
+    Args:
+        channel: The channel to read.
+        watermarks: A dictionary of channel IDs to message IDs, or None to
+            read the whole history.
+    Returns:
+        An asynchronous iterator over the channel's messages.
+    """
+    last_id = None if watermarks is None else watermarks.get(str(channel.id))
+    if last_id is None:
+        return channel.history(limit=None)
+    # Discord accepts any object with an id as the message to start after
+    return channel.history(limit=None, after=SimpleNamespace(id=last_id))
+
+
+def update_watermarks(watermarks, channels, newest_ids):
+    """
+    Records the newest message read from each channel.
+
+    Args:
+        watermarks: A dictionary of channel IDs to message IDs to update, or
+            None to not record anything.
+        channels: A list of the channels that were read.
+        newest_ids: A list with the ID of the newest message read from each
+            channel, or None for channels where no message was read.
+    Returns:
+        None.
+    """
+    if watermarks is None:
+        return
+    for channel, newest_id in zip(channels, newest_ids):
+        if newest_id is not None:
+            watermarks[str(channel.id)] = max(
+                newest_id, watermarks.get(str(channel.id), newest_id))
+
+
+def merge_counts_into_csv(counts, file_name):
+    """
+    Adds new word counts to a frequency CSV, creating it if it does not exist.
+
+    Args:
+        counts: A dictionary of words to the number of new uses.
+        file_name: A string representing the path to the CSV.
+    Returns:
+        None.
+    """
+    merged = Counter(csv_to_dict(file_name)) if os.path.exists(file_name) \
+        else Counter()
+    merged.update(counts)
+    dict_to_csv(merged, file_name)
+
+
+async def collect_member_counts(channels, member, watermarks=None,
+                                **read_options):
+    """
+    Counts the words of every message a member has sent in a list of
+    channels, excluding capitalization and punctuation.
+
+    Words are counted as each message arrives, so memory use is bounded by the
+    member's vocabulary rather than the amount of text they have sent.
+
+    Args:
+        channels: A list of channels to read.
+        member: The member whose messages to collect.
+        watermarks: An optional dictionary of channel IDs to the newest message
+            already collected for this member. Only newer messages are read,
+            and the dictionary is updated in place with the newest message read
+            from each channel.
+        read_options: Keyword arguments passed on to read_channels.
+    Returns:
+        A Counter of the words the member has sent.
+    """
+    async def read_channel(channel):
+        counts = Counter()
+        newest_id = None
+        async for message in channel_history(channel, watermarks):
+            newest_id = max(message.id, newest_id or message.id)
+            if message.author == member:
+                counts.update(tokenize(message.content))
+        return counts, newest_id
+
+    results = [result or (Counter(), None) for result in await read_channels(
+        channels, read_channel, **read_options)]
+    update_watermarks(watermarks, channels,
+                      [newest_id for (_, newest_id) in results])
+
+    member_counts = Counter()
+    for counts, _ in results:
+        member_counts.update(counts)
+    return member_counts
+
+
+async def collect_author_counts(channels, watermarks=None, **read_options):
+    """
+    Counts the words of every author in a list of channels, reading each
+    channel's history only once. Messages sent by bots are not counted.
+
+    Args:
+        channels: A list of channels to read.
+        watermarks: An optional dictionary of channel IDs to the newest message
+            already collected. Only newer messages are read, and the dictionary
+            is updated in place with the newest message read from each channel.
+        read_options: Keyword arguments passed on to read_channels.
+    Returns:
+        A dictionary with the authors as keys and Counters of the words they
+        have sent, excluding capitalization and punctuation, as values.
+    """
+    async def read_channel(channel):
+        channel_counts = {}
+        newest_id = None
+        async for message in channel_history(channel, watermarks):
+            newest_id = max(message.id, newest_id or message.id)
+            if getattr(message.author, "bot", False):
+                continue
+            channel_counts.setdefault(message.author, Counter()).update(
+                tokenize(message.content))
+        return channel_counts, newest_id
+
+    results = [result or ({}, None) for result in await read_channels(
+        channels, read_channel, **read_options)]
+    update_watermarks(watermarks, channels,
+                      [newest_id for (_, newest_id) in results])
+
+    author_counts = {}
+    for channel_counts, _ in results:
+        for author, counts in channel_counts.items():
+            author_counts.setdefault(author, Counter()).update(counts)
+    return author_counts
+
+
+def write_author_csvs(author_counts, folder_path, merge=False):
+    """
+    Writes one frequency CSV per author into a folder, in the form that
+    analyze_users_language reads. Collections that keep watermarks should use
+    commit_collection instead, so the CSVs and watermarks change together.
+
+    Args:
+        author_counts: A dictionary as returned by collect_author_counts.
+        folder_path: A string representing the path to the folder to write
+            the CSVs to.
+        merge: A boolean representing whether to add the counts to existing
+            CSVs rather than replacing them.
+    Returns:
+        A list of strings representing the paths of the written CSVs.
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    file_list = []
+    for author, counts in author_counts.items():
+        file_name = f"{folder_path}/{author.name}.csv"
+        if merge:
+            merge_counts_into_csv(counts, file_name)
+        else:
+            dict_to_csv(counts, file_name)
+        file_list.append(file_name)
+    return file_list
+
+
+async def run_blocking(function, *args):
+    """
+    Runs a blocking function, such as writing a CSV, in a worker thread so
+    that the event loop keeps answering Discord while it runs.
+
+    Args:
+        function: The function to run.
+        args: The arguments to call the function with.
+    Returns:
+        The return value of the function.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        None, functools.partial(function, *args))
+
+
+def progress_reporter(indicator, text,
+                      interval_seconds=PROGRESS_INTERVAL_SECONDS):
+    """
+    Creates a progress callback that edits the indicator message as channels
+    finish, at most once every interval_seconds so that the edits are not
+    rate limited. The last channel finishing is always reported.
+
+    Args:
+        indicator: The Message to edit with the progress.
+        text: A string representing what is being done.
+        interval_seconds: A float representing the fewest seconds between two
+            edits.
+    Returns:
+        A coroutine function taking the number of finished channels and the
+        total number of channels.
+    """
+    last_update = time.monotonic()
+
+    async def report(finished, total):
+        nonlocal last_update
+        if finished < total and \
+                time.monotonic() - last_update < interval_seconds:
+            return
+        last_update = time.monotonic()
+        await indicator.edit(content=f"{text} ({finished}/{total} channels)")
+
+    return report
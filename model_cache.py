@@ -0,0 +1,156 @@
+"""
+Contains an on-disk cache of the curated language models made by parse_words.
+
+Each cached model is stored as a shared model file, as written by
+shared_model.py, named after a fingerprint of everything that parse_words
+depends on: the bytes of the normal and gamer frequency files, the threshold,
+and the ratio constants in gamer_words.py. When any of those change the
+fingerprint changes, so the model is rebuilt, and the least recently used
+models are evicted once the cache grows past a size limit.
+
+A cache hit neither parses the frequency files nor rebuilds any dictionaries:
+hashing the files takes about a millisecond per megabyte, and the cached model
+is memory mapped and given as the read-only views of SharedModel.as_model.
+"""
+import hashlib
+import os
+import gamer_words
+from dictionary_io import csv_to_dict
+from shared_model import SharedModel, write_shared_model
+
+# The folder that cached models are stored in by default.
+DEFAULT_CACHE_DIR = ".model_cache"
+# The number of bytes the cache folder may hold before old models are evicted.
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Changing the layout of the cached files must change this so that old files
+# are not read with the new layout.
+CACHE_FORMAT_VERSION = 2
+# The file extension of cached models.
+EXTENSION = ".shm"
+
+
+def model_fingerprint(normal_file, gamer_file, threshold):
+    """
+    Computes a fingerprint of the inputs of parse_words from the bytes of the
+    files the dictionaries are read from, without parsing them.
+
+    Args:
+        normal_file: A string representing the path to the normal frequency
+            CSV or table.
+        gamer_file: A string representing the path to the gamer frequency CSV
+            or table.
+        threshold: An integer passed to parse_words.
+    Returns:
+        A string of hexadecimal digits representing the fingerprint.
+    """
+    digest = hashlib.sha256()
+    constants = (CACHE_FORMAT_VERSION, threshold, gamer_words.MAX_WORD_LENGTH,
+                 gamer_words.COMMON_WORD_UPPER_RATIO,
+                 gamer_words.COMMON_WORD_LOWER_RATIO,
+                 gamer_words.GAMER_WORD_RATIO,
+                 gamer_words.GAMER_WORD_MIN_FREQUENCY)
+    digest.update(repr(constants).encode())
+    for file_name in (normal_file, gamer_file):
+        with open(file_name, "rb") as file:
+            file_digest = hashlib.file_digest(file, "sha256").digest()
+        digest.update(file_digest)
+    return digest.hexdigest()
+
+
+def load_model(file_name):
+    """
+    Loads a cached curated language model by memory mapping it.
+
+    Args:
+        file_name: A string representing the path of a file written by
+            write_shared_model.
+    Returns:
+        A tuple of the same form as returned by parse_words, made of
+        read-only views into the mapped file.
+    Raises:
+        ValueError: If the file is not a shared model.
+    """
+    return SharedModel(file_name).as_model()
+
+
+def evict_old_models(cache_dir, max_cache_bytes, keep=None):
+    """
+    Deletes the least recently used models from the cache until it holds no
+    more than a given number of bytes.
+
+    Args:
+        cache_dir: A string representing the path to the cache folder.
+        max_cache_bytes: An integer representing the most bytes the cached
+            models may take up.
+        keep: An optional string representing the path of a model that must
+            not be deleted.
+    Returns:
+        A list of strings representing the paths of the deleted models.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(EXTENSION):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size,
+                            os.path.join(cache_dir, name)))
+    total_bytes = sum(size for (_, size, _) in entries)
+
+    evicted = []
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_cache_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            # Some systems cannot delete a model another process has mapped
+            continue
+        total_bytes -= size
+        evicted.append(path)
+    return evicted
+
+
+def cached_parse_files(normal_file, gamer_file, threshold,
+                       cache_dir=DEFAULT_CACHE_DIR,
+                       max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    """
+    Gives the same model as calling parse_words on the dictionaries read from
+    two frequency files, loading it from the cache when the same files have
+    been curated before.
+
+    Args:
+        normal_file: A string representing the path to the normal frequency
+            CSV or table.
+        gamer_file: A string representing the path to the gamer frequency CSV
+            or table.
+        threshold: An integer determining the minimum number of usages for a
+            word to be considered in the dictionary.
+        cache_dir: A string representing the path to the cache folder.
+        max_cache_bytes: An integer representing the most bytes the cached
+            models may take up.
+    Returns:
+        A tuple of the same form as returned by parse_words, made of
+        read-only views into the cached model. Callers that change the model
+        must copy it into dictionaries and lists first.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    file_name = os.path.join(cache_dir, model_fingerprint(
+        normal_file, gamer_file, threshold) + EXTENSION)
+
+    if os.path.exists(file_name):
+        try:
+            model = load_model(file_name)
+        except (OSError, ValueError, KeyError):
+            # A damaged entry is rebuilt below
+            pass
+        else:
+            # Mark the entry as recently used for eviction
+            os.utime(file_name)
+            return model
+
+    model = gamer_words.parse_words(csv_to_dict(normal_file),
+                                    csv_to_dict(gamer_file), threshold)
+    write_shared_model(model, file_name)
+    evict_old_models(cache_dir, max_cache_bytes, keep=file_name)
+    return load_model(file_name)
@@ -0,0 +1,323 @@
+"""
+Contains parallel versions of the per-user functions in gamer_words.py that
+spread a folder of user CSVs across a pool of worker processes.
+
+The curated language model is sent to each worker once, when the worker starts,
+so that the individual tasks only need to carry a user's file path. When the
+model is given as the path to a shared model file instead, each worker memory
+maps that file, and all of the workers share its pages.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import functools
+from dictionary_io import csv_to_dict
+from gamer_words import (
+    analyze_user_language,
+    clean_user_dictionary,
+    create_user_id_info,
+    find_most_frequent_gamer_words_file,
+    get_file_list,
+    to_gamer_vocabulary,
+)
+from histograms import DEFAULT_NUM_BINS, ScoreHistograms
+from shared_model import SharedModel
+
+# The number of user files handed to a worker at a time.
+DEFAULT_CHUNK_SIZE = 16
+
+# The language model of the current worker process, set by _init_worker. It
+# is only set in worker processes, never in the process that starts them.
+_WORKER_MODEL = {}
+
+
+def _build_model(normal_dictionary, gamer_dictionary, gamer_words,
+                 ignore_list):
+    """
+    Prepares the curated language model for the worker functions.
+
+    Args:
+        normal_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing the normal dataset.
+        gamer_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing the gamer dataset.
+        gamer_words: A list of strings representing the gamer words, or a
+            GamerVocabulary.
+        ignore_list: A list of strings representing words to remove from a
+            user's language set.
+    Returns:
+        A dictionary holding the parts of the model by name.
+    """
+    return {"normal_dictionary": normal_dictionary,
+            "gamer_dictionary": gamer_dictionary,
+            "gamer_words": to_gamer_vocabulary(gamer_words),
+            "ignore_list": frozenset(ignore_list)}
+
+
+def _build_shared_model(model_path):
+    """
+    Memory maps a shared model file as the language model for the worker
+    functions.
+
+    Args:
+        model_path: A string representing the path to a file written by
+            write_shared_model.
+    Returns:
+        A dictionary holding the parts of the model by name.
+    """
+    shared_model = SharedModel(model_path)
+    # The views already check membership against the mapped file
+    normal_dictionary, gamer_dictionary, gamer_words, ignore_list = \
+        shared_model.as_model()
+    return {"shared_model": shared_model,
+            "normal_dictionary": normal_dictionary,
+            "gamer_dictionary": gamer_dictionary,
+            "gamer_words": to_gamer_vocabulary(gamer_words),
+            "ignore_list": ignore_list}
+
+
+def _init_worker(build, *args):
+    """
+    Stores the language model in a worker process.
+
+    Args:
+        build: _build_model or _build_shared_model.
+        args: The arguments to call build with.
+    Returns:
+        None.
+    """
+    _WORKER_MODEL.update(build(*args))
+
+
+def _analyze_user_file(user, model=None):
+    """
+    Analyzes one user's CSV against a language model.
+
+    Args:
+        user: A string representing the path to the user's CSV.
+        model: A dictionary returned by _build_model, or None to use the
+            model of the worker.
+    Returns:
+        A list of the form [normal_closeness, gamer_closeness,
+            ratio_gamer_words_used].
+    """
+    model = _WORKER_MODEL if model is None else model
+    return analyze_user_language(
+        model["normal_dictionary"], model["gamer_dictionary"],
+        model["gamer_words"], model["ignore_list"], csv_to_dict(user))
+
+
+def _score_user_file_shared(user, model=None):
+    """
+    Analyzes one user's CSV against a shared model.
+
+    Args:
+        user: A string representing the path to the user's CSV.
+        model: A dictionary returned by _build_shared_model, or None to use
+            the model of the worker.
+    Returns:
+        A list of the form [normal_closeness, gamer_closeness,
+            ratio_gamer_words_used].
+    """
+    shared_model = (_WORKER_MODEL if model is None else model)["shared_model"]
+    return shared_model.score_user(clean_user_dictionary(
+        csv_to_dict(user), shared_model.ignore_list))
+
+
+def _histogram_user_files(user_files, num_bins, ranges, model=None):
+    """
+    Analyzes a group of users' CSVs and bins their stats into a partial
+    histogram.
+
+    Args:
+        user_files: A list of strings representing the paths to the CSVs.
+        num_bins: An integer representing the number of bins.
+        ranges: A list of three (low, high) tuples, or None for adaptive bins.
+        model: A dictionary returned by _build_model, or None to use the
+            model of the worker.
+    Returns:
+        A ScoreHistograms of the group's stats.
+    """
+    histograms = ScoreHistograms(num_bins, ranges)
+    histograms.add_users([_analyze_user_file(user, model)
+                          for user in user_files])
+    return histograms
+
+
+def _top_gamer_words_file(user, model=None):
+    """
+    Finds the five most frequent gamer words in one user's CSV.
+
+    Args:
+        user: A string representing the path to the user's CSV.
+        model: A dictionary returned by _build_model, or None to use the
+            model of the worker.
+    Returns:
+        A list of strings representing the user's most frequent gamer words.
+    """
+    model = _WORKER_MODEL if model is None else model
+    return list(find_most_frequent_gamer_words_file(
+        user, model["gamer_words"], 5).keys())
+
+
+def _map_users(function, file_list, model, num_workers, chunk_size):
+    """
+    Applies a worker function to every user file, in parallel if more than
+    one worker is asked for. With one worker the model is passed to the
+    function directly, so nothing is left in _WORKER_MODEL afterwards.
+
+    Args:
+        function: The worker function to apply to each user file path.
+        file_list: A list of strings representing the user CSV file paths.
+        model: A tuple of the arguments for _build_model, or a string
+            representing the path to a shared model file.
+        num_workers: An integer representing the number of worker processes,
+            or None to use one per CPU.
+        chunk_size: An integer representing how many user files are sent to a
+            worker at a time.
+    Returns:
+        A list with the result of the function for each user file, in the
+        same order as file_list.
+    """
+    if isinstance(model, str):
+        build, args = _build_shared_model, (model,)
+    else:
+        build, args = _build_model, model
+    if num_workers == 1:
+        worker_model = build(*args)
+        return [function(user, model=worker_model) for user in file_list]
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=_init_worker,
+                             initargs=(build, *args)) as executor:
+        return list(executor.map(function, file_list, chunksize=chunk_size))
+
+
+def analyze_users_language_parallel(normal_dictionary, gamer_dictionary,
+                                    gamer_words, ignore_list, folder_path,
+                                    num_workers=None,
+                                    chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parallel version of analyze_users_language in gamer_words.py.
+
+    Args:
+        normal_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing the normal dataset.
+        gamer_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing the gamer dataset.
+        gamer_words: A list of strings representing the gamer words.
+        ignore_list: A list of strings representing words to remove from a
+            user's language set.
+        folder_path: A string representing the relative path of the folder that
+            all of the user data csv's are in.
+        num_workers: An integer representing the number of worker processes,
+            or None to use one per CPU.
+        chunk_size: An integer representing how many user files are sent to a
+            worker at a time.
+    Returns:
+        user_value_dictionary: A dictionary with a string representing the
+            relative file path of a user's language usage data as a key and a
+            list of the form [normal_closeness, gamer_closeness,
+            ratio_gamer_words_used] as the value.
+    """
+    file_list = get_file_list(folder_path)
+    model = (normal_dictionary, gamer_dictionary, gamer_words, ignore_list)
+    results = _map_users(_analyze_user_file, file_list, model, num_workers,
+                         chunk_size)
+    return dict(zip(file_list, results))
+
+
+def analyze_users_language_shared(model_path, folder_path, num_workers=None,
+                                  chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Version of analyze_users_language_parallel whose workers memory map a
+    shared model file instead of each receiving a copy of the model.
+
+    Args:
+        model_path: A string representing the path to a file written by
+            write_shared_model.
+        folder_path: A string representing the relative path of the folder that
+            all of the user data csv's are in.
+        num_workers: An integer representing the number of worker processes,
+            or None to use one per CPU.
+        chunk_size: An integer representing how many user files are sent to a
+            worker at a time.
+    Returns:
+        A dictionary of the same form as returned by analyze_users_language.
+    """
+    file_list = get_file_list(folder_path)
+    results = _map_users(_score_user_file_shared, file_list, model_path,
+                         num_workers, chunk_size)
+    return dict(zip(file_list, results))
+
+
+def score_histograms_parallel(normal_dictionary, gamer_dictionary,
+                              gamer_words, ignore_list, folder_path,
+                              num_bins=DEFAULT_NUM_BINS, ranges=None,
+                              num_workers=None,
+                              chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Analyzes every user in a folder and bins their stats, without keeping any
+    user's stats. Each worker bins a chunk of users into a partial histogram,
+    and the partial histograms are merged.
+
+    Args:
+        normal_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing the normal dataset.
+        gamer_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing the gamer dataset.
+        gamer_words: A list of strings representing the gamer words.
+        ignore_list: A list of strings representing words to remove from a
+            user's language set.
+        folder_path: A string representing the relative path of the folder that
+            all of the user data csv's are in.
+        num_bins: An integer representing the number of bins.
+        ranges: An optional list of three (low, high) tuples giving fixed bins
+            for each stat, or None to use adaptive bins.
+        num_workers: An integer representing the number of worker processes,
+            or None to use one per CPU.
+        chunk_size: An integer representing how many user files are binned
+            into each partial histogram.
+    Returns:
+        A ScoreHistograms of every user's stats.
+    """
+    file_list = get_file_list(folder_path)
+    chunks = [file_list[start:start + chunk_size]
+              for start in range(0, len(file_list), chunk_size)]
+    model = (normal_dictionary, gamer_dictionary, gamer_words, ignore_list)
+    histogram_chunk = functools.partial(_histogram_user_files,
+                                        num_bins=num_bins, ranges=ranges)
+    histograms = ScoreHistograms(num_bins, ranges)
+    for partial_histograms in _map_users(histogram_chunk, chunks, model,
+                                         num_workers, 1):
+        histograms.merge(partial_histograms)
+    return histograms
+
+
+def generate_user_id_dict_parallel(z_dict, user_stats_dict, gamer_words,
+                                   folder_path, num_workers=None,
+                                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parallel version of generate_user_id_dict in gamer_words.py.
+
+    Args:
+        z_dict: A dictionary representing the z-scores for each individual
+            user, as returned by stats_and_z_info.
+        user_stats_dict: A dictionary representing the stats for each
+            individual user, as returned by analyze_users_language.
+        gamer_words: A list of strings represenging the gamer words.
+        folder_path: A string representing the path to the folder containing
+            all the individual users' data.
+        num_workers: An integer representing the number of worker processes,
+            or None to use one per CPU.
+        chunk_size: An integer representing how many user files are sent to a
+            worker at a time.
+    Returns:
+        user_id_dict: A dictionary with strings representing the path to the
+            users' data as keys and the information necessary for the ID card
+            as values.
+    """
+    file_list = get_file_list(folder_path)
+    model = ({}, {}, gamer_words, [])
+    tops = _map_users(_top_gamer_words_file, file_list, model, num_workers,
+                      chunk_size)
+    return {user: create_user_id_info(user, folder_path, z_dict[user],
+                                      user_stats_dict[user], top)
+            for user, top in zip(file_list, tops)}
@@ -0,0 +1,231 @@
+"""
+Contains a non-interactive way to export the histograms and word clouds made
+in visualize_data.py to files or in-memory buffers.
+
+The plots are drawn with the Agg backend onto Figure objects that are never
+registered with pyplot, so no display is needed, and each exporter reuses its
+figures for every plot instead of leaving a new figure open per plot. This
+lets batch jobs render many plots in one process without their memory
+growing.
+"""
+import io
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from wordcloud import WordCloud
+
+# The width and height in pixels of a full resolution word cloud.
+WORD_CLOUD_SIZE = (1920, 1080)
+# The width and height in pixels of a word cloud made on the fast path.
+FAST_WORD_CLOUD_SIZE = (640, 360)
+# The figure sizes in inches of each kind of plot.
+WORD_CLOUD_FIGSIZE = (10, 10)
+HISTOGRAM_FIGSIZE = (6.4, 4.8)
+# The resolution plots are exported at.
+DEFAULT_DPI = 100
+
+
+def make_word_cloud(frequency_dict, fast=False):
+    """
+    Lays out a word cloud from a dictionary of words and their frequencies.
+
+    Args:
+        frequency_dict: A dictionary containing keys that are strings, or words
+            and values that are integers, or frequencies of the corresponding
+            words.
+        fast: A boolean representing whether to lay the cloud out at
+            FAST_WORD_CLOUD_SIZE rather than WORD_CLOUD_SIZE, which is much
+            quicker.
+    Returns:
+        A WordCloud.
+    """
+    width, height = FAST_WORD_CLOUD_SIZE if fast else WORD_CLOUD_SIZE
+    return WordCloud(background_color="white", width=width,
+                     height=height).generate_from_frequencies(frequency_dict)
+
+
+def draw_word_cloud(axes, cloud):
+    """
+    Draws a word cloud onto a set of axes.
+
+    Args:
+        axes: The matplotlib Axes to draw onto.
+        cloud: A WordCloud, as returned by make_word_cloud.
+    """
+    axes.imshow(cloud, interpolation='bilinear')
+    axes.axis(False)
+
+
+def _hist_arguments(data, num_bins):
+    """
+    Gives the arguments of Axes.hist that plot either raw data or the counts
+    of an already binned histogram.
+
+    Args:
+        data: A list of integers or floats, or a histogram from histograms.py.
+        num_bins: An integer representing the number of bins to sort raw data
+            into.
+    Returns:
+        A tuple of the x values, the bins and the weights to give Axes.hist.
+    """
+    if hasattr(data, "edges") and hasattr(data, "counts"):
+        # Each bin is plotted as one value at its left edge, weighed by its
+        # count, which draws the same bars as plotting the raw values
+        edges = data.edges
+        return edges[:-1], edges, data.counts
+    return data, num_bins, None
+
+
+def draw_single_histogram(axes, data_list, num_bins, x_label, plt_title):
+    """
+    Draws a single histogram of a list of data onto a set of axes.
+
+    Args:
+        axes: The matplotlib Axes to draw onto.
+        data_list: A list of integers or floats representing the data to plot,
+            or a histogram from histograms.py to plot the counts of.
+        num_bins: An integer representing the number of bins that the data
+            should be sorted into, which is ignored for a histogram.
+        x_label: A string representing the label on the x axis of the
+            histogram.
+        plt_title: A string representing the title of the histogram.
+    """
+    values, bins, weights = _hist_arguments(data_list, num_bins)
+    axes.hist(values, density=True, bins=bins, weights=weights)
+    min_x, max_x = axes.get_xlim()
+    axes.set_xlim(min_x, max_x)
+    axes.set_ylabel("Frequency")
+    axes.set_xlabel(x_label)
+    axes.set_title(plt_title)
+
+
+def draw_stacked_histogram(axes, data_list, num_bins, labels):
+    """
+    Draws a histogram of two lists of data on top of each other onto a set of
+    axes.
+
+    Args:
+        axes: The matplotlib Axes to draw onto.
+        data_list: A list of two lists containing integers or floats
+            representing the data to plot, or of two histograms from
+            histograms.py to plot the counts of.
+        num_bins: An integer representing the number of bins that the data
+            should be sorted into, which is ignored for histograms.
+        labels: A list of the two dataset labels, the x axis label and the
+            title of the histogram.
+    """
+    for data, label in zip(data_list[:2], labels[:2]):
+        values, bins, weights = _hist_arguments(data, num_bins)
+        axes.hist(values, bins, weights=weights, alpha=0.33, label=label)
+    axes.legend(loc='upper right')
+    axes.set_xlabel(labels[2])
+    axes.set_ylabel("Frequency")
+    axes.set_title(labels[3])
+
+
+class PlotExporter:
+    """
+    Exports plots to files or in-memory buffers with the Agg backend, reusing
+    one figure for every plot of the same size.
+    """
+
+    def __init__(self, file_format="png", dpi=DEFAULT_DPI):
+        """
+        Args:
+            file_format: A string representing the image format to export,
+                such as "png" or "svg".
+            dpi: An integer representing the resolution to export at.
+        """
+        self.file_format = file_format
+        self.dpi = dpi
+        self._figures = {}
+
+    def figure(self, figsize):
+        """
+        Gives the figure of a size, cleared of the last plot drawn on it.
+
+        Args:
+            figsize: A tuple of the width and height of the figure in inches.
+        Returns:
+            A Figure with an Agg canvas.
+        """
+        figure = self._figures.get(figsize)
+        if figure is None:
+            figure = self._figures[figsize] = Figure(figsize=figsize)
+            FigureCanvasAgg(figure)
+        figure.clear()
+        return figure
+
+    def save(self, figure, target=None):
+        """
+        Renders a figure to a file or an in-memory buffer.
+
+        Args:
+            figure: The Figure to render.
+            target: A string representing the path of the file to write, a
+                writable binary file object, or None to return the image.
+        Returns:
+            The bytes of the image if target is None, and otherwise target.
+        """
+        buffer = io.BytesIO() if target is None else target
+        figure.savefig(buffer, format=self.file_format, dpi=self.dpi)
+        return buffer.getvalue() if target is None else target
+
+    def word_cloud(self, frequency_dict, target=None, fast=False):
+        """
+        Exports a word cloud of a dictionary of words and their frequencies.
+
+        Args:
+            frequency_dict: A dictionary with strings as keys and integers as
+                values, such as the output of determine_gamer_words_frequency.
+            target: A path, a writable binary file object, or None, as in
+                save.
+            fast: A boolean representing whether to lay the cloud out at the
+                lower FAST_WORD_CLOUD_SIZE.
+        Returns:
+            The bytes of the image if target is None, and otherwise target.
+        """
+        figure = self.figure(WORD_CLOUD_FIGSIZE)
+        draw_word_cloud(figure.add_subplot(),
+                        make_word_cloud(frequency_dict, fast))
+        return self.save(figure, target)
+
+    def single_histogram(self, data_list, num_bins, x_label, plt_title,
+                         target=None):
+        """
+        Exports a single histogram of a list of data.
+
+        Args:
+            data_list: A list of integers or floats representing the data to
+                plot, or a histogram from histograms.py.
+            num_bins: An integer representing the number of bins.
+            x_label: A string representing the label on the x axis.
+            plt_title: A string representing the title of the histogram.
+            target: A path, a writable binary file object, or None, as in
+                save.
+        Returns:
+            The bytes of the image if target is None, and otherwise target.
+        """
+        figure = self.figure(HISTOGRAM_FIGSIZE)
+        draw_single_histogram(figure.add_subplot(), data_list, num_bins,
+                              x_label, plt_title)
+        return self.save(figure, target)
+
+    def stacked_histogram(self, data_list, num_bins, labels, target=None):
+        """
+        Exports a histogram of two lists of data on top of each other.
+
+        Args:
+            data_list: A list of two lists containing integers or floats
+                representing the data to plot, or of two histograms.
+            num_bins: An integer representing the number of bins.
+            labels: A list of the two dataset labels, the x axis label and the
+                title of the histogram.
+            target: A path, a writable binary file object, or None, as in
+                save.
+        Returns:
+            The bytes of the image if target is None, and otherwise target.
+        """
+        figure = self.figure(HISTOGRAM_FIGSIZE)
+        draw_stacked_histogram(figure.add_subplot(), data_list, num_bins,
+                               labels)
+        return self.save(figure, target)
@@ -1,21 +1,67 @@
 """
-Contains the functions used to scrape data and convert between dictionaries and
-CSVs.
+Contains the functions used to scrape word frequency data from Reddit.
 """
-import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from string import punctuation
 from collections import Counter
-import praw
-from api_keys import keys
+# csv_to_dict and dict_to_csv live in dictionary_io so that they can be used
+# without praw or Reddit credentials; they are imported here so that existing
+# imports from this module keep working.
+# pylint: disable=unused-import
+from dictionary_io import csv_to_dict, dict_to_csv
 
-# Creates a read-only instance of Reddit.
-reddit = praw.Reddit(
-    client_id=keys["CLIENT_ID"],
-    client_secret=keys["CLIENT_SECRET"],
-    password=keys["PASSWORD"],
-    user_agent=keys["USERAGENT"],
-    username=keys["USERNAME"],
-)
+# The read-only instance of Reddit, created on first use by get_reddit().
+_REDDIT = None
+
+# Translation table that removes punctuation, built once for all submissions.
+PUNCTUATION_TABLE = str.maketrans('', '', punctuation)
+
+# The HTTP status code Reddit answers with when requests are rate limited.
+RATE_LIMIT_STATUS = 429
+
+
+def get_reddit():
+    """
+    Gets the read-only instance of Reddit, creating it the first time this is
+    called so that praw and the API keys are only loaded when scraping.
+
+    Args:
+        None.
+    Returns:
+        A praw Reddit instance.
+    """
+    global _REDDIT  # pylint: disable=global-statement
+    if _REDDIT is None:
+        _REDDIT = create_reddit()
+    return _REDDIT
+
+
+def create_reddit():
+    """
+    Creates a new read-only instance of Reddit from the API keys.
+
+    praw instances are not thread safe, so each scraping thread creates its
+    own with this function.
+
+    Args:
+        None.
+    Returns:
+        A praw Reddit instance.
+    """
+    # pylint: disable=import-outside-toplevel
+    import praw
+    from api_keys import keys
+    return praw.Reddit(
+        client_id=keys["CLIENT_ID"],
+        client_secret=keys["CLIENT_SECRET"],
+        password=keys["PASSWORD"],
+        user_agent=keys["USERAGENT"],
+        username=keys["USERNAME"],
+    )
 
 
 def strings_to_subreddits(subreddit_strings):
@@ -28,6 +74,7 @@ def strings_to_subreddits(subreddit_strings):
     Returns:
         A list of subreddit objects corresponding to the given names.
     """
+    reddit = get_reddit()
     subreddits = []
     for string in subreddit_strings:
         subreddits.append(reddit.subreddit(string))
@@ -36,65 +83,199 @@ def strings_to_subreddits(subreddit_strings):
 
 
 
-def scrape_subreddits(subreddit_strings, num_posts):
+def tokenize(text):
+    """
+    Splits a piece of text into words, excluding capitalization and
+    punctuation.
+
+    Args:
+        text: A string representing the text to split.
+    Returns:
+        A list of strings representing the words in the text.
+    """
+    return text.lower().translate(PUNCTUATION_TABLE).split()
+
+
+def load_checkpoint(checkpoint_path, subreddit_strings, num_posts):
+    """
+    Loads the progress of an unfinished scrape, if there is one for the same
+    subreddits and number of posts.
+
+    Args:
+        checkpoint_path: A string representing the path to the checkpoint
+            file, or None if checkpoints are not used.
+        subreddit_strings: A list of strings representing the names of
+            subreddits being scraped.
+        num_posts: The number of submissions to go through on each subreddit.
+    Returns:
+        A dictionary with the keys "subreddits" and "num_posts" describing the
+        scrape, "progress" mapping each subreddit name to the number of
+        submissions already counted, "completed" listing the finished
+        subreddits and "counts" holding the word counts so far.
+    """
+    checkpoint = {"subreddits": list(subreddit_strings),
+                  "num_posts": num_posts, "progress": {}, "completed": [],
+                  "counts": {}}
+    if checkpoint_path is None or not os.path.exists(checkpoint_path):
+        return checkpoint
+    with open(checkpoint_path) as file:
+        saved = json.load(file)
+    # A checkpoint of a different scrape cannot be resumed
+    if saved.get("subreddits") != checkpoint["subreddits"] or \
+            saved.get("num_posts") != num_posts:
+        return checkpoint
+    return saved
+
+
+def save_checkpoint(checkpoint, checkpoint_path):
+    """
+    Saves the progress of a scrape, replacing the checkpoint file atomically
+    so that a crash while saving does not lose the previous checkpoint.
+
+    Args:
+        checkpoint: A dictionary as returned by load_checkpoint.
+        checkpoint_path: A string representing the path to the checkpoint
+            file.
+    Returns:
+        None.
+    """
+    temporary_path = checkpoint_path + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(checkpoint, file)
+    os.replace(temporary_path, checkpoint_path)
+
+
+def scrape_subreddits(subreddit_strings, num_posts, checkpoint_path=None,
+                      checkpoint_every=100):
     """
     Scrapes the top submissions of a given list of subreddits for a given number
     of posts.
 
+    Words are counted one submission at a time, so memory use is bounded by the
+    size of the vocabulary rather than the size of the scraped text. If a
+    checkpoint path is given, the counts so far are saved to it regularly, and
+    a scrape that crashed or was rate limited resumes from the checkpoint when
+    called again with the same arguments.
+
     Args:
         subreddit_strings: A list of strings representing the names of subreddits
             to collect data form.
         num_posts: The number of submissions to go through on each subreddit.
+        checkpoint_path: A string representing the path to save progress to, or
+            None to not save progress.
+        checkpoint_every: The number of submissions to count between saving
+            progress.
     Returns:
         A dictionary containing every word present in the subreddit's submissions,
         excluding capitalization and punctuation, and the number of times that
         word shows up.
     """
-    subreddits = strings_to_subreddits(subreddit_strings)
+    checkpoint = load_checkpoint(checkpoint_path, subreddit_strings, num_posts)
+    word_dict = Counter(checkpoint["counts"])
 
-    words = ""
-    for subreddit in subreddits:
-        for submission in subreddit.top(limit=num_posts):
-            words += submission.selftext.lower().translate(str.maketrans('', '', punctuation))
-    words = words.split()
+    subreddits = strings_to_subreddits(subreddit_strings)
+    for name, subreddit in zip(subreddit_strings, subreddits):
+        if name in checkpoint["completed"]:
+            continue
+        done = checkpoint["progress"].get(name, 0)
+        for position, submission in enumerate(subreddit.top(limit=num_posts)):
+            # Skip the submissions counted before the last checkpoint
+            if position < done:
+                continue
+            word_dict.update(tokenize(submission.selftext))
+            done += 1
+            if checkpoint_path is not None and done % checkpoint_every == 0:
+                checkpoint["progress"][name] = done
+                checkpoint["counts"] = word_dict
+                save_checkpoint(checkpoint, checkpoint_path)
+        checkpoint["progress"][name] = done
+        checkpoint["completed"].append(name)
+        if checkpoint_path is not None:
+            checkpoint["counts"] = word_dict
+            save_checkpoint(checkpoint, checkpoint_path)
 
-    word_dict = (Counter(words))
+    # The scrape is finished, so the next one should start from scratch
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
     return word_dict
 
 
-def csv_to_dict(file_name):
+def count_subreddit(subreddit, num_posts):
     """
-    Given a file name, converts a CSV to a dictionary.
-
-    Assumes that the CSV being converted is a frequency dictionary and as a result,
-    casts all of the values to integers.
+    Counts the words in the top submissions of a single subreddit.
 
     Args:
-        file_name: The path for the CSV file to convert to a dictionary.
+        subreddit: A praw Subreddit to collect data from.
+        num_posts: The number of submissions to go through.
     Returns:
-        None.
+        A Counter of every word in the submissions, excluding capitalization
+        and punctuation.
     """
-    with open(file_name) as csv_file:
-        reader = csv.reader(csv_file)
-        word_dict = {}
-        for key, value in reader:
-            word_dict[key] = int(value)
+    word_dict = Counter()
+    for submission in subreddit.top(limit=num_posts):
+        word_dict.update(tokenize(submission.selftext))
     return word_dict
 
 
+def is_rate_limit_error(error):
+    """
+    Determines whether an error raised while scraping was caused by Reddit
+    rate limiting the requests.
+
+    Args:
+        error: The exception raised while scraping.
+    Returns:
+        A boolean representing whether the error was a rate limit.
+    """
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == RATE_LIMIT_STATUS
+
 
-def dict_to_csv(word_dict, file_name):
+def scrape_subreddits_concurrently(subreddit_strings, num_posts,
+                                   max_workers=4, reddit_factory=None,
+                                   max_retries=3, backoff_seconds=2.0):
     """
-    Given a dictionary and a file name, creates a new CSV containing the contents
-    of the dictionary.
+    Scrapes the top submissions of several subreddits at the same time and
+    merges their word counts, so that the whole scrape takes about as long as
+    the slowest subreddit.
+
+    Each thread uses its own Reddit instance. When Reddit rate limits a thread,
+    that subreddit is scraped again from the start after waiting, with the wait
+    doubling on every retry.
 
     Args:
-        word_dict: A dicitonary to be converted into a CSV.
-        file_name: The path for the CSV file the dictionary is being converted
-            into.
-    Return:
-        None.
+        subreddit_strings: A list of strings representing the names of
+            subreddits to collect data from.
+        num_posts: The number of submissions to go through on each subreddit.
+        max_workers: The most subreddits to scrape at the same time.
+        reddit_factory: A function taking no arguments that returns a Reddit
+            instance, or None to use create_reddit.
+        max_retries: The number of times to retry a rate limited subreddit
+            before giving up.
+        backoff_seconds: The number of seconds to wait before the first retry.
+    Returns:
+        A dictionary containing every word present in the subreddits'
+        submissions, excluding capitalization and punctuation, and the number
+        of times that word shows up.
     """
-    with open(file_name, 'w') as file:
-        for key in word_dict.keys():
-            file.write("%s,%s\n" % (key, word_dict[key]))
+    reddit_factory = reddit_factory or create_reddit
+    thread_data = threading.local()
+
+    def scrape_one(name):
+        if not hasattr(thread_data, "reddit"):
+            thread_data.reddit = reddit_factory()
+        for attempt in range(max_retries + 1):
+            try:
+                return count_subreddit(thread_data.reddit.subreddit(name),
+                                       num_posts)
+            except Exception as error:  # pylint: disable=broad-except
+                if not is_rate_limit_error(error) or attempt == max_retries:
+                    raise
+                time.sleep(backoff_seconds * 2**attempt)
+        return Counter()
+
+    word_dict = Counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for subreddit_counts in executor.map(scrape_one, subreddit_strings):
+            word_dict.update(subreddit_counts)
+    return word_dict
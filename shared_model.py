@@ -0,0 +1,296 @@
+"""
+Contains a read-only curated language model file that is memory mapped rather
+than loaded, so that every scoring process on a host shares the same pages of
+memory instead of holding its own dictionaries.
+
+The file holds the whole vocabulary of the model as a sorted array of
+fixed-width UTF-8 strings, found with np.searchsorted, and the language
+frequencies as float64 arrays alongside it. SharedModel gives views of these
+arrays that behave like the dictionaries and lists returned by parse_words, so
+they can be passed to the functions in gamer_words.py unchanged.
+
+A model file is laid out as MAGIC, the length of a JSON header as a
+little-endian unsigned 64 bit integer, the JSON header describing the dtype,
+shape and offset of every array, and then the arrays themselves.
+"""
+from collections.abc import Mapping, Set
+import json
+import os
+import tempfile
+import numpy as np
+
+# The first bytes of every shared model file, including a format version.
+MAGIC = b"SHMODEL1"
+# Every array starts at a multiple of this many bytes.
+ALIGNMENT = 64
+
+
+def _encode(words):
+    """
+    Encodes words as UTF-8, the form they are stored in the vocabulary.
+
+    Args:
+        words: An iterable of strings.
+    Returns:
+        A list of bytes.
+    """
+    return [word.encode("utf-8") for word in words]
+
+
+def write_shared_model(model, file_name):
+    """
+    Writes a curated language model to a shared model file, replacing the file
+    atomically so that other processes never map a partially written model.
+
+    Args:
+        model: A tuple as returned by parse_words.
+        file_name: A string representing the path of the file to write.
+    Returns:
+        None.
+    """
+    normal_dictionary, gamer_dictionary, gamer_word_list, ignore_list = model
+    words = set(normal_dictionary) | set(gamer_dictionary) | \
+        set(gamer_word_list) | set(ignore_list)
+    # Python orders strings by code point, which is also their UTF-8 order
+    vocabulary = np.array(_encode(sorted(words)), dtype=bytes)
+    if not vocabulary.size:
+        vocabulary = vocabulary.astype("S1")
+
+    def word_ids(word_list):
+        return np.searchsorted(vocabulary, _encode(word_list)).astype(
+            np.int32)
+
+    def values(dictionary):
+        # Words missing from a language are NaN
+        array = np.full(len(vocabulary), np.nan)
+        array[word_ids(dictionary)] = list(dictionary.values())
+        return array
+
+    arrays = {
+        "vocabulary": vocabulary,
+        "normal_values": values(normal_dictionary),
+        "gamer_values": values(gamer_dictionary),
+        # The words of each collection in their original order
+        "normal_order": word_ids(normal_dictionary),
+        "gamer_order": word_ids(gamer_dictionary),
+        "gamer_words": word_ids(gamer_word_list),
+        "ignore_list": word_ids(ignore_list),
+    }
+
+    header = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        header[name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * \
+        ALIGNMENT
+
+    folder = os.path.dirname(file_name) or "."
+    with tempfile.NamedTemporaryFile(dir=folder, suffix=".tmp",
+                                     delete=False) as file:
+        file.write(MAGIC)
+        file.write(np.array(len(header_bytes), dtype="<u8").tobytes())
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.seek(data_start + header[name][2])
+            file.write(array.tobytes())
+        file.truncate(data_start + offset)
+    os.replace(file.name, file_name)
+
+
+class LanguageView(Mapping):
+    """
+    A read-only dictionary of words to their frequency in one language of a
+    SharedModel, iterated in the order of the dictionary that was written.
+    """
+
+    def __init__(self, model, values, order):
+        self._model = model
+        self._values = values
+        self._order = order
+
+    def __getitem__(self, word):
+        word_id = self._model.word_id(word)
+        if word_id < 0 or np.isnan(self._values[word_id]):
+            raise KeyError(word)
+        return float(self._values[word_id])
+
+    def __contains__(self, word):
+        word_id = self._model.word_id(word)
+        return word_id >= 0 and not np.isnan(self._values[word_id])
+
+    def __iter__(self):
+        return iter(self._model.words(self._order))
+
+    def __len__(self):
+        return len(self._order)
+
+
+class WordSetView(Set):
+    """
+    A read-only set of words of a SharedModel, such as the gamer words,
+    iterated in the order of the list that was written.
+    """
+
+    def __init__(self, model, word_ids):
+        self._model = model
+        self._word_ids = word_ids
+        self._mask = np.zeros(len(model.vocabulary), dtype=bool)
+        self._mask[word_ids] = True
+
+    def __contains__(self, word):
+        word_id = self._model.word_id(word)
+        return word_id >= 0 and bool(self._mask[word_id])
+
+    def __iter__(self):
+        return iter(self._model.words(self._word_ids))
+
+    def __len__(self):
+        return len(self._word_ids)
+
+    @property
+    def mask(self):
+        """
+        A boolean array over the vocabulary marking the words of the set.
+        """
+        return self._mask
+
+
+class SharedModel:
+    """
+    A curated language model memory mapped from a file written by
+    write_shared_model.
+
+    Attributes:
+        vocabulary: The sorted array of every UTF-8 encoded word in the model.
+        normal_dictionary: A LanguageView of the normal frequencies.
+        gamer_dictionary: A LanguageView of the gamer frequencies.
+        gamer_words: A WordSetView of the gamer words.
+        ignore_list: A WordSetView of the words to remove from a user's
+            language set.
+    """
+
+    def __init__(self, file_name):
+        """
+        Args:
+            file_name: A string representing the path to the file.
+        Raises:
+            ValueError: If the file is not a shared model.
+        """
+        with open(file_name, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{file_name} is not a shared model")
+            header_length = int(np.frombuffer(file.read(8), dtype="<u8")[0])
+            header = json.loads(file.read(header_length))
+        data_start = -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * \
+            ALIGNMENT
+
+        arrays = {}
+        for name, (dtype, shape, offset) in header.items():
+            if not np.prod(shape):
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(file_name, dtype=dtype, mode="r",
+                                     offset=data_start + offset,
+                                     shape=tuple(shape))
+
+        self.vocabulary = arrays["vocabulary"]
+        self.normal_values = arrays["normal_values"]
+        self.gamer_values = arrays["gamer_values"]
+        self.normal_dictionary = LanguageView(self, self.normal_values,
+                                              arrays["normal_order"])
+        self.gamer_dictionary = LanguageView(self, self.gamer_values,
+                                             arrays["gamer_order"])
+        self.gamer_words = WordSetView(self, arrays["gamer_words"])
+        self.ignore_list = WordSetView(self, arrays["ignore_list"])
+
+    def as_model(self):
+        """
+        Gives the model in the form returned by parse_words.
+
+        Returns:
+            A tuple of the form (normal_dictionary, gamer_dictionary,
+            gamer_words, ignore_list), made of views into the mapped file.
+        """
+        return self.normal_dictionary, self.gamer_dictionary, \
+            self.gamer_words, self.ignore_list
+
+    def word_ids(self, words):
+        """
+        Finds the positions of many words in the vocabulary at once.
+
+        Args:
+            words: A list of strings.
+        Returns:
+            An array of integers with the position of each word, or -1 for
+            words that are not in the vocabulary.
+        """
+        if not len(self.vocabulary) or not words:
+            return np.full(len(words), -1)
+        encoded = np.array(_encode(words), dtype=bytes)
+        positions = np.minimum(np.searchsorted(self.vocabulary, encoded),
+                               len(self.vocabulary) - 1)
+        return np.where(self.vocabulary[positions] == encoded, positions, -1)
+
+    def word_id(self, word):
+        """
+        Finds the position of a word in the vocabulary.
+
+        Args:
+            word: A string.
+        Returns:
+            An integer representing the position of the word, or -1 if it is
+            not in the vocabulary.
+        """
+        encoded = word.encode("utf-8")
+        if not len(self.vocabulary) or \
+                len(encoded) > self.vocabulary.dtype.itemsize:
+            return -1
+        position = int(np.searchsorted(self.vocabulary, encoded))
+        if position < len(self.vocabulary) and \
+                self.vocabulary[position] == encoded:
+            return position
+        return -1
+
+    def words(self, word_ids):
+        """
+        Decodes words of the vocabulary.
+
+        Args:
+            word_ids: An array of integers representing vocabulary positions.
+        Returns:
+            A list of strings.
+        """
+        return [word.decode("utf-8") for word in
+                self.vocabulary[np.asarray(word_ids, dtype=np.intp)].tolist()]
+
+    def score_user(self, user_dictionary):
+        """
+        Scores a cleaned user dictionary against the model with array
+        operations. NumPy adds the squared differences in a different order
+        from analyze_user_language, so the values match it to within float
+        rounding rather than exactly.
+
+        Args:
+            user_dictionary: A dictionary with strings as keys and floats as
+                values, as returned by clean_user_dictionary.
+        Returns:
+            A list of the form [normal_closeness, gamer_closeness,
+                ratio_gamer_words_used].
+        """
+        user_values = np.fromiter(user_dictionary.values(), dtype=np.float64,
+                                  count=len(user_dictionary))
+        word_ids = self.word_ids(list(user_dictionary))
+        known = word_ids >= 0
+
+        closeness = []
+        for language_values in (self.normal_values, self.gamer_values):
+            values = np.zeros(len(user_values))
+            values[known] = language_values[word_ids[known]]
+            closeness.append(float(np.sqrt(np.sum(
+                (user_values - np.nan_to_num(values))**2))))
+        gamer_total = user_values[known][
+            self.gamer_words.mask[word_ids[known]]].sum()
+        return closeness + [float(gamer_total / user_values.sum())]
@@ -0,0 +1,249 @@
+"""
+Contains a vectorized version of the user language scoring in gamer_words.py.
+
+The curated normal and gamer dictionaries are interned into one shared
+vocabulary index, every user's words are flattened into CSR style arrays of
+columns and values, and the differences behind the closeness statistics of
+every user are computed at once with NumPy. Only each user's final sums are
+added up with sum(), in the same order as gamer_words.py, so the results are
+exactly the same as scoring the users one by one.
+
+Those sums and flattening the dictionaries still go through every word in
+Python, so scoring is only about 1.6x faster than calling the scoring
+functions of gamer_words.py on each user, and cleaning each user's
+dictionary, which both need, takes longer than either.
+"""
+import itertools
+import numpy as np
+from gamer_words import clean_user_dictionary, get_file_list
+from dictionary_io import csv_to_dict
+
+
+def build_vocabulary_index(normal_dictionary, gamer_dictionary):
+    """
+    Intern every word of the curated normal and gamer dictionaries into a
+    single integer index.
+
+    Args:
+        normal_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing what ratio of the time that string gets
+            used in the normal dataset.
+        gamer_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing what ratio of the time that string gets
+            used in the gamer dataset.
+    Returns:
+        vocabulary_index: A dictionary with strings as keys representing the
+            words of both dictionaries and integers as values representing
+            the column of that word in the sparse user vectors.
+    """
+    vocabulary_index = {}
+    for word in normal_dictionary:
+        vocabulary_index[word] = len(vocabulary_index)
+    for word in gamer_dictionary:
+        if word not in vocabulary_index:
+            vocabulary_index[word] = len(vocabulary_index)
+    return vocabulary_index
+
+
+def dictionary_to_vector(word_dictionary, vocabulary_index):
+    """
+    Convert a language dictionary into a dense vector over the vocabulary.
+
+    Args:
+        word_dictionary: A dictionary with strings as keys and floats as the
+            values representing what ratio of the time that string gets used
+            in a language dataset.
+        vocabulary_index: A dictionary with strings as keys and integers as
+            values, as returned by build_vocabulary_index.
+    Returns:
+        A NumPy array of floats with one entry per vocabulary word, set to 0
+            for words that are not in the language dictionary.
+    """
+    vector = np.zeros(len(vocabulary_index))
+    for word, value in word_dictionary.items():
+        if word in vocabulary_index:
+            vector[vocabulary_index[word]] = value
+    return vector
+
+
+def user_entries(user_dictionaries, vocabulary_index):
+    """
+    Flatten a list of user ratio dictionaries into arrays of their words'
+    columns and values, keeping each user's words in the order of their
+    dictionary.
+
+    Args:
+        user_dictionaries: A list of dictionaries with strings as keys and
+            floats as the values representing what ratio of the time that
+            string gets used in a user's personal language dataset.
+        vocabulary_index: A dictionary with strings as keys and integers as
+            values, as returned by build_vocabulary_index.
+    Returns:
+        columns: A NumPy array of integers with the column of every word, or
+            -1 for words outside of the vocabulary.
+        values: A NumPy array of floats with the value of every word.
+        indptr: A NumPy array of integers where the words of user i are at
+            positions indptr[i] to indptr[i + 1], as in a CSR matrix.
+    """
+    indptr = np.zeros(len(user_dictionaries) + 1, dtype=np.int64)
+    np.cumsum([len(user_dictionary) for user_dictionary in user_dictionaries],
+              out=indptr[1:])
+    # map and chain keep the loop over every word in C
+    columns = np.fromiter(
+        map(vocabulary_index.get, itertools.chain.from_iterable(
+            user_dictionaries), itertools.repeat(-1)),
+        dtype=np.int64, count=indptr[-1])
+    values = np.fromiter(
+        itertools.chain.from_iterable(user_dictionary.values() for
+                                      user_dictionary in user_dictionaries),
+        dtype=np.float64, count=indptr[-1])
+    return columns, values, indptr
+
+
+def row_sums(values, indptr):
+    """
+    Add up the values of each user one after another in the order of their
+    words, which is the same order and rounding as sum() over the values of
+    the user's dictionary.
+
+    Args:
+        values: A NumPy array of floats, as returned by user_entries.
+        indptr: A NumPy array of integers, as returned by user_entries.
+    Returns:
+        A list of floats with one sum per user.
+    """
+    values = values.tolist()
+    return [sum(values[start:end]) for start, end in
+            zip(indptr[:-1].tolist(), indptr[1:].tolist())]
+
+
+def language_distances(columns, values, indptr, language_vector):
+    """
+    Compute the closeness value of every user to a language dataset.
+
+    This is the same distance as determine_language_similarity in
+    gamer_words.py, with each user's squared differences added up in the same
+    order, so the values are exactly the same.
+
+    Args:
+        columns: A NumPy array of integers, as returned by user_entries.
+        values: A NumPy array of floats, as returned by user_entries.
+        indptr: A NumPy array of integers, as returned by user_entries.
+        language_vector: A NumPy array as returned by dictionary_to_vector.
+    Returns:
+        A NumPy array of floats with one closeness value per user.
+    """
+    # Words outside of the vocabulary are compared with a frequency of 0
+    language_values = np.where(columns >= 0, language_vector[columns], 0.0) \
+        if len(language_vector) else np.zeros(len(columns))
+    squares = (values - language_values)**2
+    return np.sqrt(row_sums(squares, indptr))
+
+
+def gamer_ratios(columns, values, indptr, gamer_ranks):
+    """
+    Compute the ratio of every user's words that are gamer words, adding the
+    values in the order of the gamer words as GamerVocabulary.gamer_ratio
+    does.
+
+    Args:
+        columns: A NumPy array of integers, as returned by user_entries.
+        values: A NumPy array of floats, as returned by user_entries.
+        indptr: A NumPy array of integers, as returned by user_entries.
+        gamer_ranks: A NumPy array of integers with the position of each
+            vocabulary word in the gamer words, or -1 for other words.
+    Returns:
+        A list of floats with one ratio per user.
+    Raises:
+        ZeroDivisionError: If a user has no words, like analyze_user_language.
+    """
+    ranks = np.where(columns >= 0, gamer_ranks[columns], -1) if \
+        len(gamer_ranks) else np.full(len(columns), -1)
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    hits = np.flatnonzero(ranks >= 0)
+    hits = hits[np.lexsort((ranks[hits], rows[hits]))]
+    hit_indptr = np.searchsorted(rows[hits], np.arange(len(indptr)))
+    gamer_totals = row_sums(values[hits], hit_indptr)
+    return [gamer_total / total for gamer_total, total in
+            zip(gamer_totals, row_sums(values, indptr))]
+
+
+def score_users(normal_dictionary, gamer_dictionary, gamer_words,
+                user_dictionaries):
+    """
+    Compute the closeness values and gamer word ratio of many users at once.
+
+    The values are exactly the same as those of analyze_user_language in
+    gamer_words.py: the differences are computed with array operations, and
+    only the final sums of each user are added up one value at a time.
+
+    Args:
+        normal_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing what ratio of the time that string gets
+            used in the normal dataset.
+        gamer_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing what ratio of the time that string gets
+            used in the gamer dataset.
+        gamer_words: A list of strings representing words used much more
+            commonly by gamers than non gamers.
+        user_dictionaries: A list of cleaned user dictionaries, as returned by
+            clean_user_dictionary in gamer_words.py.
+    Returns:
+        A NumPy array of floats with one row per user of the form
+            [normal_closeness, gamer_closeness, ratio_gamer_words_used].
+    Raises:
+        ZeroDivisionError: If a user has no usable words, like
+            analyze_user_language.
+    """
+    vocabulary_index = build_vocabulary_index(normal_dictionary,
+                                              gamer_dictionary)
+    # Gamer words outside of both dictionaries still count towards the ratio
+    gamer_words = list(dict.fromkeys(gamer_words))
+    for word in gamer_words:
+        vocabulary_index.setdefault(word, len(vocabulary_index))
+    columns, values, indptr = user_entries(user_dictionaries,
+                                           vocabulary_index)
+
+    gamer_ranks = np.full(len(vocabulary_index), -1, dtype=np.int64)
+    gamer_ranks[[vocabulary_index[word] for word in gamer_words]] = \
+        np.arange(len(gamer_words))
+
+    return np.column_stack((
+        language_distances(columns, values, indptr, dictionary_to_vector(
+            normal_dictionary, vocabulary_index)),
+        language_distances(columns, values, indptr, dictionary_to_vector(
+            gamer_dictionary, vocabulary_index)),
+        gamer_ratios(columns, values, indptr, gamer_ranks))).reshape(-1, 3)
+
+
+def analyze_users_language_sparse(normal_dictionary, gamer_dictionary,
+                                  gamer_words, ignore_list, folder_path):
+    """
+    Vectorized version of analyze_users_language in gamer_words.py.
+
+    Args:
+        normal_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing what ratio of the time that string gets
+            used in the normal dataset.
+        gamer_dictionary: A curated dictionary with strings as keys and floats
+            as the values representing what ratio of the time that string gets
+            used in the gamer dataset.
+        gamer_words: A list of strings representing words used much more
+            commonly by gamers than non gamers.
+        ignore_list: A list of strings representing words to remove from a
+            user's language set
+        folder_path: A string representing the relative path of the folder that
+            all of the user data csv's are in.
+    Returns:
+        user_value_dictionary: A dictionary with a string representing the
+            relative file path of a user's language usage data as a key and a
+            list of the form [normal_closeness, gamer_closeness,
+            ratio_gamer_words_used] as the value.
+    """
+    file_list = get_file_list(folder_path)
+    ignore_set = set(ignore_list)
+    user_dictionaries = [clean_user_dictionary(csv_to_dict(user), ignore_set)
+                         for user in file_list]
+    scores = score_users(normal_dictionary, gamer_dictionary, gamer_words,
+                         user_dictionaries)
+    return {user: scores[row].tolist() for row, user in enumerate(file_list)}
@@ -0,0 +1,111 @@
+"""
+Test that the bulk CSV loader reads frequency CSVs the same way as csv.reader.
+"""
+import csv
+import pytest
+
+from bulk_csv import load_csv_arrays, load_csv_dict
+from dictionary_io import csv_to_dict
+
+load_cases = [
+    # Check an empty file
+    "",
+    # Check simple lines, with and without a newline at the end
+    "gg,3\npog,10\n",
+    "gg,3\npog,10",
+    # Check Windows line endings, repeated words and non-ASCII words
+    "gg,3\r\ncafé,2\r\ngg,5\r\n",
+    # Check lines that need the line by line path: quoted fields, spaces and
+    # negative counts
+    '"hello, there",4\ngg,3\n',
+    "gg, 3\npog,-2\n",
+    # Check lines ending in a carriage return alone, as old Mac files do
+    "gg,3\rpog,10\r",
+    "gg,3\npog,10\rwp,1\r\n",
+    # Check quoted words that span lines, which can also span blocks
+    'gg,3\n"x\ny",3\npog,1\n',
+    '"x\r\ny",3\r\ngg,1\r\n',
+]
+
+malformed = "gg,3\npog\n\nwp,1,2\nez,x\nglhf,1\n"
+
+
+@pytest.mark.parametrize("text", load_cases)
+@pytest.mark.parametrize("block_bytes", [4, 1024])
+def test_load_csv_dict(tmp_path, text, block_bytes):
+    """
+    Check that load_csv_dict gives the same dictionary as csv.reader on the
+    file opened in text mode, however the file is split into blocks, and that
+    csv_to_dict reading the small file with csv.reader gives it too.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the CSV to.
+        text: A string representing the contents of the CSV.
+        block_bytes: An integer representing how many bytes to read at a time.
+    """
+    (tmp_path / "words.csv").write_bytes(text.encode("utf-8"))
+    with open(tmp_path / "words.csv", encoding="utf-8") as file:
+        expected = {word: int(count) for (word, count) in csv.reader(file)}
+    assert list(load_csv_dict(f"{tmp_path}/words.csv",
+                              block_bytes=block_bytes).items()) == \
+        list(expected.items())
+    assert list(csv_to_dict(f"{tmp_path}/words.csv").items()) == \
+        list(expected.items())
+
+
+def test_malformed_lines(tmp_path):
+    """
+    Check that malformed lines raise by default, and can be skipped with or
+    without a warning naming the line.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the CSV to.
+    """
+    file_name = f"{tmp_path}/words.csv"
+    (tmp_path / "words.csv").write_text(malformed)
+    with pytest.raises(ValueError, match="line 2"):
+        csv_to_dict(file_name)
+    assert csv_to_dict(file_name, on_error="skip") == {"gg": 3, "glhf": 1}
+    with pytest.warns(UserWarning) as record:
+        assert csv_to_dict(file_name, on_error="warn") == {"gg": 3,
+                                                           "glhf": 1}
+    assert [str(warning.message).split(": ")[0][-6:] for warning in
+            record] == ["line 2", "line 3", "line 4", "line 5"]
+    with pytest.raises(ValueError):
+        csv_to_dict(file_name, on_error="ignore")
+
+
+@pytest.mark.parametrize("block_bytes", [4, 1024])
+def test_unclosed_quote(tmp_path, block_bytes):
+    """
+    Check that a quote that is never closed is reported as its own line, and
+    that skipping it keeps the lines after it.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the CSV to.
+        block_bytes: An integer representing how many bytes to read at a time.
+    """
+    file_name = f"{tmp_path}/words.csv"
+    (tmp_path / "words.csv").write_text('gg,3\n"pog,1\nwp,2\nez,4\n')
+    with pytest.raises(ValueError, match="line 2"):
+        load_csv_dict(file_name, block_bytes=block_bytes)
+    assert load_csv_dict(file_name, on_error="skip",
+                         block_bytes=block_bytes) == {"gg": 3, "wp": 2,
+                                                      "ez": 4}
+
+
+def test_load_csv_arrays(tmp_path):
+    """
+    Check that counts can be loaded straight into the columns of a
+    vocabulary.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the CSV to.
+    """
+    (tmp_path / "words.csv").write_text("gg,3\npog,10\ncheese,4\n")
+    words, counts = load_csv_arrays(f"{tmp_path}/words.csv")
+    assert words == ["gg", "pog", "cheese"]
+    assert counts.tolist() == [3, 10, 4]
+    assert load_csv_arrays(f"{tmp_path}/words.csv",
+                           {"pog": 0, "the": 1, "gg": 2}).tolist() == \
+        [10, 0, 3]
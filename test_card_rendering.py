@@ -0,0 +1,120 @@
+"""
+Test that ID cards drawn from the template match cards drawn from scratch.
+"""
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from card_rendering import random_avatar, render_card, render_id_cards, \
+    user_avatar
+
+card_cases = [
+    ["aditi", True, -1.23456, 0.5, 0.0123, ["pog", "gg", "ez"]],
+    ["luke", False, 2, -0.25, 0, []],
+]
+
+
+def draw_card_from_scratch(user_id_list, avatar):
+    """
+    Draws a card the way create_profile_image originally did, with every
+    font loaded and every shape drawn for the card.
+
+    Args:
+        user_id_list: A list of the values needed to create the ID card.
+        avatar: An Image to use as the avatar.
+    Returns:
+        An RGB Image of the card.
+    """
+    fonts = [ImageFont.truetype("Dosis-Bold.ttf", 16),
+             ImageFont.truetype("Dosis-Bold.ttf", 40),
+             ImageFont.truetype("Dosis-Bold.ttf", 14)]
+    img = Image.new('RGB', (475, 200), color=(250, 250, 250))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, 180, 200), outline="grey", fill="grey")
+    img.paste(avatar, (10, 10))
+    draw.rectangle((10, 10, 175, 175), outline="black")
+    for box in [(185, 10, 470, 60), (185, 65, 470, 145), (190, 70, 465, 90),
+                (190, 95, 465, 115), (190, 120, 465, 140),
+                (185, 150, 470, 190)]:
+        draw.rectangle(box, outline="black")
+    draw.text((10, 175), str(user_id_list[0]), font=fonts[0],
+              fill=(0, 0, 0))
+    draw.text((190, 10), "GAMER" if user_id_list[1] is True else
+              "NOT A GAMER", font=fonts[1], fill=(255, 0, 0))
+    draw.text((195, 70), "Gamer Z-Score - " + str(round(user_id_list[2], 4)),
+              font=fonts[2], fill=(0, 0, 0))
+    draw.text((195, 95), "Normal Z-Score - " +
+              str(round(user_id_list[3], 4)), font=fonts[2], fill=(0, 0, 0))
+    draw.text((195, 120), "Gamer:All Words Ratio - " +
+              str(round(user_id_list[4], 4)), font=fonts[2], fill=(0, 0, 0))
+    draw.text((190, 150), "Most common gamer words - \n" +
+              ", ".join(user_id_list[5]), font=fonts[2], fill=(0, 0, 0))
+    return img
+
+
+def test_render_card():
+    """
+    Check that cards drawn onto the cached template have the same pixels as
+    cards drawn from scratch.
+    """
+    for user_id_list in card_cases:
+        avatar = random_avatar()
+        assert ImageChops.difference(
+            render_card(user_id_list, avatar),
+            draw_card_from_scratch(user_id_list, avatar)).getbbox() is None
+
+
+def test_render_id_cards(tmp_path):
+    """
+    Check that the batch renderer saves one card per user, both in this
+    process and across workers.
+
+    Args:
+        tmp_path: A pytest temporary directory to save the cards to.
+    """
+    user_id_dict = {f"users/{user_id_list[0]}.csv": user_id_list
+                    for user_id_list in card_cases}
+    for num_workers in [1, 2]:
+        paths = render_id_cards(user_id_dict, f"{tmp_path}/{num_workers}",
+                                num_workers)
+        assert paths == [f"{tmp_path}/{num_workers}/aditi.png",
+                         f"{tmp_path}/{num_workers}/luke.png"]
+        for path in paths:
+            assert Image.open(path).size == (475, 200)
+
+
+def test_render_id_cards_cached(tmp_path):
+    """
+    Check that cached rendering draws the same avatar for a user every time,
+    and only draws cards again when their ID info changes.
+
+    Args:
+        tmp_path: A pytest temporary directory to save the cards to.
+    """
+    assert ImageChops.difference(user_avatar("aditi"),
+                                 user_avatar("aditi")).getbbox() is None
+    user_id_dict = {f"users/{user_id_list[0]}.csv": list(user_id_list)
+                    for user_id_list in card_cases}
+    aditi_path, luke_path = render_id_cards(user_id_dict, str(tmp_path), 1,
+                                            cached=True)
+    first_luke = Image.open(luke_path).tobytes()
+
+    # Mark the unchanged card, which should not be written over
+    with open(aditi_path, "wb") as file:
+        file.write(b"unchanged")
+    user_id_dict["users/luke.csv"][2] = 3
+    render_id_cards(user_id_dict, str(tmp_path), 1, cached=True)
+    with open(aditi_path, "rb") as file:
+        assert file.read() == b"unchanged"
+    assert Image.open(luke_path).tobytes() != first_luke
+
+    # Changing the ID info back gives back the same card
+    user_id_dict["users/luke.csv"][2] = 2
+    render_id_cards(user_id_dict, str(tmp_path), 1, cached=True)
+    assert Image.open(luke_path).tobytes() == first_luke
+
+    # A card drawn over without caching has a random avatar, so the next
+    # cached run draws it again
+    render_id_cards(user_id_dict, str(tmp_path), 1)
+    random_luke = Image.open(luke_path).tobytes()
+    assert random_luke != first_luke
+    render_id_cards(user_id_dict, str(tmp_path), 1, cached=True)
+    assert Image.open(luke_path).tobytes() == first_luke
@@ -0,0 +1,206 @@
+"""
+Test the sharded corpus store against a local fake Reddit client.
+"""
+from collections import Counter
+import json
+import os
+import pytest
+
+from corpus_store import (
+    JOURNAL_NAME,
+    list_shards,
+    merge_shards,
+    refresh_shards,
+    window_start,
+)
+from scrape_data import tokenize
+
+WEEK = 7 * 24 * 60 * 60
+
+
+class FakeSubmission:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a praw Submission with an id, a time and text.
+    """
+
+    def __init__(self, submission_id, created_utc, selftext):
+        self.id = submission_id  # pylint: disable=invalid-name
+        self.created_utc = created_utc
+        self.selftext = selftext
+
+
+class FakeSubreddit:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a praw Subreddit that records how many submissions were
+    read from its listing.
+    """
+
+    def __init__(self, submissions):
+        self.submissions = submissions
+        self.read = 0
+
+    def new(self, limit):
+        """
+        Yields the submissions from newest to oldest.
+        """
+        newest_first = sorted(self.submissions, key=lambda submission:
+                              submission.created_utc, reverse=True)
+        for submission in newest_first[:limit]:
+            self.read += 1
+            yield submission
+
+
+class FakeReddit:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a praw Reddit instance.
+    """
+
+    def __init__(self, subreddits):
+        self.subreddits = subreddits
+
+    def subreddit(self, name):
+        """
+        Returns the fake subreddit with the given name.
+        """
+        return self.subreddits[name]
+
+
+window_start_cases = [
+    # Check that the start of a window is its own start
+    (WEEK, WEEK, WEEK),
+    # Check that times inside a window round down to its start
+    (WEEK * 2.5, WEEK, WEEK * 2),
+    # Check that times before the first window end are in window 0
+    (10, WEEK, 0),
+]
+
+
+@pytest.mark.parametrize("created_utc,window_seconds,start",
+                         window_start_cases)
+def test_window_start(created_utc, window_seconds, start):
+    """
+    Check that window_start finds the start of a submission's window.
+
+    Args:
+        created_utc: A float representing the time of the submission.
+        window_seconds: An integer representing the length of a window.
+        start: An integer representing the expected window start.
+    """
+    assert window_start(created_utc, window_seconds) == start
+
+
+def test_refresh_shards_only_reads_new(tmp_path):
+    """
+    Check that a refresh only counts submissions made since the last one, and
+    that the shards add up to every submission.
+
+    Args:
+        tmp_path: A pytest temporary directory to hold the store.
+    """
+    gaming = FakeSubreddit([FakeSubmission("a", 10, "GG pog"),
+                            FakeSubmission("b", WEEK + 5, "gg wp")])
+    games = FakeSubreddit([FakeSubmission("c", 20, "new game")])
+    reddit = FakeReddit({"gaming": gaming, "games": games})
+
+    assert refresh_shards(["gaming", "games"], str(tmp_path),
+                          reddit=reddit) == {"gaming": [0, WEEK],
+                                             "games": [0]}
+    assert list_shards(str(tmp_path)) == [("games", 0), ("gaming", 0),
+                                          ("gaming", WEEK)]
+
+    # A submission at the same time as the newest counted one still counts
+    gaming.submissions.append(FakeSubmission("d", WEEK + 5, "pog"))
+    gaming.submissions.append(FakeSubmission("e", WEEK * 2, "ez"))
+    gaming.read = 0
+    assert refresh_shards(["gaming", "games"], str(tmp_path),
+                          reddit=reddit) == {"gaming": [WEEK, WEEK * 2],
+                                             "games": []}
+    # Only the two new submissions, the counted one made at the same time as
+    # one of them and the first older one are read
+    assert gaming.read == 4
+
+    everything = Counter()
+    for text in ["GG pog", "gg wp", "new game", "pog", "ez"]:
+        everything.update(tokenize(text))
+    assert merge_shards(str(tmp_path)) == everything
+    assert merge_shards(str(tmp_path), ["gaming"], since=WEEK,
+                        until=WEEK * 2) == Counter(tokenize("gg wp pog"))
+
+
+def test_refresh_shards_capped(tmp_path):
+    """
+    Check that num_posts only caps the first refresh of a subreddit, so that
+    later refreshes never skip submissions between the watermark and the
+    newest ones.
+
+    Args:
+        tmp_path: A pytest temporary directory to hold the store.
+    """
+    gaming = FakeSubreddit([FakeSubmission("a", 10, "old"),
+                            FakeSubmission("b", 20, "gg")])
+    reddit = FakeReddit({"gaming": gaming})
+    refresh_shards(["gaming"], str(tmp_path), num_posts=1, reddit=reddit)
+    assert merge_shards(str(tmp_path)) == Counter(["gg"])
+
+    gaming.submissions += [FakeSubmission("c", 30, "pog"),
+                           FakeSubmission("d", 40, "ez"),
+                           FakeSubmission("e", 50, "wp")]
+    refresh_shards(["gaming"], str(tmp_path), num_posts=1, reddit=reddit)
+    assert merge_shards(str(tmp_path)) == Counter(["gg", "pog", "ez", "wp"])
+
+
+def test_refresh_shards_crash(tmp_path, monkeypatch):
+    """
+    Check that a refresh that stops before it is committed changes nothing,
+    and that one that stops while moving its files into place is finished the
+    next time the store is read, without counting anything twice.
+
+    Args:
+        tmp_path: A pytest temporary directory to hold the store.
+        monkeypatch: A pytest fixture used to make the refresh stop.
+    """
+    gaming = FakeSubreddit([FakeSubmission("a", 10, "gg")])
+    reddit = FakeReddit({"gaming": gaming})
+    refresh_shards(["gaming"], str(tmp_path), reddit=reddit)
+
+    def crash(*_, **__):
+        raise OSError("crash")
+
+    # Stop before the journal is written
+    gaming.submissions.append(FakeSubmission("b", 20, "pog"))
+    monkeypatch.setattr(json, "dump", crash)
+    with pytest.raises(OSError):
+        refresh_shards(["gaming"], str(tmp_path), reddit=reddit)
+    monkeypatch.undo()
+    assert merge_shards(str(tmp_path)) == Counter(["gg"])
+
+    # Stop after the journal is written, while moving the shard into place
+    replace = os.replace
+
+    def crash_moving_shard(source, destination):
+        if destination.endswith(".csv"):
+            raise OSError("crash")
+        replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", crash_moving_shard)
+    with pytest.raises(OSError):
+        refresh_shards(["gaming"], str(tmp_path), reddit=reddit)
+    monkeypatch.undo()
+    assert os.path.exists(f"{tmp_path}/{JOURNAL_NAME}")
+    refresh_shards(["gaming"], str(tmp_path), reddit=reddit)
+    assert merge_shards(str(tmp_path)) == Counter(["gg", "pog"])
+
+
+def test_refresh_shards_window_mismatch(tmp_path):
+    """
+    Check that a store cannot be refreshed with a different window length.
+
+    Args:
+        tmp_path: A pytest temporary directory to hold the store.
+    """
+    reddit = FakeReddit({"gaming": FakeSubreddit([FakeSubmission("a", 1,
+                                                                 "gg")])})
+    refresh_shards(["gaming"], str(tmp_path), reddit=reddit)
+    with pytest.raises(ValueError):
+        refresh_shards(["gaming"], str(tmp_path), window_seconds=60,
+                       reddit=reddit)
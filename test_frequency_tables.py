@@ -0,0 +1,140 @@
+"""
+Test that frequency tables hold the same dictionaries as frequency CSVs.
+"""
+import os
+import pytest
+
+from dictionary_io import csv_to_dict, dict_to_csv
+from frequency_tables import (
+    FrequencyTable,
+    convert_folder,
+    is_frequency_table,
+    read_frequency_table,
+    write_frequency_table,
+)
+from gamer_words import analyze_users_language, get_file_list
+
+round_trip_cases = [
+    # Check that an empty dictionary round trips
+    {},
+    # Check that the order of the words is kept rather than the sorted order
+    {"pog": 3, "gg": 10, "aaa": 1},
+    # Check words with non-ASCII characters and large counts
+    {"café": 2**40, "naïve": 0, "zebra": 7, "éclair": 1},
+]
+
+
+@pytest.mark.parametrize("word_dict", round_trip_cases)
+def test_round_trip(tmp_path, word_dict):
+    """
+    Check that writing and reading a table gives back the same dictionary in
+    the same order, and that csv_to_dict reads tables too.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the table to.
+        word_dict: A frequency dictionary to write.
+    """
+    file_name = f"{tmp_path}/user.wft"
+    write_frequency_table(word_dict, file_name)
+    assert is_frequency_table(file_name)
+    assert list(read_frequency_table(file_name).items()) == \
+        list(word_dict.items())
+    assert list(csv_to_dict(file_name).items()) == list(word_dict.items())
+
+
+def test_lookup(tmp_path):
+    """
+    Check that single words are found by binary search through the sorted
+    order stored in the file.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the table to.
+    """
+    word_dict = {"pog": 3, "gg": 10, "aaa": 1, "café": 5, "cafe": 2,
+                 "\U0001f600": 4, "\uffff": 6}
+    write_frequency_table(word_dict, f"{tmp_path}/user.wft")
+    table = FrequencyTable(f"{tmp_path}/user.wft")
+    assert [table.word(index) for index in table.order] == sorted(word_dict)
+    for word, count in word_dict.items():
+        assert table.get(word) == count
+    assert table.get("missing", 0) == 0
+    assert table.get("") is None
+
+
+width_cases = [
+    # Check that small counts are stored in single bytes
+    ({"pog": 3, "gg": 255}, 1),
+    # Check that counts of words said by one user fit in four bytes
+    ({"pog": 2**16, "gg": 1}, 4),
+    # Check that counts beyond four bytes are still stored exactly
+    ({"pog": 2**40}, 8),
+]
+
+
+@pytest.mark.parametrize("word_dict,width", width_cases)
+def test_count_width(tmp_path, word_dict, width):
+    """
+    Check that counts are stored with the narrowest width that holds them.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the table to.
+        word_dict: A frequency dictionary to write.
+        width: An integer representing the expected width of each count.
+    """
+    write_frequency_table(word_dict, f"{tmp_path}/user.wft")
+    table = FrequencyTable(f"{tmp_path}/user.wft")
+    assert table.counts.itemsize == width
+    assert table.to_dict() == word_dict
+
+
+def test_negative_count(tmp_path):
+    """
+    Check that a negative count cannot be written.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the table to.
+    """
+    with pytest.raises(ValueError):
+        write_frequency_table({"pog": -1}, f"{tmp_path}/user.wft")
+
+
+def test_converted_folder(tmp_path):
+    """
+    Check that a converted folder lists each user once, by their table, and
+    is analyzed the same as the CSVs.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the users to.
+    """
+    folder_path = f"{tmp_path}/users"
+    (tmp_path / "users").mkdir()
+    dict_to_csv({"the": 3, "pog": 2}, f"{folder_path}/aditi.csv")
+    dict_to_csv({"the": 1, "gg": 1}, f"{folder_path}/luke.csv")
+    model = ({"the": 1}, {"pog": .5, "gg": .5}, ["pog", "gg"], [])
+    from_csvs = analyze_users_language(*model, folder_path)
+
+    convert_folder(folder_path)
+    file_list = get_file_list(folder_path)
+    assert file_list == [f"{folder_path}/aditi.wft",
+                         f"{folder_path}/luke.wft"]
+    from_tables = analyze_users_language(*model, folder_path)
+    assert list(from_tables.values()) == list(from_csvs.values())
+
+
+def test_stale_table(tmp_path):
+    """
+    Check that a CSV changed after its table was written is listed instead of
+    the table.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the users to.
+    """
+    folder_path = str(tmp_path)
+    dict_to_csv({"the": 3}, f"{folder_path}/aditi.csv")
+    convert_folder(folder_path)
+    assert get_file_list(folder_path) == [f"{folder_path}/aditi.wft"]
+
+    # Make the CSV newer than the table, as merging new counts into it would
+    table_time = os.path.getmtime(f"{folder_path}/aditi.wft")
+    os.utime(f"{folder_path}/aditi.csv", (table_time + 1, table_time + 1))
+    assert get_file_list(folder_path) == [f"{folder_path}/aditi.csv"]
@@ -1,18 +1,36 @@
 """
 Test library functions to find and identify protein-coding genes in DNA.
 """
+import json
 import pytest
 
 from gamer_words import (
     find_most_frequent,
+    find_most_frequent_gamer_words,
+    find_most_frequent_gamer_words_batch,
+    find_most_frequent_gamer_words_file,
+    GamerVocabulary,
+    to_gamer_vocabulary,
     instances_to_decimal,
     remove_most_common,
     remove_too_uncommon,
+    is_repeated_typo,
     determine_gamer_words,
     determine_language_similarity,
     is_gamer,
     determine_gamer_words_frequency,
+    analyze_users_language,
+    stats_and_z_info,
+    generate_user_id_dict,
+    analyze_users_pipeline,
+    compute_z_scores,
+    stats_to_array,
 )
+import gamer_words
+from dictionary_io import dict_to_csv
+from frequency_tables import write_frequency_table
+from benchmarks import benchmark_import_time, benchmark_pipeline, \
+    IMPORT_TIME_BUDGET
 
 
 # Define sets of test cases.
@@ -26,10 +44,26 @@ find_most_frequent_cases = [
     # Check that the function can exclude cases if less words are asked for
     # than are in the dictionary
     ({"cheese": 1, "cheezits": 4, "cheetos": 7}, 2, {"cheetos": 7,\
-        "cheezits": 4})
-
-
+        "cheezits": 4}),
+    # Check that words with the same value keep their order in the dictionary
+    ({"gg": 2, "pog": 5, "ez": 2, "wp": 2}, 3, {"pog": 5, "gg": 2, "ez": 2}),
+    # Check that asking for more items than there are returns every item
+    ({"gg": 2, "pog": 5}, 10, {"pog": 5, "gg": 2}),
+]
 
+find_most_frequent_gamer_words_batch_cases = [
+    # Check that no users give no results
+    ([], ["pog"], 5),
+    # Check users without gamer words, and a model without gamer words
+    ([{"cheese": 4}, {}], ["pog"], 5),
+    ([{"pog": 4}], [], 5),
+    # Check ties, words with a count of 0 and asking for fewer words than
+    # some users have
+    ([{"gg": 2, "the": 9, "pog": 5, "ez": 2, "wp": 2},
+      {"wp": 0, "pog": 1}, {"ez": 3}], ["pog", "gg", "ez", "wp"], 3),
+    # Check asking for more or fewer words than there are gamer words
+    ([{"gg": 2, "pog": 5}], ["pog", "gg"], 10),
+    ([{"gg": 2, "pog": 5}], ["pog", "gg"], 0),
 ]
 
 instances_to_decimal_cases = [
@@ -88,6 +122,19 @@ remove_too_uncommon_cases = [
 
 ]
 
+is_repeated_typo_cases = [
+    # Check a typo of the form "wordcword"
+    ("pastacpasta", True),
+    # Check that a word with a "c" in the middle but different halves is kept
+    ("lukecaditi", False),
+    # Check that a word with an even length is never a repeated typo
+    ("cc", False),
+    # Check that the word "c" by itself counts as a repeated typo
+    ("c", True),
+    # Check that a word without a "c" is never a repeated typo
+    ("gamergamer", False),
+]
+
 determine_gamer_words_cases = [
     # Check a simple case with a gamer word that is used drastically
     # more in the gamer dictionary than the normal dictionary
@@ -194,7 +241,52 @@ def test_find_most_frequent(freq_input_dict, freq_input_int, output_dict):
         output_dict: A value ordered dictionary with strings as
             keys and integers as values.
     """
-    assert find_most_frequent(freq_input_dict, freq_input_int) == output_dict
+    assert list(find_most_frequent(freq_input_dict, freq_input_int).items()) \
+        == list(output_dict.items())
+
+
+@pytest.mark.parametrize("user_dicts,gamer_words_list,num_items",
+                         find_most_frequent_gamer_words_batch_cases)
+def test_find_most_frequent_gamer_words_batch(user_dicts, gamer_words_list,
+                                              num_items):
+    """
+    Check that find_most_frequent_gamer_words_batch gives the same words in
+    the same order as find_most_frequent_gamer_words does for each user.
+
+    Args:
+        user_dicts: A list of user frequency dictionaries.
+        gamer_words_list: A list of strings representing the gamer words.
+        num_items: The number of gamer words to output for each user.
+    """
+    expected = [list(find_most_frequent_gamer_words(
+        user_dict, gamer_words_list, num_items).items())
+                for user_dict in user_dicts]
+    assert [list(top.items()) for top in find_most_frequent_gamer_words_batch(
+        user_dicts, gamer_words_list, num_items)] == expected
+
+
+@pytest.mark.parametrize("write", [dict_to_csv, write_frequency_table])
+@pytest.mark.parametrize("user_dicts,gamer_words_list,num_items",
+                         find_most_frequent_gamer_words_batch_cases)
+def test_find_most_frequent_gamer_words_file(tmp_path, write, user_dicts,
+                                             gamer_words_list, num_items):
+    """
+    Check that find_most_frequent_gamer_words_file gives the same words in the
+    same order as find_most_frequent_gamer_words for CSVs and tables.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the users to.
+        write: The function used to write each user's file.
+        user_dicts: A list of user frequency dictionaries.
+        gamer_words_list: A list of strings representing the gamer words.
+        num_items: The number of gamer words to output for each user.
+    """
+    for user_dict in user_dicts:
+        write(user_dict, f"{tmp_path}/user")
+        assert list(find_most_frequent_gamer_words_file(
+            f"{tmp_path}/user", gamer_words_list, num_items).items()) == \
+            list(find_most_frequent_gamer_words(
+                user_dict, gamer_words_list, num_items).items())
 
 
 @pytest.mark.parametrize("input_dictionary,output_dictionary,total_words",
@@ -280,6 +372,18 @@ def test_remove_too_uncommon(dictionary, threshold, dictionary_out):
     assert remove_too_uncommon(dictionary, threshold) == dictionary_out
 
 
+@pytest.mark.parametrize("word,typo", is_repeated_typo_cases)
+def test_is_repeated_typo(word, typo):
+    """
+    Test that is_repeated_typo finds words of the form "wordcword".
+
+    Args:
+        word: A string representing the word to check.
+        typo: A boolean representing whether the word is a repeated typo.
+    """
+    assert is_repeated_typo(word) == typo
+
+
 @pytest.mark.parametrize("normal_dictionary,gamer_dictionary,word_list", \
     determine_gamer_words_cases)
 def test_determine_gamer_words(normal_dictionary, gamer_dictionary, word_list):
@@ -365,3 +469,168 @@ def test_determine_gamer_words_frequency(words_list, gamer_dictionary,
     """
     assert determine_gamer_words_frequency(words_list, gamer_dictionary)\
         == frequency_dictionary
+
+
+gamer_ratio_cases = [
+    # Check a user who uses no gamer words
+    (["pog"], {"the": .5, "cat": .5}, 0),
+    # Check a user who only uses gamer words
+    (["pog", "gg"], {"gg": .25, "pog": .75}, 1),
+    # Check that the ratio adds up the gamer words a user uses
+    (["pog", "gg", "ez"], {"the": .1, "ez": .2, "pog": .3, "cat": .4}, .5),
+]
+
+
+def test_gamer_vocabulary():
+    """
+    Check that a GamerVocabulary acts like the list of gamer words it was
+    built from, gives each word its position as an ID, and cannot be changed.
+    """
+    vocabulary = GamerVocabulary(["pog", "gg", "ez"])
+    assert list(vocabulary) == ["pog", "gg", "ez"]
+    assert "gg" in vocabulary and "the" not in vocabulary
+    assert dict(vocabulary.ids) == {"pog": 0, "gg": 1, "ez": 2}
+    assert vocabulary[2] == "ez" and len(vocabulary) == 3
+    with pytest.raises(AttributeError):
+        vocabulary.words = ()
+    with pytest.raises(TypeError):
+        vocabulary.ids["the"] = 3
+
+
+def test_to_gamer_vocabulary():
+    """
+    Check that a vocabulary is passed through unchanged, and that a list is
+    indexed as it is when converted, with nothing kept between calls.
+    """
+    gamer_words_list = ["pog", "gg"]
+    vocabulary = to_gamer_vocabulary(gamer_words_list)
+    assert to_gamer_vocabulary(vocabulary) is vocabulary
+    assert to_gamer_vocabulary(gamer_words_list) is not vocabulary
+    assert list(to_gamer_vocabulary(gamer_words_list)) == ["pog", "gg"]
+
+    gamer_words_list[1] = "ez"
+    assert list(to_gamer_vocabulary(gamer_words_list)) == ["pog", "ez"]
+    assert list(vocabulary) == ["pog", "gg"]
+
+
+@pytest.mark.parametrize("gamer_words_list,user_dictionary,ratio",
+                         gamer_ratio_cases)
+def test_gamer_ratio(gamer_words_list, user_dictionary, ratio):
+    """
+    Check that gamer_ratio finds the ratio of a user's words that are gamer
+    words.
+
+    Args:
+        gamer_words_list: A list of strings representing the gamer words.
+        user_dictionary: A dictionary with strings as keys and floats as
+            values representing a user's word usage.
+        ratio: A float representing the expected ratio.
+    """
+    assert GamerVocabulary(gamer_words_list).gamer_ratio(user_dictionary) == \
+        pytest.approx(ratio)
+
+
+def test_import_time():
+    """
+    Check that importing gamer_words stays under the start up time budget and
+    does not load praw, the API keys, or discord.
+    """
+    result = benchmark_import_time("gamer_words", repeats=3)
+    assert result["heavy_imports"] == []
+    assert result["best_seconds"] < IMPORT_TIME_BUDGET
+
+
+def test_benchmark_pipeline():
+    """
+    Check that the pipeline benchmark times and measures every stage on a
+    small synthetic corpus, and that its results can be saved as JSON.
+    """
+    result = benchmark_pipeline(vocabulary_size=2000, num_users=6,
+                                words_per_user=500)
+    assert list(result["stages"]) == ["parse_words", "analyze_users_language",
+                                      "stats_and_z_info",
+                                      "generate_user_id_dict"]
+    for stage in result["stages"].values():
+        assert stage["seconds"] >= 0
+        assert stage["peak_memory_bytes"] > 0
+    assert json.loads(json.dumps(result)) == result
+
+
+def test_analyze_users_pipeline(tmp_path, monkeypatch):
+    """
+    Check that analyze_users_pipeline reads each user CSV once and gives the
+    same results as analyze_users_language, stats_and_z_info and
+    generate_user_id_dict.
+
+    Args:
+        tmp_path: A pytest temporary directory to hold the user CSVs.
+        monkeypatch: A pytest fixture used to count the CSV reads.
+    """
+    folder_path = str(tmp_path)
+    users = [{"the": 4, "pog": 3}, {"cat": 2, "gg": 1}, {"pog": 6, "gg": 6}]
+    for number, user in enumerate(users):
+        dict_to_csv(user, f"{folder_path}/user{number}.csv")
+    model = ({"the": .6, "cat": .4}, {"pog": .7, "gg": .3}, ["pog", "gg"], [])
+
+    user_stats_dict = analyze_users_language(*model, folder_path)
+    expected_stats, z_dict, expected_z_lists = stats_and_z_info(
+        user_stats_dict, folder_path)
+    user_id_dict = generate_user_id_dict(z_dict, user_stats_dict, model[2],
+                                         folder_path)
+
+    reads = []
+    csv_to_dict = gamer_words.csv_to_dict
+    monkeypatch.setattr(gamer_words, "csv_to_dict",
+                        lambda user: reads.append(user) or csv_to_dict(user))
+    user_records, stats, z_lists = analyze_users_pipeline(*model, folder_path)
+
+    assert sorted(reads) == sorted(set(reads)) == sorted(user_records)
+    assert (stats, z_lists) == (expected_stats, expected_z_lists)
+    for user, record in user_records.items():
+        assert [record["username"], record["is_gamer"], record["gamer_z"],
+                record["normal_z"], record["gamer_ratio"],
+                record["top_gamer_words"]] == user_id_dict[user]
+        assert [record["normal_closeness"], record["gamer_closeness"],
+                record["gamer_ratio"]] == user_stats_dict[user]
+
+
+def test_compute_z_scores(tmp_path):
+    """
+    Check that compute_z_scores gives the same z-scores and verdicts as
+    stats_and_z_info and is_gamer, and z-scores of 0 when every user has the
+    same statistic.
+
+    Args:
+        tmp_path: A pytest temporary directory to hold the user CSVs.
+    """
+    folder_path = str(tmp_path)
+    users = [{"the": 4, "pog": 3}, {"cat": 2, "gg": 1}, {"pog": 6, "gg": 6},
+             {"the": 1, "cat": 1}]
+    for number, user in enumerate(users):
+        dict_to_csv(user, f"{folder_path}/user{number}.csv")
+    model = ({"the": .6, "cat": .4}, {"pog": .7, "gg": .3}, ["pog", "gg"], [])
+    user_stats_dict = analyze_users_language(*model, folder_path)
+    _, z_dict, _ = stats_and_z_info(user_stats_dict, folder_path)
+
+    z_scores, _, _ = compute_z_scores(stats_to_array(user_stats_dict))
+    assert z_scores["user"].tolist() == list(user_stats_dict)
+    for row in z_scores:
+        assert [row["normal_z"], row["gamer_z"]] == \
+            pytest.approx(z_dict[row["user"]])
+        assert row["is_gamer"] == is_gamer(row["gamer_z"], row["normal_z"])
+
+    same = stats_to_array({"a": [1, 2, 0], "b": [1, 4, 0]})
+    z_scores, means, stds = compute_z_scores(same)
+    assert z_scores["normal_z"].tolist() == [0, 0]
+    assert z_scores["gamer_z"].tolist() == [-1, 1]
+    assert (means, stds) == ((1, 3), (0, 1))
+    assert len(compute_z_scores(stats_to_array({}))[0]) == 0
+
+    # The computed std of ten 0.3s is not exactly 0, but nobody is an outlier
+    same = stats_to_array({f"user{number}": [0.3, 0.3, 0.5]
+                           for number in range(10)})
+    z_scores, _, stds = compute_z_scores(same)
+    assert z_scores["normal_z"].tolist() == [0] * 10
+    assert z_scores["gamer_z"].tolist() == [0] * 10
+    assert not z_scores["is_gamer"].any()
+    assert stds == (0, 0)
@@ -0,0 +1,89 @@
+"""
+Test the streaming histograms against binning every value at once.
+"""
+import numpy as np
+import pytest
+
+from gamer_words import stats_and_z_info
+from histograms import AdaptiveHistogram, FixedHistogram, ScoreHistograms
+
+VALUES = np.random.default_rng(0).normal(0.05, 0.02, 1000)
+
+# Check several ways of splitting the values between partial histograms
+split_cases = [1, 2, 7, 1000]
+
+
+@pytest.mark.parametrize("num_parts", split_cases)
+def test_fixed_histogram(num_parts):
+    """
+    Check that merged fixed histograms match np.histogram, and count the
+    values outside of the bins.
+
+    Args:
+        num_parts: An integer representing how many partial histograms to
+            split the values between.
+    """
+    histogram = FixedHistogram(0, 0.1, 20)
+    for part in np.array_split(VALUES, num_parts):
+        partial = FixedHistogram(0, 0.1, 20)
+        partial.add(part)
+        histogram.merge(partial)
+    assert np.array_equal(histogram.counts,
+                          np.histogram(VALUES, histogram.edges)[0])
+    assert histogram.underflow == np.count_nonzero(VALUES < 0)
+    assert histogram.overflow == np.count_nonzero(VALUES > 0.1)
+
+
+@pytest.mark.parametrize("num_parts", split_cases)
+def test_adaptive_histogram(num_parts):
+    """
+    Check that adaptive histograms fit every value into at most num_bins
+    bins, and that merging partial histograms in any order gives the same
+    histogram as adding every value to one.
+
+    Args:
+        num_parts: An integer representing how many partial histograms to
+            split the values between.
+    """
+    whole = AdaptiveHistogram(16)
+    whole.add(VALUES)
+    assert len(whole.counts) <= 16
+    assert whole.counts.sum() == len(VALUES)
+    assert np.array_equal(whole.counts,
+                          np.histogram(VALUES, whole.edges)[0])
+
+    partials = []
+    for part in np.array_split(VALUES, num_parts):
+        partials.append(AdaptiveHistogram(16))
+        for value in part[:5]:
+            partials[-1].add(value)
+        partials[-1].add(part[5:])
+    merged = AdaptiveHistogram(16)
+    for partial in reversed(partials):
+        merged.merge(partial)
+    assert np.array_equal(merged.counts, whole.counts)
+    assert np.array_equal(merged.edges, whole.edges)
+
+
+def test_score_histograms():
+    """
+    Check that the z-score histograms bin the z-scores from
+    stats_and_z_info the same way as binning them directly.
+    """
+    rng = np.random.default_rng(1)
+    stats_dict = {f"user{number}": [rng.normal(0.03, 0.01),
+                                    rng.normal(0.05, 0.01), rng.random()]
+                  for number in range(500)}
+    stats, _, z_list = stats_and_z_info(stats_dict, None, list(stats_dict))
+    histograms = ScoreHistograms(32)
+    histograms.add_users(list(stats_dict.values())[:200])
+    histograms.add_user(list(stats_dict.values())[200])
+    rest = ScoreHistograms(32)
+    rest.add_users(list(stats_dict.values())[201:])
+    histograms.merge(rest)
+
+    assert np.allclose(histograms.means, [np.mean(stat) for stat in stats])
+    assert np.allclose(histograms.stds(), [np.std(stat) for stat in stats])
+    for z_histogram, z_scores in zip(histograms.z_histograms(), z_list):
+        assert np.array_equal(z_histogram.counts,
+                              np.histogram(z_scores, z_histogram.edges)[0])
@@ -0,0 +1,105 @@
+"""
+Test that the live scorer gives the same scores as the offline analysis.
+"""
+import numpy as np
+import pytest
+
+from dictionary_io import csv_to_dict
+from gamer_words import (
+    analyze_users_language,
+    get_file_list,
+    parse_words,
+    stats_and_z_info,
+)
+from live_scoring import LiveScorer, RunningStatistics
+
+FOLDER_PATH = "anonymous_data"
+
+
+@pytest.fixture(scope="module", name="model")
+def fixture_model():
+    """
+    Curates the language model from the repository's word frequency CSVs.
+    """
+    return parse_words(csv_to_dict("normal.csv"), csv_to_dict("gaming.csv"),
+                       10)
+
+
+def test_live_scores_match_offline(model):
+    """
+    Check that adding every user's words in several steps gives the same
+    closeness values, ratios and z-scores as analyzing the whole folder.
+
+    Args:
+        model: The tuple returned by parse_words.
+    """
+    file_list = get_file_list(FOLDER_PATH)
+    stats_dict = analyze_users_language(*model, FOLDER_PATH, file_list)
+    _, z_dict, _ = stats_and_z_info(stats_dict, FOLDER_PATH, file_list)
+
+    scorer = LiveScorer(*model)
+    for user in file_list:
+        items = list(csv_to_dict(user).items())
+        # Add each user's words in two halves, as if from two messages
+        scorer.add_counts(user, dict(items[:len(items) // 2]))
+        scorer.add_counts(user, dict(items[len(items) // 2:]))
+
+    for user in file_list:
+        score = scorer.score(user)
+        assert [score["normal_closeness"], score["gamer_closeness"],
+                score["gamer_ratio"]] == pytest.approx(stats_dict[user],
+                                                       rel=1e-9)
+        assert [score["normal_z"], score["gamer_z"]] == \
+            pytest.approx(z_dict[user], rel=1e-6, abs=1e-9)
+
+
+def test_add_message():
+    """
+    Check that messages are tokenized like collected ones, and that ignored
+    words and typos do not count.
+    """
+    scorer = LiveScorer({"the": .5, "gg": .5}, {"gg": 1}, ["gg"], ["a"])
+    assert scorer.score("aditi") is None
+    scorer.add_message("aditi", "GG, a pogcpog")
+    assert scorer.users["aditi"]["counts"] == {"gg": 1}
+    scorer.add_message("aditi", "the")
+    score = scorer.score("aditi")
+    assert score["gamer_ratio"] == .5
+    assert score["gamer_closeness"] == pytest.approx(.5**.5)
+    # With a single user there is no spread to compute z-scores from
+    assert (score["normal_z"], score["gamer_z"]) == (0, 0)
+
+
+def test_running_statistics():
+    """
+    Check that replacing values keeps the population mean and standard
+    deviation of the current values.
+    """
+    statistics = RunningStatistics()
+    for value in [1, 2, 3]:
+        statistics.add(value)
+    statistics.remove(3)
+    statistics.add(7)
+    assert statistics.mean() == pytest.approx(10 / 3)
+    assert statistics.std() == pytest.approx(
+        (sum((value - 10 / 3)**2 for value in [1, 2, 7]) / 3)**.5)
+    assert statistics.z_score(10 / 3) == pytest.approx(0)
+
+
+def test_running_statistics_drift():
+    """
+    Check that replacing values many times keeps the same mean and standard
+    deviation as computing them from the current values.
+    """
+    rng = np.random.default_rng(0)
+    values = list(rng.random(50) * 1e3 + 1e6)
+    statistics = RunningStatistics()
+    for value in values:
+        statistics.add(value)
+    for _ in range(20000):
+        index = rng.integers(len(values))
+        statistics.remove(values[index])
+        values[index] = rng.random() * 1e3 + 1e6
+        statistics.add(values[index])
+    assert statistics.mean() == pytest.approx(np.mean(values), rel=1e-12)
+    assert statistics.std() == pytest.approx(np.std(values), rel=1e-10)
@@ -0,0 +1,360 @@
+"""
+Test the Discord message collection functions against a local mock guild with
+synthetic channel histories.
+"""
+import asyncio
+import itertools
+import json
+import os
+import time
+import pytest
+
+from dictionary_io import csv_to_dict
+from gamer_words import get_file_list
+from message_collection import (
+    collect_author_counts,
+    collect_member_counts,
+    commit_collection,
+    folder_lock,
+    load_watermarks,
+    progress_reporter,
+    read_channels,
+    run_blocking,
+    save_watermarks,
+    write_author_csvs,
+)
+
+# Gives every fake message and channel a new, increasing ID like Discord does
+SNOWFLAKES = itertools.count(1)
+
+
+class FakeAuthor:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a discord Member.
+    """
+
+    def __init__(self, name, bot=False):
+        self.name = name
+        self.bot = bot
+
+
+ADITI = FakeAuthor("aditi")
+LUKE = FakeAuthor("luke")
+ROBOT = FakeAuthor("robot", bot=True)
+
+
+class FakeMessage:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a discord Message.
+    """
+
+    def __init__(self, author, content):
+        self.id = next(SNOWFLAKES)  # pylint: disable=invalid-name
+        self.author = author
+        self.content = content
+
+
+class Forbidden(Exception):
+    """
+    A stand-in for discord.Forbidden.
+    """
+
+
+class RateLimited(Exception):
+    """
+    A stand-in for a discord.HTTPException from a rate limited request.
+    """
+    status = 429
+
+
+class FakeChannel:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a discord TextChannel with a synthetic history that takes
+    delay seconds to read, and can be forbidden or rate limited.
+    """
+
+    def __init__(self, messages, delay=0, forbidden=False, rate_limits=0):
+        self.id = next(SNOWFLAKES)  # pylint: disable=invalid-name
+        self.messages = messages
+        self.delay = delay
+        self.forbidden = forbidden
+        self.rate_limits = rate_limits
+        self.read = 0
+
+    async def history(self, limit, after=None):
+        """
+        Yields the messages of the channel from newest to oldest, or from
+        oldest to newest starting after a given message, like Discord does.
+        """
+        await asyncio.sleep(self.delay)
+        if self.forbidden:
+            raise Forbidden()
+        if self.rate_limits > 0:
+            self.rate_limits -= 1
+            raise RateLimited()
+        if after is None:
+            messages = list(reversed(self.messages))
+        else:
+            messages = [message for message in self.messages
+                        if message.id > after.id]
+        for message in messages[:limit]:
+            self.read += 1
+            yield message
+
+
+class FakeIndicator:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for the indicator Message that records its edits.
+    """
+
+    def __init__(self):
+        self.edits = []
+
+    async def edit(self, content):
+        """
+        Records the new content of the message.
+        """
+        self.edits.append(content)
+
+
+def make_guild(delay=0):
+    """
+    Creates the channels of a mock guild.
+
+    Args:
+        delay: A float representing how many seconds reading a channel takes.
+    Returns:
+        A list of FakeChannels.
+    """
+    return [
+        FakeChannel([FakeMessage(ADITI, "GG, "),
+                     FakeMessage(LUKE, "hello "),
+                     FakeMessage(ADITI, "Well played! ")], delay),
+        FakeChannel([FakeMessage(LUKE, "pog")], delay, forbidden=True),
+        FakeChannel([FakeMessage(ADITI, "pog "), FakeMessage(LUKE, "gg"),
+                     FakeMessage(ROBOT, "beep boop")], delay, rate_limits=1),
+        FakeChannel([], delay),
+    ]
+
+
+def test_collect_member_counts():
+    """
+    Check that collecting a member's words from many channels at once gives
+    the same counts as reading the channels one at a time, skipping forbidden
+    channels and retrying rate limited ones.
+    """
+    counts = asyncio.run(collect_member_counts(
+        make_guild(), ADITI, skip_errors=(Forbidden,), backoff_seconds=0))
+    assert counts == {"well": 1, "played": 1, "gg": 1, "pog": 1}
+
+
+def test_collect_member_counts_concurrently():
+    """
+    Check that channels are read at the same time, but no more than
+    max_concurrent at once.
+    """
+    start = time.perf_counter()
+    asyncio.run(collect_member_counts(
+        make_guild(delay=.1), ADITI, skip_errors=(Forbidden,),
+        backoff_seconds=0))
+    assert time.perf_counter() - start < .35
+
+    start = time.perf_counter()
+    asyncio.run(collect_member_counts(
+        make_guild(delay=.1), ADITI, skip_errors=(Forbidden,),
+        max_concurrent=1, backoff_seconds=0))
+    assert time.perf_counter() - start >= .5
+
+
+def test_collect_author_counts(tmp_path):
+    """
+    Check that every author's words are counted from a single pass over the
+    channels, that bots are left out, and that one CSV is written per author.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the CSVs to.
+    """
+    author_counts = asyncio.run(collect_author_counts(
+        make_guild(), skip_errors=(Forbidden,), backoff_seconds=0))
+    assert author_counts == {ADITI: {"gg": 1, "well": 1, "played": 1,
+                                     "pog": 1},
+                             LUKE: {"hello": 1, "gg": 1}}
+
+    file_list = write_author_csvs(author_counts, f"{tmp_path}/users")
+    assert sorted(os.listdir(f"{tmp_path}/users")) == ["aditi.csv",
+                                                       "luke.csv"]
+    assert [csv_to_dict(file_name) for file_name in file_list] == \
+        list(author_counts.values())
+
+
+def test_incremental_collection(tmp_path):
+    """
+    Check that watermarks make a second collection only read new messages,
+    and that the new counts are merged into the existing CSVs.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the CSVs to.
+    """
+    guild = make_guild()
+    folder_path = f"{tmp_path}/users"
+    watermarks = load_watermarks(folder_path)
+    write_author_csvs(asyncio.run(collect_author_counts(
+        guild, watermarks["channels"], skip_errors=(Forbidden,),
+        backoff_seconds=0)), folder_path, merge=True)
+    save_watermarks(watermarks, folder_path)
+    member_watermarks = {}
+    assert asyncio.run(collect_member_counts(
+        guild, ADITI, member_watermarks, skip_errors=(Forbidden,))) == \
+        {"well": 1, "played": 1, "gg": 1, "pog": 1}
+
+    guild[0].messages.append(FakeMessage(ADITI, "GG again"))
+    guild[3].messages.append(FakeMessage(LUKE, "new channel message"))
+    for channel in guild:
+        channel.read = 0
+    watermarks = load_watermarks(folder_path)
+    write_author_csvs(asyncio.run(collect_author_counts(
+        guild, watermarks["channels"], skip_errors=(Forbidden,))),
+                      folder_path, merge=True)
+    assert [channel.read for channel in guild] == [1, 0, 0, 1]
+    assert asyncio.run(collect_member_counts(
+        guild, ADITI, member_watermarks, skip_errors=(Forbidden,))) == \
+        {"gg": 1, "again": 1}
+    assert csv_to_dict(f"{folder_path}/aditi.csv") == {
+        "gg": 2, "well": 1, "played": 1, "pog": 1, "again": 1}
+    assert csv_to_dict(f"{folder_path}/luke.csv") == {
+        "hello": 1, "gg": 1, "new": 1, "channel": 1, "message": 1}
+
+    # The watermarks are kept with the CSVs, but are not listed as a user
+    assert get_file_list(folder_path) == [f"{folder_path}/aditi.csv",
+                                          f"{folder_path}/luke.csv"]
+
+
+def test_overlapping_collections(tmp_path):
+    """
+    Check that two collections into the same folder at the same time, each
+    holding the folder lock and committing with commit_collection, count
+    every message exactly once.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the CSVs to.
+    """
+    guild = make_guild()
+    folder_path = f"{tmp_path}/users"
+
+    async def collect_all():
+        async with folder_lock(folder_path):
+            watermarks = load_watermarks(folder_path)
+            author_counts = await collect_author_counts(
+                guild, watermarks["channels"], skip_errors=(Forbidden,))
+            commit_collection(folder_path, {
+                f"{folder_path}/{author.name}.csv": counts
+                for author, counts in author_counts.items()}, watermarks)
+
+    async def collect_twice():
+        await asyncio.gather(collect_all(), collect_all())
+
+    asyncio.run(collect_twice())
+    guild[0].messages.append(FakeMessage(ADITI, "GG again"))
+    asyncio.run(collect_twice())
+    assert csv_to_dict(f"{folder_path}/aditi.csv") == {
+        "gg": 2, "well": 1, "played": 1, "pog": 1, "again": 1}
+
+
+def test_commit_collection_crash(tmp_path, monkeypatch):
+    """
+    Check that a collection that stops before it is committed changes
+    nothing, and that one that stops while moving its files into place is
+    finished the next time the watermarks are loaded.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the CSVs to.
+        monkeypatch: A pytest fixture used to make the collection stop.
+    """
+    folder_path = str(tmp_path)
+    file_name = f"{folder_path}/aditi.csv"
+    commit_collection(folder_path, {file_name: {"gg": 1}},
+                      {"channels": {"1": 5}, "members": {}})
+
+    def crash(*_, **__):
+        raise OSError("crash")
+
+    # Stop before the journal is written
+    monkeypatch.setattr(json, "dump", crash)
+    with pytest.raises(OSError):
+        commit_collection(folder_path, {file_name: {"gg": 1}},
+                          {"channels": {"1": 9}, "members": {}})
+    monkeypatch.undo()
+    assert csv_to_dict(file_name) == {"gg": 1}
+    assert load_watermarks(folder_path)["channels"] == {"1": 5}
+
+    # Stop after the journal is written, while moving the files into place
+    replace = os.replace
+
+    def crash_moving_csv(source, destination):
+        if destination == file_name:
+            raise OSError("crash")
+        replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", crash_moving_csv)
+    with pytest.raises(OSError):
+        commit_collection(folder_path, {file_name: {"gg": 1}},
+                          {"channels": {"1": 9}, "members": {}})
+    monkeypatch.undo()
+    assert csv_to_dict(file_name) == {"gg": 1}
+    assert load_watermarks(folder_path)["channels"] == {"1": 9}
+    assert csv_to_dict(file_name) == {"gg": 2}
+    assert load_watermarks(folder_path)["channels"] == {"1": 9}
+    assert csv_to_dict(file_name) == {"gg": 2}
+
+
+def test_run_blocking_keeps_loop_responsive():
+    """
+    Check that a slow write run through run_blocking lets other tasks run on
+    the event loop in the meantime.
+    """
+    async def main():
+        ticks = []
+
+        async def heartbeat():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(.02)
+
+        beating = asyncio.create_task(heartbeat())
+        await run_blocking(time.sleep, .15)
+        await beating
+        return ticks
+
+    ticks = asyncio.run(main())
+    assert max(later - earlier for (earlier, later) in
+               zip(ticks, ticks[1:])) < .1
+
+
+def test_read_channels_raises():
+    """
+    Check that errors which are not skipped or rate limits are raised.
+    """
+    async def read_channel(_):
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        asyncio.run(read_channels(make_guild(), read_channel))
+
+
+def test_progress_reporter():
+    """
+    Check that progress is reported through the indicator, and that the last
+    channel finishing is always reported even when edits are throttled.
+    """
+    indicator = FakeIndicator()
+    asyncio.run(read_channels(
+        make_guild(), lambda channel: asyncio.sleep(0),
+        on_progress=progress_reporter(indicator, "Collecting", 60)))
+    assert indicator.edits == ["Collecting (4/4 channels)"]
+
+    indicator = FakeIndicator()
+    asyncio.run(read_channels(
+        make_guild(), lambda channel: asyncio.sleep(0),
+        on_progress=progress_reporter(indicator, "Collecting", 0)))
+    assert indicator.edits == [f"Collecting ({finished}/4 channels)"
+                               for finished in range(1, 5)]
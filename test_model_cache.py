@@ -0,0 +1,146 @@
+"""
+Test the on-disk cache of curated language models.
+"""
+import os
+import pytest
+
+import gamer_words
+from dictionary_io import dict_to_csv
+from gamer_words import parse_words
+from model_cache import (
+    cached_parse_files,
+    evict_old_models,
+    load_model,
+    model_fingerprint,
+)
+from shared_model import write_shared_model
+
+NORMAL_DICTIONARY = {"the": 50, "cat": 20, "game": 30, "rare": 1}
+GAMER_DICTIONARY = {"the": 40, "game": 200, "pog": 90, "gg": 70}
+
+
+@pytest.fixture(name="csv_paths")
+def fixture_csv_paths(tmp_path):
+    """
+    Write the normal and gamer dictionaries to CSVs.
+
+    Args:
+        tmp_path: A pytest temporary directory.
+    Returns:
+        A tuple of strings representing the paths to the normal and gamer
+        CSVs.
+    """
+    dict_to_csv(NORMAL_DICTIONARY, f"{tmp_path}/normal.csv")
+    dict_to_csv(GAMER_DICTIONARY, f"{tmp_path}/gaming.csv")
+    return f"{tmp_path}/normal.csv", f"{tmp_path}/gaming.csv"
+
+
+def as_lists(model):
+    """
+    Gives the words and values of every part of a model in order, so that
+    views and dictionaries can be compared.
+
+    Args:
+        model: A tuple as returned by parse_words or load_model.
+    Returns:
+        A list of four lists.
+    """
+    normal_dictionary, gamer_dictionary, gamer_word_list, ignore_list = model
+    return [list(normal_dictionary.items()), list(gamer_dictionary.items()),
+            list(gamer_word_list), list(ignore_list)]
+
+
+def test_load_model(tmp_path):
+    """
+    Check that a cached model loads back exactly, including word order.
+
+    Args:
+        tmp_path: A pytest temporary directory.
+    """
+    model = parse_words(NORMAL_DICTIONARY, GAMER_DICTIONARY, 2)
+    write_shared_model(model, f"{tmp_path}/model.shm")
+    assert as_lists(load_model(f"{tmp_path}/model.shm")) == as_lists(model)
+
+
+def test_cached_parse_files_reuses_entry(tmp_path, csv_paths, monkeypatch):
+    """
+    Check that a second call with the same files loads the cached model
+    instead of reading the files and calling parse_words.
+
+    Args:
+        tmp_path: A pytest temporary directory.
+        csv_paths: The paths to the normal and gamer CSVs.
+        monkeypatch: A pytest fixture used to count calls to parse_words.
+    """
+    calls = []
+    monkeypatch.setattr(gamer_words, "parse_words",
+                        lambda *args: calls.append(args) or parse_words(*args))
+    cache_dir = f"{tmp_path}/cache"
+    first = cached_parse_files(*csv_paths, 2, cache_dir)
+    second = cached_parse_files(*csv_paths, 2, cache_dir)
+    assert as_lists(first) == as_lists(second) == \
+        as_lists(parse_words(NORMAL_DICTIONARY, GAMER_DICTIONARY, 2))
+    assert len(calls) == 1
+
+
+def test_cached_parse_files_rebuilds_stale(tmp_path, csv_paths, monkeypatch):
+    """
+    Check that changing the files, the threshold or a ratio constant
+    rebuilds the model rather than reusing an old one.
+
+    Args:
+        tmp_path: A pytest temporary directory.
+        csv_paths: The paths to the normal and gamer CSVs.
+        monkeypatch: A pytest fixture used to change a ratio constant.
+    """
+    cache_dir = f"{tmp_path}/cache"
+    fingerprint = model_fingerprint(*csv_paths, 2)
+    cached_parse_files(*csv_paths, 2, cache_dir)
+    changed = dict(GAMER_DICTIONARY, pog=1)
+    dict_to_csv(changed, csv_paths[1])
+    assert model_fingerprint(*csv_paths, 2) != fingerprint
+    assert as_lists(cached_parse_files(*csv_paths, 2, cache_dir)) == \
+        as_lists(parse_words(NORMAL_DICTIONARY, changed, 2))
+    assert as_lists(cached_parse_files(*csv_paths, 100, cache_dir)) == \
+        as_lists(parse_words(NORMAL_DICTIONARY, changed, 100))
+    monkeypatch.setattr(gamer_words, "GAMER_WORD_RATIO", 1)
+    assert as_lists(cached_parse_files(*csv_paths, 2, cache_dir)) == \
+        as_lists(parse_words(NORMAL_DICTIONARY, changed, 2))
+    assert len(os.listdir(cache_dir)) == 4
+
+
+def test_cached_parse_files_rebuilds_damaged(tmp_path, csv_paths):
+    """
+    Check that a damaged cache entry is rebuilt.
+
+    Args:
+        tmp_path: A pytest temporary directory.
+        csv_paths: The paths to the normal and gamer CSVs.
+    """
+    cache_dir = f"{tmp_path}/cache"
+    cached_parse_files(*csv_paths, 2, cache_dir)
+    for name in os.listdir(cache_dir):
+        with open(f"{cache_dir}/{name}", "w") as file:
+            file.write("not a model")
+    assert as_lists(cached_parse_files(*csv_paths, 2, cache_dir)) == \
+        as_lists(parse_words(NORMAL_DICTIONARY, GAMER_DICTIONARY, 2))
+
+
+def test_evict_old_models(tmp_path):
+    """
+    Check that the least recently used models are evicted first and that the
+    kept model is never evicted.
+
+    Args:
+        tmp_path: A pytest temporary directory.
+    """
+    model = parse_words(NORMAL_DICTIONARY, GAMER_DICTIONARY, 2)
+    for age, name in enumerate(["new", "middle", "old"]):
+        write_shared_model(model, f"{tmp_path}/{name}.shm")
+        os.utime(f"{tmp_path}/{name}.shm", (1000 - age, 1000 - age))
+    size = os.path.getsize(f"{tmp_path}/new.shm")
+
+    evicted = evict_old_models(str(tmp_path), size,
+                               keep=f"{tmp_path}/old.shm")
+    assert evicted == [f"{tmp_path}/middle.shm", f"{tmp_path}/new.shm"]
+    assert os.listdir(tmp_path) == ["old.shm"]
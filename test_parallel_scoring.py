@@ -0,0 +1,120 @@
+"""
+Test that the parallel user scoring gives the same results as the serial
+functions in gamer_words.py.
+"""
+import numpy as np
+import pytest
+
+from dictionary_io import dict_to_csv
+from gamer_words import (
+    analyze_users_language,
+    stats_and_z_info,
+    generate_user_id_dict,
+)
+import parallel_scoring
+from parallel_scoring import (
+    analyze_users_language_parallel,
+    generate_user_id_dict_parallel,
+    score_histograms_parallel,
+)
+from histograms import score_histograms
+
+NORMAL_DICTIONARY = {"the": .5, "cat": .3, "dog": .2}
+GAMER_DICTIONARY = {"the": .4, "pog": .35, "gg": .25}
+GAMER_WORDS = ["pog", "gg"]
+IGNORE_LIST = ["a"]
+
+USERS = [
+    {"the": 4, "pog": 3, "a": 9},
+    {"cat": 2, "dog": 5, "gg": 1},
+    {"pog": 6, "gg": 6, "the": 1, "cheese": 2},
+    {"the": 10, "cat": 1, "dog": 1},
+    {"gg": 2, "cheese": 7},
+]
+
+# Check the serial path, a single chunk, and more workers than chunks
+parallel_cases = [(1, 1), (2, 1), (2, 16), (3, 2)]
+
+
+@pytest.fixture(name="folder_path")
+def fixture_folder_path(tmp_path):
+    """
+    Create a folder of user CSVs to score.
+
+    Args:
+        tmp_path: A pytest temporary directory.
+    Returns:
+        A string representing the path to the folder of user CSVs.
+    """
+    for number, user in enumerate(USERS):
+        dict_to_csv(user, f"{tmp_path}/user{number}.csv")
+    return str(tmp_path)
+
+
+@pytest.mark.parametrize("num_workers,chunk_size", parallel_cases)
+def test_analyze_users_language_parallel(folder_path, num_workers,
+                                         chunk_size):
+    """
+    Check that analyze_users_language_parallel matches analyze_users_language.
+
+    Args:
+        folder_path: A string representing the path to the user CSVs.
+        num_workers: An integer representing the number of worker processes.
+        chunk_size: An integer representing how many users a task holds.
+    """
+    serial = analyze_users_language(NORMAL_DICTIONARY, GAMER_DICTIONARY,
+                                    GAMER_WORDS, IGNORE_LIST, folder_path)
+    parallel = analyze_users_language_parallel(
+        NORMAL_DICTIONARY, GAMER_DICTIONARY, GAMER_WORDS, IGNORE_LIST,
+        folder_path, num_workers, chunk_size)
+    assert parallel == serial
+    # The serial path must not leave the model behind in this process
+    # pylint: disable-next=protected-access
+    assert not parallel_scoring._WORKER_MODEL
+
+
+@pytest.mark.parametrize("num_workers,chunk_size", parallel_cases)
+def test_generate_user_id_dict_parallel(folder_path, num_workers, chunk_size):
+    """
+    Check that generate_user_id_dict_parallel matches generate_user_id_dict.
+
+    Args:
+        folder_path: A string representing the path to the user CSVs.
+        num_workers: An integer representing the number of worker processes.
+        chunk_size: An integer representing how many users a task holds.
+    """
+    user_stats_dict = analyze_users_language(
+        NORMAL_DICTIONARY, GAMER_DICTIONARY, GAMER_WORDS, IGNORE_LIST,
+        folder_path)
+    _, z_dict, _ = stats_and_z_info(user_stats_dict, folder_path)
+    assert generate_user_id_dict_parallel(
+        z_dict, user_stats_dict, GAMER_WORDS, folder_path, num_workers,
+        chunk_size) == generate_user_id_dict(z_dict, user_stats_dict,
+                                             GAMER_WORDS, folder_path)
+
+
+@pytest.mark.parametrize("num_workers,chunk_size", parallel_cases)
+def test_score_histograms_parallel(folder_path, num_workers, chunk_size):
+    """
+    Check that merging the workers' partial histograms gives the histograms
+    of every user's stats.
+
+    Args:
+        folder_path: A string representing the path to the user CSVs.
+        num_workers: An integer representing the number of worker processes.
+        chunk_size: An integer representing how many users a task holds.
+    """
+    serial = score_histograms(analyze_users_language(
+        NORMAL_DICTIONARY, GAMER_DICTIONARY, GAMER_WORDS, IGNORE_LIST,
+        folder_path), 8)
+    parallel = score_histograms_parallel(
+        NORMAL_DICTIONARY, GAMER_DICTIONARY, GAMER_WORDS, IGNORE_LIST,
+        folder_path, 8, num_workers=num_workers, chunk_size=chunk_size)
+    for serial_histogram, parallel_histogram in zip(serial.histograms,
+                                                    parallel.histograms):
+        assert np.array_equal(parallel_histogram.counts,
+                              serial_histogram.counts)
+        assert np.array_equal(parallel_histogram.edges,
+                              serial_histogram.edges)
+    assert np.allclose(parallel.means, serial.means)
+    assert np.allclose(parallel.stds(), serial.stds())
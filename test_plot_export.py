@@ -0,0 +1,70 @@
+"""
+Test exporting plots without pyplot.
+"""
+import io
+import matplotlib._pylab_helpers
+from PIL import Image
+
+from histograms import FixedHistogram
+from plot_export import FAST_WORD_CLOUD_SIZE, PlotExporter, make_word_cloud
+
+PNG_MAGIC = b"\x89PNG"
+
+frequency_dict = {"gg": 10, "pog": 5, "ez": 3, "noob": 1}
+histogram_data = [[0.1, 0.5, 0.4, 1.2, -0.3, 0.9], [1.5, 2.0, 0.7, 1.1]]
+
+
+def test_export_targets(tmp_path):
+    """
+    Check that plots can be exported as bytes, to paths and to file objects,
+    without any figures being opened in pyplot.
+
+    Args:
+        tmp_path: A pytest temporary directory to save plots to.
+    """
+    exporter = PlotExporter()
+    assert exporter.single_histogram(histogram_data[0], 3, "x",
+                                     "title").startswith(PNG_MAGIC)
+    path = f"{tmp_path}/stacked.png"
+    assert exporter.stacked_histogram(histogram_data, 3,
+                                      ["a", "b", "x", "title"], path) == path
+    assert Image.open(path).size == (640, 480)
+    buffer = io.BytesIO()
+    exporter.word_cloud(frequency_dict, buffer, fast=True)
+    assert buffer.getvalue().startswith(PNG_MAGIC)
+    assert not matplotlib._pylab_helpers.Gcf.get_all_fig_managers()
+
+
+def test_figures_reused():
+    """
+    Check that one figure is reused for every plot of the same size, and that
+    each export only shows its own plot.
+    """
+    exporter = PlotExporter()
+    first = exporter.single_histogram(histogram_data[0], 3, "x", "title")
+    exporter.stacked_histogram(histogram_data, 3, ["a", "b", "x", "title"])
+    assert exporter.single_histogram(histogram_data[0], 3, "x",
+                                     "title") == first
+    assert len(exporter._figures) == 1
+    assert len(exporter.figure((6.4, 4.8)).axes) == 0
+
+
+def test_fast_word_cloud():
+    """
+    Check that the fast path lays the word cloud out at the lower resolution.
+    """
+    assert make_word_cloud(frequency_dict, fast=True).to_array().shape == \
+        (FAST_WORD_CLOUD_SIZE[1], FAST_WORD_CLOUD_SIZE[0], 3)
+
+
+def test_binned_histograms():
+    """
+    Check that plotting the counts of a histogram draws the same image as
+    plotting the values it binned.
+    """
+    histogram = FixedHistogram(-0.5, 2.5, 6)
+    histogram.add(histogram_data[0])
+    exporter = PlotExporter()
+    assert exporter.single_histogram(histogram, None, "x", "title") == \
+        exporter.single_histogram(histogram_data[0], histogram.edges, "x",
+                                  "title")
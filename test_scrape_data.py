@@ -0,0 +1,189 @@
+"""
+Test the Reddit scraping functions against a local fake Reddit client.
+"""
+from collections import Counter
+import time
+import pytest
+
+import scrape_data
+from scrape_data import (
+    scrape_subreddits,
+    scrape_subreddits_concurrently,
+    tokenize,
+)
+
+
+class FakeSubmission:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a praw Submission holding only its text.
+    """
+
+    def __init__(self, selftext):
+        self.selftext = selftext
+
+
+class FakeSubreddit:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a praw Subreddit whose listing can fail part way through,
+    like a rate limited or crashed scrape.
+    """
+
+    def __init__(self, texts, fail_after=None, delay=0, rate_limits=0):
+        self.texts = texts
+        self.fail_after = fail_after
+        self.delay = delay
+        self.rate_limits = rate_limits
+
+    def top(self, limit):
+        """
+        Yields the top submissions, raising an error after fail_after of them
+        and answering the first rate_limits listings with a rate limit error.
+        """
+        time.sleep(self.delay)
+        if self.rate_limits > 0:
+            self.rate_limits -= 1
+            raise RateLimitError()
+        for position, text in enumerate(self.texts[:limit]):
+            if position == self.fail_after:
+                raise ConnectionError("connection lost")
+            yield FakeSubmission(text)
+
+
+class FakeResponse:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for the HTTP response of a rate limited request.
+    """
+    status_code = 429
+
+
+class RateLimitError(Exception):
+    """
+    A stand-in for the error praw raises when requests are rate limited.
+    """
+    response = FakeResponse()
+
+
+class FakeReddit:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for a praw Reddit instance.
+    """
+
+    def __init__(self, subreddits):
+        self.subreddits = subreddits
+
+    def subreddit(self, name):
+        """
+        Returns the fake subreddit with the given name.
+        """
+        return self.subreddits[name]
+
+
+SUBREDDITS = {
+    "gaming": ["GG, well played!", "pog pog", "Nice game.", "the end"],
+    "games": ["New game out", "GG"],
+}
+
+tokenize_cases = [
+    # Check that punctuation and capitalization are removed
+    ("GG, well played!", ["gg", "well", "played"]),
+    # Check that empty text has no words
+    ("", []),
+    # Check that any whitespace splits words
+    ("pog\npog\tpog", ["pog", "pog", "pog"]),
+]
+
+
+def expected_counts(num_posts):
+    """
+    Counts the words of the fake subreddits directly.
+
+    Args:
+        num_posts: The number of submissions to count on each subreddit.
+    Returns:
+        A Counter of every word in the fake submissions.
+    """
+    counts = Counter()
+    for texts in SUBREDDITS.values():
+        for text in texts[:num_posts]:
+            counts.update(tokenize(text))
+    return counts
+
+
+@pytest.mark.parametrize("text,words", tokenize_cases)
+def test_tokenize(text, words):
+    """
+    Check that tokenize splits text into lowercase words without punctuation.
+
+    Args:
+        text: A string representing the text to split.
+        words: A list of strings representing the expected words.
+    """
+    assert tokenize(text) == words
+
+
+def test_scrape_subreddits(monkeypatch):
+    """
+    Check that scrape_subreddits counts the words of every submission.
+
+    Args:
+        monkeypatch: A pytest fixture used to replace the Reddit client.
+    """
+    monkeypatch.setattr(scrape_data, "_REDDIT", FakeReddit(
+        {name: FakeSubreddit(texts) for (name, texts) in SUBREDDITS.items()}))
+    assert scrape_subreddits(["gaming", "games"], 3) == expected_counts(3)
+
+
+def test_scrape_subreddits_resumes(monkeypatch, tmp_path):
+    """
+    Check that a scrape that fails part way through resumes from its
+    checkpoint without counting any submission twice.
+
+    Args:
+        monkeypatch: A pytest fixture used to replace the Reddit client.
+        tmp_path: A pytest temporary directory to hold the checkpoint.
+    """
+    checkpoint_path = f"{tmp_path}/checkpoint.json"
+    monkeypatch.setattr(scrape_data, "_REDDIT", FakeReddit({
+        "gaming": FakeSubreddit(SUBREDDITS["gaming"]),
+        "games": FakeSubreddit(SUBREDDITS["games"], fail_after=1)}))
+    with pytest.raises(ConnectionError):
+        scrape_subreddits(["gaming", "games"], 4, checkpoint_path, 1)
+
+    monkeypatch.setattr(scrape_data, "_REDDIT", FakeReddit({
+        "gaming": FakeSubreddit([], fail_after=0),
+        "games": FakeSubreddit(SUBREDDITS["games"])}))
+    assert scrape_subreddits(["gaming", "games"], 4, checkpoint_path, 1) == \
+        expected_counts(4)
+
+
+def test_scrape_subreddits_concurrently():
+    """
+    Check that scraping concurrently gives the same counts as scraping one
+    subreddit at a time, in about the time of the slowest subreddit.
+    """
+    subreddits = {name: FakeSubreddit(texts, delay=.2)
+                  for (name, texts) in SUBREDDITS.items()}
+    start = time.perf_counter()
+    counts = scrape_subreddits_concurrently(
+        ["gaming", "games"], 3, reddit_factory=lambda: FakeReddit(subreddits))
+    assert time.perf_counter() - start < .35
+    assert counts == expected_counts(3)
+
+
+def test_scrape_subreddits_concurrently_rate_limited():
+    """
+    Check that a rate limited subreddit is retried without double counting,
+    and that other errors are raised.
+    """
+    subreddits = {"gaming": FakeSubreddit(SUBREDDITS["gaming"], rate_limits=2),
+                  "games": FakeSubreddit(SUBREDDITS["games"])}
+    assert scrape_subreddits_concurrently(
+        ["gaming", "games"], 4, max_workers=1,
+        reddit_factory=lambda: FakeReddit(subreddits),
+        backoff_seconds=0) == expected_counts(4)
+
+    subreddits["gaming"] = FakeSubreddit(SUBREDDITS["gaming"], fail_after=1)
+    with pytest.raises(ConnectionError):
+        scrape_subreddits_concurrently(
+            ["gaming", "games"], 4,
+            reddit_factory=lambda: FakeReddit(subreddits), backoff_seconds=0)
@@ -0,0 +1,102 @@
+"""
+Test that a memory mapped shared model scores users the same as the
+dictionaries returned by parse_words.
+"""
+import pytest
+
+from dictionary_io import csv_to_dict
+from gamer_words import (
+    analyze_user_language,
+    analyze_users_language,
+    clean_user_dictionary,
+    find_most_frequent_gamer_words,
+    get_file_list,
+    parse_words,
+)
+from parallel_scoring import analyze_users_language_shared
+from shared_model import SharedModel, write_shared_model
+
+FOLDER_PATH = "anonymous_data"
+
+view_cases = [
+    # Check an empty model
+    ({}, {}, [], []),
+    # Check that the views keep the order of the model rather than sorting
+    ({"the": .5, "cat": .3, "café": .2}, {"the": .4, "pog": .35, "gg": .25},
+     ["pog", "gg"], ["a", "zebra"]),
+]
+
+
+@pytest.fixture(scope="module", name="model")
+def fixture_model():
+    """
+    Curates the language model from the repository's word frequency CSVs.
+    """
+    return parse_words(csv_to_dict("normal.csv"), csv_to_dict("gaming.csv"),
+                       10)
+
+
+@pytest.mark.parametrize("normal_dictionary,gamer_dictionary,gamer_words,\
+ignore_list", view_cases)
+def test_views(tmp_path, normal_dictionary, gamer_dictionary, gamer_words,
+               ignore_list):
+    """
+    Check that the views of a shared model hold the same words, values and
+    order as the model that was written.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the model to.
+        normal_dictionary: A dictionary of the normal frequencies.
+        gamer_dictionary: A dictionary of the gamer frequencies.
+        gamer_words: A list of strings representing the gamer words.
+        ignore_list: A list of strings representing the ignored words.
+    """
+    write_shared_model((normal_dictionary, gamer_dictionary, gamer_words,
+                        ignore_list), f"{tmp_path}/model.shm")
+    shared = SharedModel(f"{tmp_path}/model.shm")
+    assert list(shared.normal_dictionary.items()) == \
+        list(normal_dictionary.items())
+    assert list(shared.gamer_dictionary.items()) == \
+        list(gamer_dictionary.items())
+    assert list(shared.gamer_words) == gamer_words
+    assert list(shared.ignore_list) == ignore_list
+    for word in ["pog", "the", "a", "missing", "a" * 100]:
+        assert (word in shared.normal_dictionary) == \
+            (word in normal_dictionary)
+        assert (word in shared.gamer_words) == (word in gamer_words)
+    with pytest.raises(KeyError):
+        shared.normal_dictionary["pog"]  # pylint: disable=pointless-statement
+
+
+def test_shared_scores_match(tmp_path, model):
+    """
+    Check that the shared model views and score_user give the same scores,
+    to within float rounding, and top gamer words as the dictionaries, and
+    that workers mapping the model score a folder the same as
+    analyze_users_language.
+
+    Args:
+        tmp_path: A pytest temporary directory to write the model to.
+        model: The tuple returned by parse_words.
+    """
+    write_shared_model(model, f"{tmp_path}/model.shm")
+    shared = SharedModel(f"{tmp_path}/model.shm")
+    for user in get_file_list(FOLDER_PATH)[:5]:
+        user_dictionary = csv_to_dict(user)
+        expected = analyze_user_language(*model, user_dictionary)
+        assert analyze_user_language(*shared.as_model(), user_dictionary) == \
+            pytest.approx(expected, rel=1e-12)
+        assert shared.score_user(clean_user_dictionary(
+            user_dictionary, shared.ignore_list)) == \
+            pytest.approx(expected, rel=1e-12)
+        assert find_most_frequent_gamer_words(
+            user_dictionary, shared.gamer_words, 5) == \
+            find_most_frequent_gamer_words(user_dictionary, model[2], 5)
+
+    expected = analyze_users_language(*model, FOLDER_PATH)
+    for num_workers in [1, 2]:
+        results = analyze_users_language_shared(
+            f"{tmp_path}/model.shm", FOLDER_PATH, num_workers)
+        assert list(results) == list(expected)
+        for user, scores in results.items():
+            assert scores == pytest.approx(expected[user], rel=1e-12)
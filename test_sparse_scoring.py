@@ -0,0 +1,105 @@
+"""
+Test that the vectorized user scoring matches the per-user scoring functions.
+"""
+import pytest
+
+from gamer_words import (
+    analyze_user_language,
+    clean_user_dictionary,
+)
+from sparse_scoring import (
+    build_vocabulary_index,
+    dictionary_to_vector,
+    score_users,
+)
+
+
+build_vocabulary_index_cases = [
+    # Check that two empty dictionaries make an empty vocabulary
+    ({}, {}, {}),
+    # Check that words shared by both dictionaries are only interned once
+    ({"game": .5, "the": .5}, {"the": .2, "pog": .8},
+     {"game": 0, "the": 1, "pog": 2}),
+]
+
+score_users_cases = [
+    # Check a user whose words are all in both language dictionaries
+    ({"gaming": .5, "the": .5}, {"gaming": .8, "the": .2}, ["gaming"],
+     [{"gaming": 3, "the": 1}]),
+    # Check users with words outside of both language dictionaries
+    ({"the": 1}, {"pog": .6, "gg": .4}, ["pog", "gg"],
+     [{"pog": 2, "cheese": 5}, {"the": 4, "gg": 1, "malt": 2}]),
+    # Check that words in the ignore list and typos do not count
+    ({"the": .7, "a": .3}, {"pog": 1}, ["pog"],
+     [{"the": 2, "pog": 2, "ignored": 9, "pogcpog": 4}]),
+    # Check gamer words outside of both dictionaries, and sums whose rounding
+    # depends on the order the values are added in
+    ({"a": .1, "b": .2, "c": .3}, {"c": .7, "d": .3}, ["d", "e", "a"],
+     [{"c": 7, "e": 3, "a": 1, "b": 11, "d": 13, "f": 17},
+      {"a": 1, "b": 3, "c": 3, "d": 3, "e": 3, "g": 3}]),
+]
+
+
+@pytest.mark.parametrize("normal_dictionary,gamer_dictionary,vocabulary",
+                         build_vocabulary_index_cases)
+def test_build_vocabulary_index(normal_dictionary, gamer_dictionary,
+                                vocabulary):
+    """
+    Test that build_vocabulary_index gives every word exactly one column.
+
+    Args:
+        normal_dictionary: A dictionary with strings as keys and floats as
+            values representing the normal dataset.
+        gamer_dictionary: A dictionary with strings as keys and floats as
+            values representing the gamer dataset.
+        vocabulary: The expected dictionary of words to integer columns.
+    """
+    assert build_vocabulary_index(normal_dictionary, gamer_dictionary) == \
+        vocabulary
+
+
+@pytest.mark.parametrize("normal_dictionary,gamer_dictionary,gamer_words,\
+users", score_users_cases)
+def test_score_users(normal_dictionary, gamer_dictionary, gamer_words, users):
+    """
+    Test that score_users gives exactly the same values as scoring each user
+    on its own with analyze_user_language.
+
+    Args:
+        normal_dictionary: A dictionary with strings as keys and floats as
+            values representing the normal dataset.
+        gamer_dictionary: A dictionary with strings as keys and floats as
+            values representing the gamer dataset.
+        gamer_words: A list of strings representing the gamer words.
+        users: A list of user dictionaries with strings as keys and integers
+            as values.
+    """
+    user_dictionaries = [clean_user_dictionary(user, ["ignored"])
+                         for user in users]
+    scores = score_users(normal_dictionary, gamer_dictionary, gamer_words,
+                         user_dictionaries)
+
+    for row, user in enumerate(users):
+        assert scores[row].tolist() == analyze_user_language(
+            normal_dictionary, gamer_dictionary, gamer_words, ["ignored"],
+            user)
+
+
+def test_score_users_empty_user():
+    """
+    Test that a user without any usable words raises a ZeroDivisionError, as
+    analyze_user_language does.
+    """
+    with pytest.raises(ZeroDivisionError):
+        analyze_user_language({"a": 1}, {"b": 1}, ["b"], [], {})
+    with pytest.raises(ZeroDivisionError):
+        score_users({"a": 1}, {"b": 1}, ["b"], [{"a": 1.0}, {}])
+
+
+def test_dictionary_to_vector():
+    """
+    Test that dictionary_to_vector places each value in its word's column.
+    """
+    vocabulary = build_vocabulary_index({"a": .1, "b": .9}, {"c": 1})
+    assert dictionary_to_vector({"c": 1, "a": .1}, vocabulary).tolist() == \
+        [.1, 0, 1]